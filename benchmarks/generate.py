@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import argparse
+import pathlib
+import random
+import string
+
+
+BATCH_SIZE = 100000
+RULES = (':', 'l', 'u', 'c', 'C', 't', 'r', 'd', 'f', '{', '}', '[', ']', 'q', 'k', 'K')
+SCALES = {
+    '10K': 10000,
+    '100K': 100000,
+    '1M': 1000000,
+    '10M': 10000000,
+    '100M': 100000000,
+}
+
+
+def parse_scale(value):
+    return SCALES.get(value.upper()) or int(value)
+
+
+def write_words(path, count, seed, min_length=4, max_length=12, alphabet=string.ascii_lowercase):
+    rnd = random.Random(seed)
+    with open(path, 'w') as fil:
+        remaining = count
+        while remaining:
+            batch = min(remaining, BATCH_SIZE)
+            fil.write(''.join(''.join(rnd.choices(alphabet, k=rnd.randint(min_length, max_length))) + '\n' for _ in range(batch)))
+            remaining -= batch
+
+
+def write_bits(path, count, seed):
+    rnd = random.Random(seed)
+    bits = set()
+    while len(bits) < count:
+        bits.add(''.join(rnd.choices(string.digits + string.punctuation, k=rnd.randint(1, 4))))
+    pathlib.Path(path).write_text(''.join(bit + '\n' for bit in sorted(bits)))
+
+
+def write_rules(path, count, seed):
+    rnd = random.Random(seed)
+    lines = [':']
+    while len(lines) < count:
+        functions = rnd.choices(RULES, k=rnd.randint(1, 3))
+        functions.append(rnd.choice(('$', '^')) + rnd.choice(string.digits + '!@#'))
+        lines.append(''.join(functions))
+    pathlib.Path(path).write_text(''.join(line + '\n' for line in lines))
+
+
+def dataset(directory, scale, seed=0, bits=10, rules=5):
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    write_words(directory / 'keywords.txt', scale, seed)
+    write_bits(directory / 'bits.txt', bits, seed)
+    write_rules(directory / 'bench.rule', rules, seed)
+    write_words(directory / 'diff-basic.txt', max(1, scale // 2), seed + 1)
+    write_words(directory / 'diff-extended.txt', scale, seed + 2)
+    return directory
+
+
+def entry_point():
+    parser = argparse.ArgumentParser(description='Synthetic wordlists generator')
+    parser.add_argument('-o', '--output', required=True, help='Output directory')
+    parser.add_argument('-s', '--scale', default='10K', help=f'Number of keywords ({", ".join(SCALES)} or a number)')
+    parser.add_argument('--bits', default=10, type=int, help='Number of bits')
+    parser.add_argument('--rules', default=5, type=int, help='Number of rules')
+    parser.add_argument('--seed', default=0, type=int, help='Random seed')
+    args = parser.parse_args()
+    dataset(args.output, parse_scale(args.scale), args.seed, args.bits, args.rules)
+
+
+if __name__ == '__main__':
+    entry_point()
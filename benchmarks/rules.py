@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import pathlib
+import shutil
+import subprocess
+import time
+import uuid
+
+from wordz import rules
+
+
+TESTS_DATA = pathlib.Path(__file__).parent.parent / 'tests' / 'data'
+
+
+def bench_native(wordlist, rule):
+    time_start = time.perf_counter()
+    compiled = rules.load(rule)
+    lines = 0
+    with open(os.devnull, 'wb') as devnull:
+        for batch in rules.mutate(rules.read_words(wordlist), compiled):
+            lines += len(batch)
+            devnull.write(b'\n'.join(batch) + b'\n')
+    return time.perf_counter() - time_start, lines
+
+
+def bench_hashcat(wordlist, rule, bin_hashcat):
+    time_start = time.perf_counter()
+    result = subprocess.run([bin_hashcat, '--stdout', f'--session={uuid.uuid4()}', '-r', str(rule), str(wordlist)], capture_output=True)
+    return time.perf_counter() - time_start, result.stdout.count(b'\n')
+
+
+def entry_point():
+    parser = argparse.ArgumentParser(description='Native rule engine vs. hashcat benchmark')
+    parser.add_argument('-w', '--wordlist', default=TESTS_DATA / 'keywords.txt', help='Wordlist to mutate')
+    parser.add_argument('-r', '--rule', action='append', help='Rule file (may be repeated)')
+    parser.add_argument('-n', '--repeat', default=5, type=int, help='Number of runs, the best one is reported')
+    parser.add_argument('--bin-hashcat', default='hashcat', help='Hashcat binary')
+    args = parser.parse_args()
+
+    rule_paths = args.rule or [TESTS_DATA / 'hashcat.rule', TESTS_DATA / 'hax0r.rule']
+    hashcat_found = shutil.which(args.bin_hashcat)
+    if not hashcat_found:
+        print(f'Binary `{args.bin_hashcat}` not found, benchmarking the native engine only')
+    for rule in rule_paths:
+        native = min(bench_native(args.wordlist, rule) for _ in range(args.repeat))
+        print(f'{rule}: native {native[0]:.6f}s ({native[1]} lines)')
+        if hashcat_found:
+            hashcat = min(bench_hashcat(args.wordlist, rule, args.bin_hashcat) for _ in range(args.repeat))
+            print(f'{rule}: hashcat {hashcat[0]:.6f}s ({hashcat[1]} lines), speedup x{hashcat[0] / native[0]:.2f}')
+
+
+if __name__ == '__main__':
+    entry_point()
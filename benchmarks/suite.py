@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import platform
+import shutil
+import tempfile
+import time
+
+import generate
+
+from wordz import (
+    Combinator,
+    logs,
+    profiling,
+    version,
+)
+
+
+OPERATIONS = ('rule', 'right', 'both', 'left', 'sort', 'merge', 'merge-compare', 'diff')
+
+
+def measure(operation, func, args, output=None):
+    time_start = time.perf_counter()
+    returned = func(*args)
+    seconds = time.perf_counter() - time_start
+    if output is None:
+        output = returned
+    paths = list(profiling.expand([output]))
+    lines = sum(profiling.count_lines(path) for path in paths)
+    size = sum(path.stat().st_size for path in paths)
+    result = {
+        'operation': operation,
+        'seconds': seconds,
+        'lines': lines,
+        'bytes': size,
+        'lines_per_second': lines / seconds if seconds else None,
+        'mb_per_second': size / 1024 / 1024 / seconds if seconds else None,
+    }
+    print(f'{operation:>14}: {seconds:10.3f}s {lines:>12} lines {result["lines_per_second"] or 0:>14.0f} lines/s {result["mb_per_second"] or 0:>8.2f} MB/s')
+    return result
+
+
+def run_scale(scale, args):
+    work_dir = pathlib.Path(tempfile.mkdtemp(prefix=f'wordz-bench-{scale}-', dir=args.work_dir))
+    try:
+        data_dir = generate.dataset(work_dir / 'data', scale, args.seed, args.bits, args.rules)
+        temp_dir = work_dir / 'tmp'
+        temp_dir.mkdir()
+        combinator = Combinator(
+            work_dir, temp_dir, work_dir / 'out', 4, args.cores, args.memory,
+            args.bin_hashcat, args.bin_combinator, args.bin_rli2, engine=args.engine,
+        )
+        keywords = data_dir / 'keywords.txt'
+        bits = data_dir / 'bits.txt'
+        history = temp_dir / 'history.txt'
+        ruled = combinator.rule_destination(keywords, data_dir / 'bench.rule')
+        combined = (
+            temp_dir / f'{ruled.stem}+{bits.stem}{Combinator.DEFAULT_EXT}',
+            temp_dir / f'{bits.stem}+{ruled.stem}{Combinator.DEFAULT_EXT}',
+        )
+        merged = work_dir / 'out' / 'merged.txt'
+        merged_compare = work_dir / 'out' / 'merged-compare.txt'
+        operations = {
+            'rule': (combinator.rule, keywords, data_dir / 'bench.rule'),
+            'right': (combinator.right, ruled, bits),
+            'both': (combinator.both, ruled, bits),
+            'left': (combinator.left, ruled, bits),
+            'sort': (combinator.sort, keywords, temp_dir / 'keywords-sorted.txt'),
+            'merge': (combinator.merge, merged, combined),
+            'merge-compare': (combinator.merge, merged_compare, combined, history),
+            'diff': (combinator.diff, 'data', 'diff'),
+        }
+        outputs = {
+            'sort': temp_dir / 'keywords-sorted.txt',
+            'merge': merged,
+            'merge-compare': merged_compare,
+            'diff': data_dir / 'diff-all.txt',
+        }
+        results = list()
+        print(f'Scale: {scale} keywords')
+        for operation in args.operations:
+            if operation == 'left':
+                # NOTE: Drop the intermediate file left by `both` so that `left` is measured on its own.
+                combinator.delete(combined[1])
+            if operation == 'merge-compare':
+                combinator.sort(combined[0], history)
+            func, *func_args = operations[operation]
+            result = measure(operation, func, func_args, outputs.get(operation))
+            result['scale'] = scale
+            results.append(result)
+        return results
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir)
+
+
+def compare(old_path, new_path):
+    old = json.loads(pathlib.Path(old_path).read_text())
+    new = json.loads(pathlib.Path(new_path).read_text())
+    old_results = {(result['scale'], result['operation']): result for result in old['results']}
+    print(f'{old_path} ({old["version"]}, {old["engine"]}) vs. {new_path} ({new["version"]}, {new["engine"]})')
+    for result in new['results']:
+        previous = old_results.get((result['scale'], result['operation']))
+        if previous is None:
+            continue
+        ratio = previous['seconds'] / result['seconds'] if result['seconds'] else float('inf')
+        print(f'{result["scale"]:>12} {result["operation"]:>14}: {previous["seconds"]:10.3f}s -> {result["seconds"]:10.3f}s x{ratio:.2f}')
+
+
+def entry_point():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Wordz operations benchmark')
+    parser.add_argument('-s', '--scales', nargs='+', default=['10K', '100K'], help=f'Numbers of keywords ({", ".join(generate.SCALES)} or numbers)')
+    parser.add_argument('-O', '--operations', nargs='+', default=OPERATIONS, choices=OPERATIONS, help='Operations to measure')
+    parser.add_argument('-o', '--output', help='Save results to a JSON file')
+    parser.add_argument('-c', '--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two results files and exit')
+    parser.add_argument('-w', '--work-dir', default=None, help='Directory for generated data')
+    parser.add_argument('-k', '--keep', action='store_true', help='Keep generated data')
+    parser.add_argument('--engine', default='shell', choices=('shell', 'native'), help='Engine to benchmark')
+    parser.add_argument('--bits', default=10, type=int, help='Number of bits')
+    parser.add_argument('--rules', default=5, type=int, help='Number of rules')
+    parser.add_argument('--seed', default=0, type=int, help='Random seed')
+    parser.add_argument('--cores', default=str(max(1, cpu_count - 1)), help='Number of cores to be used for sorting')
+    parser.add_argument('--memory', default='80%', help='Percentage of memory to be used for sorting')
+    parser.add_argument('--bin-hashcat', default='hashcat', help='Hashcat binary')
+    parser.add_argument('--bin-combinator', default='combinator.bin', help='Hashcat utils `combinator` binary')
+    parser.add_argument('--bin-rli2', default='rli2.bin', help='Hashcat utils `rli2` binary')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    logs.init(logs.logging.WARNING)
+    results = list()
+    for scale in args.scales:
+        results.extend(run_scale(generate.parse_scale(scale), args))
+    if args.output:
+        report = {
+            'version': version.__version__,
+            'engine': args.engine,
+            'created': datetime.datetime.now().isoformat(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cores': args.cores,
+            'results': results,
+        }
+        pathlib.Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f'Results saved to {args.output}')
+
+
+if __name__ == '__main__':
+    entry_point()
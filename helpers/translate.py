@@ -1,31 +1,183 @@
 #!/usr/bin/env python3
 
 import argparse
-import unidecode
+import collections
+import concurrent.futures
+import itertools
+import os
+import pathlib
+import sqlite3
+import sys
+import time
+import unicodedata
 
-from google.cloud import translate_v2
+try:
+    import unidecode
+except ImportError:
+    unidecode = None
+
+
+BATCH_SIZE = 128
+WORKERS = 4
+RETRIES = 3
+BACKOFF = 1.0
+CACHE_PATH = pathlib.Path(os.environ.get('XDG_CACHE_HOME') or pathlib.Path.home() / '.cache', 'wordz', 'translations.sqlite')
 
 
 def normalize(value):
-    return unidecode.unidecode(value)
+    if unidecode is not None:
+        return unidecode.unidecode(value)
+    # NOTE: Without `unidecode` only the accents are dropped, other scripts are lost.
+    return unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+
+
+class GoogleBackend:
+
+    def __init__(self, source_language='en', **kwargs):
+        from google.cloud import translate_v2
+        self.client = translate_v2.Client()
+        self.source_language = source_language
+        self.key = 'google'
+
+    def translate(self, words, language):
+        result = self.client.translate(words, source_language=self.source_language, target_language=language)
+        return [itm['translatedText'] for itm in result]
+
+
+class DictionaryBackend:
+
+    def __init__(self, dictionary=None, **kwargs):
+        if not dictionary:
+            raise Exception('The `dictionary` backend requires --dictionary FILE')
+        # NOTE: Tab separated lines of `language`, `word` and `translation`.
+        stat = pathlib.Path(dictionary).stat()
+        self.key = f'dictionary:{pathlib.Path(dictionary).resolve()}:{stat.st_size}:{stat.st_mtime_ns}'
+        self.entries = dict()
+        with open(dictionary, 'r') as fil:
+            for lin in fil:
+                parts = lin.rstrip('\n').split('\t')
+                if len(parts) == 3:
+                    self.entries[(parts[1], parts[0])] = parts[2]
+
+    def translate(self, words, language):
+        return [self.entries.get((word, language), word) for word in words]
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'dictionary': DictionaryBackend,
+}
+
+
+class Cache:
+
+    # NOTE: Translations are kept per backend (and dictionary) and source language, the same word differs between them.
+
+    def __init__(self, path, backend, source_language):
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.backend = backend
+        self.source_language = source_language
+        self.connection = sqlite3.connect(path)
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(translations)')]
+        if columns and 'backend' not in columns:
+            # NOTE: Made by an earlier version which did not record where the translations came from.
+            with self.connection:
+                self.connection.execute('DROP TABLE translations')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS translations (backend TEXT, source_language TEXT, language TEXT, word TEXT, translation TEXT, PRIMARY KEY (backend, source_language, language, word))')
+
+    def get(self, words, language):
+        found = dict()
+        for offset in range(0, len(words), 500):
+            chunk = words[offset:offset + 500]
+            query = f'SELECT word, translation FROM translations WHERE backend = ? AND source_language = ? AND language = ? AND word IN ({", ".join("?" * len(chunk))})'
+            found.update(self.connection.execute(query, [self.backend, self.source_language, language] + chunk))
+        return found
+
+    def put(self, translations, language):
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)', [(self.backend, self.source_language, language, word, translation) for word, translation in translations.items()])
+
+    def close(self):
+        self.connection.close()
+
+
+def unique_words(lines):
+    seen = set()
+    for lin in lines:
+        word = lin.strip()
+        if word and word not in seen:
+            seen.add(word)
+            yield word
+
+
+def translate_batch(backend, words, language, retries=RETRIES, backoff=BACKOFF):
+    for attempt in itertools.count():
+        try:
+            translations = backend.translate(words, language)
+            if len(translations) != len(words):
+                raise Exception(f'Expected {len(words)} translations, got {len(translations)}')
+            return dict(zip(words, translations))
+        except Exception as exc:
+            if attempt >= retries:
+                raise
+            delay = backoff * 2 ** attempt
+            print(f'Translating {len(words)} words failed ({exc}), retrying in {delay:.1f}s', file=sys.stderr)
+            time.sleep(delay)
+
+
+def translate(lines, language, backend, cache=None, batch_size=BATCH_SIZE, workers=WORKERS, retries=RETRIES, backoff=BACKOFF):
+    words = unique_words(lines)
+    pending = collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        while True:
+            # NOTE: Batches are read ahead only as far as the pool can work on, results keep the input order.
+            while len(pending) < workers * 2:
+                batch = list(itertools.islice(words, batch_size))
+                if not batch:
+                    break
+                cached = cache.get(batch, language) if cache is not None else dict()
+                missing = [word for word in batch if word not in cached]
+                future = executor.submit(translate_batch, backend, missing, language, retries, backoff) if missing else None
+                pending.append((batch, cached, future))
+            if not pending:
+                return
+            batch, cached, future = pending.popleft()
+            if future is not None:
+                translated = future.result()
+                if cache is not None:
+                    cache.put(translated, language)
+                cached.update(translated)
+            for word in batch:
+                yield word, cached[word]
 
 
 def entry_point():
-    parser = argparse.ArgumentParser(description='Translation script')
-    parser.add_argument('-s', '--source', required=True, help=f'Source file (English keywords')
+    parser = argparse.ArgumentParser(description='Translation script', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-s', '--source', required=True, help='Source file (English keywords), `-` for standard input')
     parser.add_argument('-l', '--language', required=True, help='Language code to translate to')
+    parser.add_argument('--source-language', default='en', help='Language code of the source file')
+    parser.add_argument('--backend', default='google', choices=tuple(BACKENDS), help='Translation backend')
+    parser.add_argument('--dictionary', default=None, metavar='FILE', help='Tab separated `language`, `word` and `translation` lines used by the `dictionary` backend')
+    parser.add_argument('--cache', default=str(CACHE_PATH), metavar='PATH', help='Database of translations already made')
+    parser.add_argument('--no-cache', action='store_true', default=False, help='Do not read or update the cache')
+    parser.add_argument('--batch-size', default=BATCH_SIZE, type=int, help='Words sent in a single request')
+    parser.add_argument('--workers', default=WORKERS, type=int, help='Requests made at the same time')
+    parser.add_argument('--retries', default=RETRIES, type=int, help='Attempts made again when a request fails')
+    parser.add_argument('--backoff', default=BACKOFF, type=float, help='Seconds to wait before the first retry, doubled for the following ones')
     args = parser.parse_args()
 
-    translate_client = translate_v2.Client()
-
-    with open(args.source, 'r') as fil:
-        inp = fil.readlines()
-        while inp:
-            segment = [lin.strip() for lin in inp[:128]]
-            result = translate_client.translate(segment, source_language='en', target_language=args.language)
-            words = '\n'.join([normalize(itm['translatedText']) for itm in result])
-            del(inp[:128])
-            print(words)
+    backend = BACKENDS[args.backend](source_language=args.source_language, dictionary=args.dictionary)
+    cache = None if args.no_cache else Cache(args.cache, backend.key, args.source_language)
+    fil = sys.stdin if args.source == '-' else open(args.source, 'r')
+    try:
+        for _, translation in translate(fil, args.language, backend, cache, args.batch_size, args.workers, args.retries, args.backoff):
+            print(normalize(translation))
+    finally:
+        if fil is not sys.stdin:
+            fil.close()
+        if cache is not None:
+            cache.close()
 
 
 if __name__ == '__main__':
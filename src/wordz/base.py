@@ -1,30 +1,88 @@
-import concurrent.futures
+import contextlib
 import datetime
 import functools
 import hashlib
+import json
 import os
 import pathlib
 import shutil
 import subprocess
+import threading
 import uuid
 
-from wordz import logs
+from wordz import (
+    compression,
+    journal,
+    logs,
+    merging,
+    packed,
+    probes,
+    resources,
+    scheduler,
+    sizes,
+    version,
+)
 
 
 os.environ['LC_ALL'] = 'C'
+LOCKS = dict()
+LOCKS_GUARD = threading.Lock()
+
+
+# NOTE: Probes are shared by all instances and cached on disk per host, see `probes`.
+@functools.cache
+def which(name):
+    return probes.get().which(str(name))
+
+
+@functools.cache
+def comm_command():
+    return probes.get().comm()
+
+
+def file_version(path):
+    # NOTE: Unlike the path, the inode is kept when a finished file is moved in place.
+    stat = pathlib.Path(path).stat()
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def path_lock(path):
+    with LOCKS_GUARD:
+        return LOCKS.setdefault(pathlib.Path(path).absolute(), threading.RLock())
+
+
+@contextlib.contextmanager
+def locked(*paths):
+    with contextlib.ExitStack() as stack:
+        for path in sorted(set(pathlib.Path(path).absolute() for path in paths if path)):
+            stack.enter_context(path_lock(path))
+        yield
 
 
 class Combinator:
 
     wordlists = None
     rules = None
+    lazy = False
+    streaming = False
+    bloom = None
+    shards = 1
+    partition = ()
+    order = None
+    incremental = False
+    require_classes = ''
+    min_classes = 0
+    deny = ()
+    normalize = ()
 
     LEFT = 1
     BOTH = 2
     RIGHT = 3
     DEFAULT_EXT = '.txt'
+    ENGINE_SHELL = 'shell'
+    ENGINE_NATIVE = 'native'
 
-    def __init__(self, base_dir, temp_dir, output_dir, min_length, cores, memory, bin_hashcat, bin_combinator, bin_rli2):
+    def __init__(self, base_dir, temp_dir, output_dir, min_length, cores, memory, bin_hashcat, bin_combinator, bin_rli2, engine=ENGINE_SHELL, lazy=None, cache_size=None, streaming=None, bloom=None, profile=None, shards=None, shard_dir=None, resume=False, temp_codec=None, max_length=None, partition=None, order=None, incremental=None, require_classes=None, min_classes=None, deny=None, normalize=None, profile_lines=False):
         self.checks_ok = True
         if not pathlib.Path.exists(pathlib.Path(temp_dir)):
             logs.logger.error(f'Temporary directory `{temp_dir}` does not exist!')
@@ -32,29 +90,120 @@ class Combinator:
         self.base_dir = base_dir
         self.temp_dir = pathlib.Path(temp_dir).absolute()
         self.output_dir = pathlib.Path(output_dir).absolute()
-        self.min_length = min_length
+        self.min_length = int(min_length)
+        self.max_length = int(max_length) if max_length else None
         self.cores = cores
         self.memory = memory
-        self.compress_program = '--compress-program=lzop' if shutil.which('lzop') else ''
-        self.sort_snippet = f'sort -T {self.temp_dir} {self.compress_program} --parallel={cores} -S {memory}'
+        self.temp_codec = compression.get(temp_codec)
+        if self.temp_codec and engine != self.ENGINE_NATIVE:
+            logs.logger.warning(f'Compressing temporary files requires the `{self.ENGINE_NATIVE}` engine, ignoring')
+            self.temp_codec = None
+        if self.temp_codec and which(self.temp_codec.binary):
+            self.compress_program = f'--compress-program={self.temp_codec.binary}'
+        else:
+            self.compress_program = '--compress-program=lzop' if which('lzop') else ''
         self.bin_hashcat = bin_hashcat
         self.bin_combinator = bin_combinator
         self.bin_rli2 = bin_rli2
-        self.check_which(self.bin_hashcat)
-        self.check_which(self.bin_combinator)
-        self.check_which(self.bin_rli2)
-        output = subprocess.run('comm --nocheck-order', shell=True, capture_output=True).stderr
-        if b'illegal option' in output:
-            self.comm_ver = 'comm'
-        else:
-            self.comm_ver = 'comm --nocheck-order'
+        self.engine = engine
+        if lazy is not None:
+            self.lazy = lazy
+        if streaming is not None:
+            self.streaming = streaming
+        if bloom is not None:
+            self.bloom = float(bloom)
+        if self.bloom and self.engine != self.ENGINE_NATIVE:
+            logs.logger.warning(f'Bloom filter requires the `{self.ENGINE_NATIVE}` engine, ignoring')
+            self.bloom = None
+        if shards is not None:
+            self.shards = shards
+        if partition is not None:
+            self.partition = tuple(partition)
+        if order is not None:
+            self.order = order
+        if incremental is not None:
+            self.incremental = incremental
+        if require_classes is not None:
+            self.require_classes = require_classes
+        if min_classes is not None:
+            self.min_classes = int(min_classes)
+        if deny is not None:
+            self.deny = tuple(deny)
+        if normalize is not None:
+            self.normalize = tuple(normalize)
+        self.filtering = bool(self.require_classes or self.min_classes or self.deny or self.normalize)
+        if self.filtering and self.engine != self.ENGINE_NATIVE:
+            logs.logger.warning(f'Filtering requires the `{self.ENGINE_NATIVE}` engine, ignoring')
+            self.filtering = False
+        if self.filtering:
+            # NOTE: Validates the options before anything is built.
+            self.filter_policy()
+        self.filters = list()
+        self.shard_dir = shard_dir
+        self.stages = list()
+        self.profile_path = profile
+        self.profiler = None
+        if profile:
+            from wordz import profiling
+            self.profiler = profiling.Profiler(count_lines=profile_lines)
+        self.sorted_paths = set()
+        self.line_counts = dict()
+        self.deferred = dict()
+        self.ranks = dict()
+        self.scheduler = scheduler.Scheduler(cores)
+        # NOTE: The event loop running the shell commands is only started by the first of them.
+        self.shell_runner = None
+        self.runner_lock = threading.Lock()
+        self.planner = resources.Planner(cores, memory)
+        self.resume = resume
+        self.journal = None
+        if self.temp_dir.is_dir():
+            self.journal = journal.Journal(self.temp_dir / journal.FILENAME)
+        self.tracker = None
+        if self.incremental and self.temp_dir.is_dir():
+            from wordz import tracking
+            self.tracker = tracking.Tracker(self.temp_dir / tracking.DIRECTORY, self.temp_dir)
+        self.cache = None
+        if cache_size is not None and self.temp_dir.is_dir():
+            from wordz import cache
+            self.cache = cache.shared(self.cache_dir(self.temp_dir), sizes.parse_size(cache_size))
+        self.check_which(self.bin_hashcat, required=self.engine != self.ENGINE_NATIVE)
+        self.check_which(self.bin_combinator, required=self.engine != self.ENGINE_NATIVE)
+        self.check_which(self.bin_rli2, required=self.engine != self.ENGINE_NATIVE)
         if not self.checks_ok:
             raise Exception('Failed on startup')
 
-    def check_which(self, name):
-        if not shutil.which(pathlib.Path(name)):
-            logs.logger.error(f'Binary `{name}` not found - consider adding it to $PATH environment variable')
-            self.checks_ok = False
+    @property
+    def runner(self):
+        with self.runner_lock:
+            if self.shell_runner is None:
+                from wordz import runner
+                self.shell_runner = runner.Runner(self.cores)
+            return self.shell_runner
+
+    @property
+    def comm_ver(self):
+        return comm_command()
+
+    @staticmethod
+    def cache_dir(temp_dir):
+        return pathlib.Path(temp_dir, '.cache')
+
+    @functools.cache
+    def binary_id(self, name):
+        path = which(name)
+        if path is None:
+            return name
+        stat = pathlib.Path(path).stat()
+        return f'{path}:{stat.st_size}:{stat.st_mtime_ns}'
+
+    def check_which(self, name, required=True):
+        if not which(name):
+            if required:
+                logs.logger.error(f'Binary `{name}` not found - consider adding it to $PATH environment variable')
+                self.checks_ok = False
+            else:
+                logs.logger.warning(f'Binary `{name}` not found - fallback for the `{self.engine}` engine will not be available')
 
     def exist(self, *paths):
         for path in paths:
@@ -69,41 +218,206 @@ class Combinator:
             logs.logger.debug(f'Creating directory `{destination}`')
             dest_path.mkdir(parents=True)
 
-    def run_shell(self, cmd):
-        logs.logger.debug(f' $ {cmd}')
-        subprocess.run(cmd, shell=True)
+    def run_shell(self, cmd, check=True):
+        return self.runner.run(cmd, check, self.usage())
+
+    def run_shell_all(self, cmds, check=True):
+        return self.runner.run_all(cmds, check, self.usage())
+
+    @contextlib.contextmanager
+    def sorting(self, name):
+        with self.planner.allocate(name) as allocation:
+            yield f'sort -T {self.temp_dir} {self.compress_program} {allocation.sort_options}'
+
+    def profile(self, step, name, inputs=(), outputs=()):
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.step(step, name, inputs, outputs)
+
+    def usage(self):
+        if self.profiler is None:
+            return None
+        return self.profiler.collector()
+
+    def defer(self, func, *args):
+        args = [self.deferred.get(arg, arg) for arg in args]
+        return scheduler.Node(func, *args)
+
+    def resolve(self, items):
+        items = list(items)
+        jobs = items + [node for node in self.deferred.values() if not node.done]
+        try:
+            with self.planner.expect(min(len(scheduler.collect(jobs)), self.scheduler.workers)):
+                results = self.scheduler.run(jobs)
+        except Exception:
+            if self.shell_runner is not None:
+                self.shell_runner.cancel()
+            raise
+        return results[:len(items)]
 
     def wordlists_process(self):
         if self.wordlists and self.rules:
+            if self.lazy:
+                for rule in self.rules:
+                    for wordlist in self.wordlists:
+                        wordlist_path = pathlib.Path(self.base_dir, wordlist)
+                        rule_path = pathlib.Path(self.base_dir, rule)
+                        destination = self.rule_destination(wordlist_path, rule_path)
+                        self.deferred[destination] = scheduler.Node(self.rule, wordlist_path, rule_path)
+                return
             for rule in self.rules:
                 logs.logger.info(f'Processing wordlists with rules `{rule}`')
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    for wordlist in self.wordlists:
-                        executor.submit(self.rule, pathlib.Path(self.base_dir, wordlist), pathlib.Path(self.base_dir, rule))
+                self.resolve([scheduler.Node(self.rule, pathlib.Path(self.base_dir, wordlist), pathlib.Path(self.base_dir, rule)) for wordlist in self.wordlists])
 
-    def rule(self, wordlist, rule, dest_dir=None):
+    def rule_destination(self, wordlist, rule, dest_dir=None):
         if dest_dir is None:
             dest_dir = self.temp_dir
-        filename = f'{rule.stem}-{wordlist.parts[-2]}-{wordlist.stem}{self.DEFAULT_EXT}'
-        destination = pathlib.Path(dest_dir, filename)
-        if not destination.is_file():
-            logs.logger.info(f'Processing `{wordlist}` with rule `{rule}`')
-            self.run_shell(f'{self.bin_hashcat} --stdout --session={uuid.uuid4()} -r {rule} {wordlist} | {self.sort_snippet} | uniq > {destination}')
+        filename = f'{rule.stem}-{wordlist.parts[-2]}-{compression.stem(wordlist)}{self.DEFAULT_EXT}'
+        return pathlib.Path(dest_dir, filename)
+
+    def build(self, destination, key_parts, func, *args):
+        # NOTE: Jobs running in the same process (see `wordz serve`) wait for each other and share the result.
+        with locked(destination):
+            return self.build_locked(destination, key_parts, func, *args)
+
+    def build_locked(self, destination, key_parts, func, *args):
+        journal_key = self.journal.key(*key_parts)
+        if self.cache is None:
+            if self.resume:
+                if self.journal.verify(journal_key, destination):
+                    logs.logger.debug(f'Resuming, `{destination}` is complete')
+                    return destination
+            elif destination.is_file():
+                return destination
+            self.build_atomic(destination, func, *args)
+        else:
+            key = self.cache.key(*key_parts)
+            if not self.cache.fetch(key, destination):
+                self.delete(destination)
+                self.build_atomic(destination, func, *args)
+                self.cache.store(key, destination)
+        self.journal.record(journal_key, destination)
         return destination
 
-    def sort(self, source, output=None, unique=False):
-        cmd = f'{self.sort_snippet} {source}'
-        if unique:
-            cmd += ' -u'
-        if output is None:
-            output = self.temp(source.stem + '-sort-tmp-replace' + self.DEFAULT_EXT)
-            cmd += f' -o {output}'
-            self.run_shell(cmd)
-            self.delete(source)
-            self.move(output, source)
+    def build_atomic(self, destination, func, *args):
+        # NOTE: Write to a temporary name so that an interrupted step never leaves a complete-looking file behind.
+        partial = destination.with_name(destination.name + '.partial')
+        try:
+            func(*[partial if arg == destination else arg for arg in args])
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        os.replace(partial, destination)
+
+    def rule(self, wordlist, rule, dest_dir=None):
+        destination = self.rule_destination(wordlist, rule, dest_dir)
+        engine_id = self.binary_id(self.bin_hashcat)
+        if self.engine == self.ENGINE_NATIVE:
+            engine_id += f':wordz-{version.__version__}:{self.temp_codec}'
+        with self.profile('rule', destination, [wordlist, rule], [destination]):
+            if not self.update(destination, [wordlist], functools.partial(self.rule_delta, rule), fixed=[rule]):
+                self.build(destination, ('rule', self.engine, engine_id, wordlist, rule), self.rule_build, wordlist, rule, destination)
+        self.sorted_paths.add(destination)
+        self.ranks[destination] = self.rule_rank(rule)
+        return destination
+
+    def rule_delta(self, rule, deltas, output, destination):
+        self.rule_build(deltas[0], rule, output)
+        self.fold(destination, output)
+
+    def rule_rank(self, rule):
+        paths = [pathlib.Path(self.base_dir, path) for path in self.rules or ()]
+        return paths.index(rule) if rule in paths else 0
+
+    def rule_build(self, wordlist, rule, destination):
+        logs.logger.info(f'Processing `{wordlist}` with rule `{rule}`')
+        if self.engine == self.ENGINE_NATIVE:
+            from wordz import rules
+            try:
+                compiled = rules.load(rule)
+            except rules.UnsupportedRule as exc:
+                logs.logger.warning(f'{exc}, falling back to `{self.bin_hashcat}`')
+            else:
+                self.rule_native(wordlist, compiled, destination)
+                return
+        hashcat = f'{self.bin_hashcat} --stdout --session={uuid.uuid4()} -r {rule}'
+        if compression.detect(wordlist):
+            hashcat = f'{compression.read_command(wordlist)} | {hashcat}'
         else:
-            cmd += f' -o {output}'
-            self.run_shell(cmd)
+            hashcat = f'{hashcat} {wordlist}'
+        with self.sorting(destination) as sort_snippet:
+            self.run_shell(f'{hashcat} | {sort_snippet} | uniq > {destination}')
+
+    def rule_native(self, wordlist, compiled, destination):
+        from wordz import (
+            rules,
+            runner,
+        )
+        with self.sorting(destination) as sort_snippet:
+            compress = f' | {compression.compress_command(self.temp_codec)}' if self.temp_codec else ''
+            cmd = f'{sort_snippet} | uniq{compress} > {destination}'
+            logs.logger.debug(f' $ {cmd} (native rules)')
+            with self.runner.slot(), subprocess.Popen([*runner.SHELL, cmd], stdin=subprocess.PIPE) as proc:
+                for batch in rules.mutate(rules.read_words(wordlist), compiled):
+                    if batch:
+                        proc.stdin.write(b'\n'.join(batch) + b'\n')
+                proc.stdin.close()
+                runner.wait(proc, self.usage())
+        if proc.returncode:
+            raise runner.CommandError(cmd, proc.returncode)
+
+    def check_plain(self, *paths):
+        # NOTE: `sort`, `comm` and `combinator.bin` only read plain text.
+        for path in filter(None, paths):
+            path = pathlib.Path(path)
+            for fil in sorted(path.parent.glob(path.name)) if '*' in path.name else [path]:
+                if fil.suffix == packed.EXT or packed.is_packed(fil):
+                    raise Exception(f'Packed wordlist {fil} requires the `{self.ENGINE_NATIVE}` engine. Aborting')
+                if compression.from_extension(fil) or compression.detect(fil):
+                    raise Exception(f'Compressed wordlist {fil} requires the `{self.ENGINE_NATIVE}` engine. Aborting')
+
+    def is_sorted(self, path):
+        path = pathlib.Path(path)
+        if path in self.sorted_paths:
+            return True
+        if not path.is_file():
+            return False
+        if self.engine == self.ENGINE_NATIVE:
+            return merging.is_sorted(path)
+        return self.run_shell(f'sort -C {path}', check=False) == 0
+
+    def sort(self, source, output=None, unique=False):
+        with self.profile('sort', output or source, [source], [output or source]):
+            if self.engine == self.ENGINE_NATIVE:
+                self.sort_native(source, output, unique)
+                return
+            self.check_plain(source, output)
+            presorted = self.is_sorted(source)
+            with self.sorting(output or source) as sort_snippet:
+                cmd = f'{sort_snippet} {source}'
+                if unique:
+                    cmd += ' -u'
+                if presorted:
+                    cmd += ' -m'
+                self.sorted_paths.add(pathlib.Path(source if output is None else output))
+                if output is None:
+                    output = self.temp(source.stem + '-sort-tmp-replace' + self.DEFAULT_EXT)
+                    cmd += f' -o {output}'
+                    self.run_shell(cmd)
+                    self.delete(source)
+                    self.move(output, source)
+                else:
+                    cmd += f' -o {output}'
+                    self.run_shell(cmd)
+
+    def sort_native(self, source, output=None, unique=False):
+        source = pathlib.Path(source)
+        sources = sorted(source.parent.glob(source.name)) if '*' in source.name else [source]
+        destination = source if output is None else pathlib.Path(output)
+        output_temp = self.temp(destination.stem + '-sort-tmp-replace' + self.DEFAULT_EXT)
+        merging.merge_files(sources, output_temp, self.temp_dir, presorted=[self.is_sorted(path) for path in sources], dedup=unique)
+        self.move(output_temp, destination)
+        self.sorted_paths.add(destination)
 
     def copy(self, source, destination):
         logs.logger.debug(f'Copying `{source}` to {destination}')
@@ -112,18 +426,27 @@ class Combinator:
 
     def append(self, source, destination):
         self.ensure_path(destination)
-        if source.is_file():
-            self.run_shell(f'cat {source} >> {destination}')
-        else:
+        self.sorted_paths.discard(pathlib.Path(destination))
+        if not source.is_file():
             logs.logger.warning(f'`{source}` not found!')
+        elif self.engine == self.ENGINE_NATIVE and (compression.detect(source) or compression.detect(destination)):
+            merging.write_lines(merging.read_lines(source), destination, mode='ab', codec=compression.detect(destination))
+        else:
+            self.run_shell(f'cat {source} >> {destination}')
 
     def move(self, source, destination):
         self.ensure_path(destination)
         logs.logger.debug(f'Moving `{source}` to {destination}')
+        if pathlib.Path(source) in self.sorted_paths:
+            self.sorted_paths.add(pathlib.Path(destination))
+        else:
+            self.sorted_paths.discard(pathlib.Path(destination))
+        self.sorted_paths.discard(pathlib.Path(source))
         shutil.move(source, destination)
 
     def delete(self, destination):
         logs.logger.debug(f'Deleting `{destination}`')
+        self.sorted_paths.discard(pathlib.Path(destination))
         pathlib.Path.unlink(destination, missing_ok=True)
 
     def delete_all(self, starts_with, destination):
@@ -133,8 +456,15 @@ class Combinator:
             pathlib.Path.unlink(fil)
 
     def compare(self, left, right, output, append=False):
-        redir = '>>' if append else '>'
-        self.run_shell(f'{self.comm_ver} -13 {left} {right} {redir} {output}')
+        with self.profile('compare', output, [left, right], [output]):
+            if self.engine == self.ENGINE_NATIVE:
+                logs.logger.debug(f'Comparing `{left}` with `{right}`')
+                lines = merging.subtract(merging.read_lines(right), merging.read_lines(left))
+                merging.write_lines(lines, output, mode='ab' if append else 'wb')
+                return
+            self.check_plain(left, right, output)
+            redir = '>>' if append else '>'
+            self.run_shell(f'{self.comm_ver} -13 {left} {right} {redir} {output}')
 
     @functools.cache
     def temp(self, name):
@@ -150,35 +480,129 @@ class Combinator:
 
     @functools.cache
     def right(self, left, right):
+        if self.lazy:
+            return self.defer(self.combine, self.RIGHT, left, right)
         return self.combine(self.RIGHT, left, right)
 
     @functools.cache
     def left(self, left, right):
+        if self.lazy:
+            return self.defer(self.combine, self.LEFT, left, right)
         return self.combine(self.LEFT, left, right)
 
     @functools.cache
     def both(self, left, right):
+        if self.lazy:
+            if self.engine == self.ENGINE_NATIVE:
+                return self.defer(self.combine, self.BOTH, left, right)
+            # NOTE: The intermediate `right+left` file is exactly the output of `left()`, chain it as an edge.
+            return self.defer(self.combine, self.RIGHT, self.left(left, right), right)
         return self.combine(self.BOTH, left, right)
 
+    def combine_destination(self, *paths):
+        return pathlib.Path(self.temp_dir, '+'.join(compression.stem(path) for path in paths) + self.DEFAULT_EXT)
+
+    def combine_paths(self, *paths):
+        destination = self.combine_destination(*paths)
+        if self.engine == self.ENGINE_NATIVE:
+            engine_id = f'wordz-{version.__version__}:{self.temp_codec}'
+        else:
+            engine_id = self.binary_id(self.bin_combinator)
+        key_parts = ('combine', engine_id) + paths
+        self.ranks[destination] = max(self.ranks.get(path, 0) for path in paths)
+        with self.profile('combine', destination, paths, [destination]):
+            if self.update(destination, paths, functools.partial(self.combine_delta, paths)):
+                return destination
+            return self.build(destination, key_parts, self.combine_build, paths, destination)
+
+    def combine_delta(self, paths, deltas, output, destination):
+        # NOTE: Every new combination has at least one new part, combinations with several of them are written more than once.
+        parts = list()
+        for idx, delta in enumerate(deltas):
+            if delta is not None:
+                part = self.tracker.path(destination, f'delta-{idx}')
+                self.combine_build(paths[:idx] + (delta,) + paths[idx + 1:], part)
+                parts.append(part)
+        self.concat(output, parts)
+        if destination.stat().st_nlink > 1:
+            # NOTE: Shared with the cache, which keeps the previous version, the lines are added to a copy of it.
+            updated = self.temp(destination.stem + '-delta-tmp' + destination.suffix)
+            self.copy(destination, updated)
+            self.append(output, updated)
+            self.move(updated, destination)
+        else:
+            self.append(output, destination)
+
+    def combine_build(self, paths, destination):
+        logs.logger.info('Combining ' + ' with '.join(f'`{compression.stem(path)}`' for path in paths))
+        lines, size = self.check_space(paths, destination)
+        if self.engine == self.ENGINE_NATIVE:
+            from wordz import combining
+            combining.write_combined(paths, destination, self.temp_codec)
+        else:
+            self.check_plain(*paths)
+            first, second = paths
+            self.run_shell(f'{self.bin_combinator} {first} {second} > {destination}')
+        self.line_counts[file_version(destination)] = (lines, size - lines)
+
+    def update(self, destination, paths, build_delta, fixed=()):
+        if self.tracker is None:
+            return False
+        from wordz import tracking
+        changes = [self.tracker.changes(path, destination) for path in paths]
+        fixed = [self.tracker.changes(path, destination) for path in fixed]
+        if not destination.is_file() or any(status != tracking.SAME for status, _ in fixed) or any(status == tracking.REBUILT for status, _ in changes):
+            self.tracker.produced(destination, tracking.REBUILT)
+            self.delete(destination)
+            return False
+        before = journal.stamp(destination)
+        if all(status == tracking.SAME for status, _ in changes):
+            logs.logger.debug(f'Inputs of `{destination}` are unchanged')
+            self.tracker.produced(destination, tracking.SAME, before=before)
+            return True
+        logs.logger.info(f'Adding new lines to `{destination}`')
+        output = self.tracker.path(destination, 'delta')
+        build_delta([delta if status == tracking.ADDED else None for status, delta in changes], output, destination)
+        self.tracker.produced(destination, tracking.ADDED, output, before)
+        return True
+
+    def fold(self, destination, added):
+        folded = self.temp(destination.stem + '-fold-tmp' + destination.suffix)
+        lines = merging.merge_lines([destination, added], self.temp_dir, presorted=[self.is_sorted(destination), merging.is_sorted(added)])
+        merging.write_lines(lines, folded, codec=compression.detect(destination))
+        self.move(folded, destination)
+        self.sorted_paths.add(destination)
+
+    def line_stats(self, path):
+        # NOTE: Kept per version of the file, combinations reuse the counts of their inputs and of the ones written before.
+        key = file_version(path)
+        if key not in self.line_counts:
+            from wordz import combining
+            self.line_counts[key] = combining.stats(path)
+        return self.line_counts[key]
+
+    def estimate(self, *paths):
+        from wordz import combining
+        return combining.expected([self.line_stats(path) for path in paths])
+
+    def check_space(self, paths, destination):
+        lines, size = self.estimate(*paths)
+        free = shutil.disk_usage(destination.parent).free
+        logs.logger.debug(f'Expecting {lines} lines ({sizes.format_size(size)}) in `{destination}`')
+        if size > free:
+            raise Exception(f'Combining would write {sizes.format_size(size)} to `{destination}` but only {sizes.format_size(free)} is available. Aborting')
+        return lines, size
+
     def combine(self, method, left, right):
         if self.exist(left, right):
             if method is self.RIGHT:
-                destination = pathlib.Path(self.temp_dir, f'{left.stem}+{right.stem}{self.DEFAULT_EXT}')
-                if not destination.is_file():
-                    logs.logger.info(f'Combining `{left.stem}` with `{right.stem}`')
-                    self.run_shell(f'{self.bin_combinator} {left} {right} > {destination}')
+                destination = self.combine_paths(left, right)
             elif method is self.LEFT:
-                destination = pathlib.Path(self.temp_dir, f'{right.stem}+{left.stem}{self.DEFAULT_EXT}')
-                if not destination.is_file():
-                    logs.logger.info(f'Combining `{right.stem}` with `{left.stem}`')
-                    self.run_shell(f'{self.bin_combinator} {right} {left} > {destination}')
+                destination = self.combine_paths(right, left)
+            elif method is self.BOTH and self.engine == self.ENGINE_NATIVE:
+                destination = self.combine_paths(right, left, right)
             elif method is self.BOTH:
-                if not pathlib.Path(self.temp_dir, f'{right.stem}+{left.stem}{self.DEFAULT_EXT}').is_file():
-                    self.run_shell(f'{self.bin_combinator} {right} {left} > {self.temp_dir}/{right.stem}+{left.stem}{self.DEFAULT_EXT}')
-                destination = pathlib.Path(self.temp_dir, f'{right.stem}+{left.stem}+{right.stem}{self.DEFAULT_EXT}')
-                if not destination.is_file():
-                    logs.logger.info(f'Combining `{left.stem}` with `{right.stem}`')
-                    self.run_shell(f'{self.bin_combinator} {self.temp_dir}/{right.stem}+{left.stem}{self.DEFAULT_EXT} {right} > {destination}')
+                destination = self.combine_paths(self.combine_paths(right, left), right)
             else:
                 raise NotImplementedError
             logs.logger.info(f'Combined `{destination}`')
@@ -189,34 +613,371 @@ class Combinator:
             else:
                 raise Exception(f'Path {left} does not exist. Aborting')
 
-    def merge(self, destination, wordlists, compare=None):
+    @property
+    def length_filter(self):
+        if self.max_length:
+            return f'awk "length >= {self.min_length} && length <= {self.max_length}"'
+        return f'awk "length >= {self.min_length}"'
+
+    def merge(self, destination, wordlists, compare=None, presorted=None, partition=None, order=None, weights=None):
         logs.logger.info(f'Merging: {destination}')
         self.ensure_path(destination)
-        wordlists = [words for words in wordlists if words is not None]
+        wordlists = [words for words in self.resolve(wordlists) if words is not None]
+        with locked(destination, compare):
+            self.merge_locked(destination, wordlists, compare, presorted, partition, order, weights)
+
+    def merge_locked(self, destination, wordlists, compare=None, presorted=None, partition=None, order=None, weights=None):
         for wordlist in wordlists:
             if wordlist.stat().st_size == 0:
                 raise Exception(f'Wordlist {wordlist} is empty, something is not right. Aborting')
+        if self.engine != self.ENGINE_NATIVE:
+            self.check_plain(*wordlists, compare, destination)
+        # NOTE: Inputs are part of the key with their stamps, `compare` only by name as merging updates it.
+        journal_key = self.journal.key('merge', str(destination), str(compare), *[pathlib.Path(path) for path in wordlists], self.min_length, self.max_length, self.filtering and [self.require_classes, self.min_classes, list(self.deny), list(self.normalize)])
+        if self.resume and self.journal.verify(journal_key, destination, compare):
+            logs.logger.info(f'Resuming, `{destination}` is complete')
+            self.sorted_paths.add(destination)
+            return
+        if self.tracker is not None and self.merge_incremental(destination, wordlists, compare, partition, order):
+            self.journal.record(journal_key, destination, compare)
+            return
         self.delete(destination)
+        partition = self.partition if partition is None else partition
+        partitioner = None
+        if partition:
+            from wordz import partitioning
+            partitioner = partitioning.Partitioner(destination, partition)
+        order = self.order if order is None else order
+        if order and destination.suffix == packed.EXT:
+            raise Exception(f'Packed wordlist {destination} cannot be ordered by probability. Aborting')
+        with self.profile('merge', destination, wordlists, [destination]):
+            if presorted is None:
+                presorted = [self.is_sorted(wordlist) for wordlist in wordlists]
+            elif isinstance(presorted, bool):
+                presorted = [presorted] * len(wordlists)
+            model = None
+            if order:
+                from wordz import ordering
+                if order == ordering.ORDER_MARKOV and compare and compare.is_file():
+                    # NOTE: Trained before merging, the updated `compare` list would contain the candidates themselves.
+                    model = ordering.train(merging.read_lines(compare))
+            if self.shards > 1:
+                self.merge_sharded(destination, wordlists, compare, presorted)
+            elif self.engine == self.ENGINE_NATIVE:
+                self.merge_native(destination, wordlists, compare, presorted, partitioner)
+            elif self.streaming:
+                self.merge_streaming(destination, wordlists, compare, all(presorted))
+            else:
+                self.merge_trimmed(destination, wordlists, compare, all(presorted))
+            if partitioner is not None:
+                self.partition_close(partitioner)
+        if order and destination.is_file():
+            with self.profile('order', destination, [destination], [destination]):
+                self.order_output(destination, wordlists, presorted, weights, model)
+        else:
+            self.sorted_paths.add(destination)
+        if compare and not (self.bloom and self.engine == self.ENGINE_NATIVE and self.shards == 1):
+            self.sorted_paths.add(compare)
+        if self.tracker is not None:
+            self.tracker.merges[str(destination)] = [str(path) for path in wordlists + [compare]]
+        self.journal.record(journal_key, destination, compare)
+
+    def merge_incremental(self, destination, wordlists, compare=None, partition=None, order=None):
+        from wordz import tracking
+        # NOTE: Compared first so that the snapshots of all inputs are kept, even when this merge is done in full.
+        changes = [self.tracker.changes(path, destination) for path in wordlists]
+        if self.tracker.merges.get(str(destination)) != [str(path) for path in wordlists + [compare]]:
+            return False
+        if not destination.is_file() or (compare and not compare.is_file()):
+            return False
+        if (self.partition if partition is None else partition) or (self.order if order is None else order) or self.shards > 1:
+            logs.logger.info(f'Partitions, ordering and shards are not updated incrementally, rebuilding `{destination}`')
+            return False
+        if any(path.suffix == packed.EXT or packed.is_packed(path) for path in filter(None, [destination, compare])):
+            return False
+        if any(status == tracking.REBUILT for status, _ in changes):
+            return False
+        deltas = [delta for status, delta in changes if status == tracking.ADDED]
+        if not deltas:
+            logs.logger.info(f'Inputs of `{destination}` are unchanged')
+            if compare:
+                # NOTE: Same as a full run, all the words are in `compare` already.
+                merging.write_lines(iter(()), destination, codec=compression.detect(destination))
+            self.sorted_paths.add(destination)
+            return True
+        policy = self.filter_policy()
+        lines = merging.merge_lines(deltas, self.temp_dir, int(self.min_length), maximum=self.max_length, policy=policy)
+        if compare:
+            if not self.is_sorted(compare):
+                self.sort(compare)
+            lines = merging.subtract(lines, merging.read_lines(compare))
+        added = self.tracker.path(destination, 'new')
+        count = merging.write_lines(lines, added)
+        if compare:
+            # NOTE: Same as a full run, only the words which were not in `compare` yet are written.
+            self.fold(compare, added)
+            merging.write_lines(merging.read_lines(added), destination, codec=compression.detect(destination))
+        else:
+            self.fold(destination, added)
+        self.stage_report('incremental', sum(delta.stat().st_size for delta in deltas), added.stat().st_size)
+        self.filter_report(destination, policy)
+        logs.logger.info(f'Merged {count} new words from {len(deltas)} changed inputs into `{destination}`')
+        return True
+
+    def merge_trimmed(self, destination, wordlists, compare=None, presorted=False):
         job_id = hashlib.md5(str(destination).encode('ASCII')).hexdigest()
-        trimmed = list()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            for wordlist in wordlists:
-                trimmed_temp = self.temp(job_id + '-trimmed-' + wordlist.name + self.DEFAULT_EXT)
-                trimmed.append(trimmed_temp)
-                executor.submit(self.run_shell, f'awk "length >= {self.min_length}" {wordlist} > {trimmed_temp}')
+        trimmed = [self.temp(job_id + '-trimmed-' + wordlist.name + self.DEFAULT_EXT) for wordlist in wordlists]
+        self.run_shell_all([f'{self.length_filter} {wordlist} > {trimmed_temp}' for wordlist, trimmed_temp in zip(wordlists, trimmed)])
         trimmed_joined = ' '.join([str(path) for path in trimmed])
-        sort_cmd = f'cat {trimmed_joined} | {self.sort_snippet} | uniq > '
+        with self.sorting(destination) as sort_snippet:
+            if presorted:
+                sort_cmd = f'{sort_snippet} -m -u {trimmed_joined} > '
+            else:
+                sort_cmd = f'cat {trimmed_joined} | {sort_snippet} | uniq > '
+            output = self.temp(destination.stem + self.DEFAULT_EXT) if compare else destination
+            self.run_shell(f'{sort_cmd} {output}')
         if compare:
-            output_temp = self.temp(destination.stem + self.DEFAULT_EXT)
-            self.run_shell(f'{sort_cmd} {output_temp}')
-            self.run_shell(f'{self.bin_rli2} {output_temp} {compare} >> {destination}')
+            self.run_shell(f'{self.bin_rli2} {output} {compare} >> {destination}')
             self.append(destination, compare)
             self.sort(compare)
-        else:
-            self.run_shell(f'{sort_cmd} {destination}')
         # NOTE: Case when temporary files are really not needed.
         self.delete_all(job_id, self.temp_dir)
 
+    def merge_streaming(self, destination, wordlists, compare=None, presorted=False):
+        sources = ' '.join(str(path) for path in wordlists)
+        read = sum(path.stat().st_size for path in wordlists)
+        with self.sorting(destination) as sort_snippet:
+            if presorted:
+                cmd = f'{sort_snippet} -m -u {sources} | {self.length_filter}'
+            else:
+                cmd = f'{self.length_filter} {sources} | {sort_snippet} -u'
+            if compare:
+                self.run_shell(f'{cmd} | {self.comm_ver} -23 - {compare} > {destination}')
+            else:
+                self.run_shell(f'{cmd} > {destination}')
+        if compare:
+            self.stage_report('trim+sort+compare', read + compare.stat().st_size, destination.stat().st_size)
+            history_temp = self.temp(compare.stem + '-merge-tmp' + self.DEFAULT_EXT)
+            read = compare.stat().st_size + destination.stat().st_size
+            with self.sorting(compare) as sort_snippet:
+                self.run_shell(f'{sort_snippet} -m {compare} {destination} -o {history_temp}')
+            self.move(history_temp, compare)
+            self.stage_report('history', read, compare.stat().st_size)
+        else:
+            self.stage_report('trim+sort', read, destination.stat().st_size)
+
+    def merge_native(self, destination, wordlists, compare=None, presorted=None, partitioner=None):
+        read = sum(path.stat().st_size for path in wordlists)
+        policy = self.filter_policy()
+        lines = merging.merge_lines(wordlists, self.temp_dir, int(self.min_length), presorted, maximum=self.max_length, policy=policy)
+        if compare and self.bloom:
+            # NOTE: The list may be made of several sorted runs, the filter knows where they start.
+            self.merge_bloom(destination, lines, compare, read)
+            self.filter_report(destination, policy)
+            return
+        if compare:
+            if not self.is_sorted(compare):
+                self.sort(compare)
+            read += compare.stat().st_size
+            history_temp = self.temp(compare.stem + '-merge-tmp' + compare.suffix)
+            lines = merging.subtract_updating(lines, merging.read_lines(compare), history_temp)
+            if partitioner is not None:
+                # NOTE: Partitions are filled in the same pass, the output is not read again.
+                lines = partitioner.feed(lines)
+            merging.write_lines(lines, destination)
+            written = destination.stat().st_size + history_temp.stat().st_size
+            self.move(history_temp, compare)
+            self.stage_report('trim+merge+compare', read, written)
+        else:
+            if partitioner is not None:
+                lines = partitioner.feed(lines)
+            merging.write_lines(lines, destination)
+            self.stage_report('trim+merge', read, destination.stat().st_size)
+        self.filter_report(destination, policy)
+
+    def order_output(self, destination, wordlists, presorted, weights=None, model=None):
+        from wordz import ordering
+        logs.logger.info(f'Ordering `{destination}` by estimated probability')
+        if weights is None:
+            weights = [1.0] * len(wordlists)
+        weights = [weight * ordering.RULE_DECAY ** self.ranks.get(wordlist, 0) for weight, wordlist in zip(weights, wordlists)]
+        sources = list()
+        for wordlist, known in zip(wordlists, presorted):
+            lines = merging.read_lines(wordlist)
+            sources.append(lines if known else merging.external_sort(lines, self.temp_dir))
+        ordered_temp = self.temp(destination.stem + '-order-tmp' + destination.suffix)
+        ordering.write_ordered(merging.read_lines(destination), sources, weights, ordered_temp, self.temp_dir, model)
+        self.move(ordered_temp, destination)
+        self.sorted_paths.discard(destination)
+
+    def partition_close(self, partitioner):
+        if not partitioner.fed:
+            # NOTE: Outputs written by shell pipelines, shards or the bloom filter path are read once more.
+            partitioner.update(merging.read_lines(partitioner.destination))
+        manifest = partitioner.close()
+        logs.logger.info(f'Partitioned `{partitioner.destination}` into {len(manifest["partitions"])} files in `{partitioner.directory}`')
+
+    def merge_sharded(self, destination, wordlists, compare=None, presorted=None):
+        from wordz import sharding
+        job_id = hashlib.md5(str(destination).encode('ASCII')).hexdigest()
+        if self.shard_dir:
+            # NOTE: Hosts running the same job over the same versions of the inputs join the same run.
+            stamps = [journal.stamp(path) for path in wordlists + ([compare] if compare and compare.is_file() else [])]
+            run_id = hashlib.md5(json.dumps([str(destination), [str(path) for path in wordlists], str(compare), stamps, self.shards, self.min_length, self.max_length, self.filtering and [self.require_classes, self.min_classes, list(self.deny), list(self.normalize)]]).encode('utf8')).hexdigest()
+            directory = pathlib.Path(self.shard_dir, f'{job_id}-{run_id}')
+        else:
+            directory = self.temp(f'{job_id}-shards')
+            shutil.rmtree(directory, ignore_errors=True)
+        read = sum(path.stat().st_size for path in wordlists)
+        if compare:
+            if not self.is_sorted(compare):
+                self.sort(compare)
+            read += compare.stat().st_size
+        workers = int(self.cores)
+        logs.logger.info(f'Merging in {self.shards} shards using {workers} processes')
+        policy = self.filter_policy()
+        count = sharding.merge(destination, wordlists, directory, self.shards, workers, int(self.min_length), presorted, compare, self.max_length, policy)
+        self.filter_report(destination, policy)
+        if count is None:
+            logs.logger.info(f'Shards of `{destination}` were concatenated by another host')
+            return
+        self.stage_report('shard+merge+compare' if compare else 'shard+merge', read, destination.stat().st_size)
+
+    def history_filter(self, compare):
+        from wordz import bloom
+        path = bloom.filter_path(compare)
+        appendable = compare.suffix != packed.EXT and not packed.is_packed(compare) and not compression.detect(compare)
+        if path.is_file():
+            try:
+                history_filter = bloom.BloomFilter.load(path, writable=appendable)
+            except Exception as exc:
+                logs.logger.debug(f'Could not load `{path}`: {exc}')
+            else:
+                if history_filter.stamp == bloom.stamp(compare) and not history_filter.saturated and history_filter.error_rate == self.bloom:
+                    return history_filter
+                history_filter.close()
+        if not self.is_sorted(compare):
+            self.sort(compare)
+        logs.logger.info(f'Building bloom filter for `{compare}`')
+        count = sum(1 for _ in merging.read_lines(compare))
+        history_filter = bloom.BloomFilter(max(count * 2, 1000000), self.bloom)
+        history_filter.update(merging.read_lines(compare))
+        history_filter.stamp = bloom.stamp(compare)
+        history_filter.save(path)
+        return history_filter
+
+    def merge_bloom(self, destination, lines, compare, read):
+        from wordz import bloom
+        with self.history_filter(compare) as history_filter:
+            job_id = hashlib.md5(str(destination).encode('ASCII')).hexdigest()
+            new_temp = self.temp(job_id + '-bloom-new' + self.DEFAULT_EXT)
+            possible_temp = self.temp(job_id + '-bloom-possible' + self.DEFAULT_EXT)
+            new_count = possible_count = 0
+            with merging.LineWriter(new_temp) as new_fil, merging.LineWriter(possible_temp) as possible_fil:
+                for line in lines:
+                    if line in history_filter:
+                        possible_fil.write(line)
+                        possible_count += 1
+                    else:
+                        new_fil.write(line)
+                        new_count += 1
+            self.stage_report('trim+merge+filter', read, new_temp.stat().st_size + possible_temp.stat().st_size)
+            possible = merging.read_lines(possible_temp)
+            size = compare.stat().st_size
+            appendable = compare.suffix != packed.EXT and not packed.is_packed(compare) and not compression.detect(compare)
+            read = possible_temp.stat().st_size
+            if packed.is_packed(compare):
+                with packed.PackedWordlist(compare) as history:
+                    survivors = [line for line in possible if line not in history]
+            elif not appendable:
+                survivors = merging.subtract(possible, merging.read_lines(compare))
+                read += size
+            else:
+                bounds = history_filter.runs + [size]
+                ranges = list(zip(bounds, bounds[1:]))
+                if possible_count * len(ranges) * max(1, size.bit_length()) * bloom.LOOKUP_BYTES < size:
+                    # NOTE: Few possible hits, each of them is looked up in every sorted run of the list.
+                    with open(compare, 'rb') as history:
+                        survivors = [line for line in possible if not any(merging.search(history, line, start, end) for start, end in ranges)]
+                    read += possible_count * len(ranges) * max(1, size.bit_length()) * bloom.LOOKUP_BYTES
+                else:
+                    survivors = merging.subtract(possible, merging.kway_merge([merging.read_range(compare, start, end) for start, end in ranges], dedup=False))
+                    read += size
+            merging.write_lines(merging.kway_merge([merging.read_lines(new_temp), survivors]), destination)
+            self.stage_report('compare', read, destination.stat().st_size)
+            logs.logger.info(f'Bloom filter: {new_count} definitely new, {possible_count} possible hits checked exactly')
+            read = written = destination.stat().st_size
+            history_temp = self.temp(compare.stem + '-merge-tmp' + compare.suffix)
+            if not appendable:
+                read += size
+                merging.merge_files([compare, destination], history_temp, self.temp_dir, presorted=[True, True], dedup=False)
+                self.move(history_temp, compare)
+                written = compare.stat().st_size
+            elif written:
+                # NOTE: New words are appended as a sorted run, the list is only rewritten once it is made of too many of them.
+                if size:
+                    with open(compare, 'rb') as fil:
+                        fil.seek(size - 1)
+                        if fil.read(1) != b'\n':
+                            with open(compare, 'ab') as history:
+                                history.write(b'\n')
+                            size += 1
+                history_filter.runs.append(size)
+                self.append(destination, compare)
+                if len(history_filter.runs) > bloom.MAX_RUNS:
+                    bounds = history_filter.runs + [compare.stat().st_size]
+                    read += bounds[-1]
+                    merging.write_lines(merging.kway_merge([merging.read_range(compare, start, end) for start, end in zip(bounds, bounds[1:])], dedup=False), history_temp)
+                    self.move(history_temp, compare)
+                    history_filter.runs = [0]
+                    written = compare.stat().st_size
+            self.stage_report('history', read, written)
+            history_filter.update(merging.read_lines(destination))
+            history_filter.stamp = bloom.stamp(compare)
+            if history_filter.saturated:
+                history_filter.close()
+                bloom.filter_path(compare).unlink(missing_ok=True)
+            else:
+                history_filter.save(bloom.filter_path(compare))
+            self.delete_all(job_id, self.temp_dir)
+
+    def filter_policy(self):
+        from wordz import filters
+        if not self.filtering:
+            return None
+        # NOTE: A policy per merge, merges may run in parallel and each reports its own counts.
+        return filters.Policy(self.require_classes, self.min_classes, self.deny, self.normalize)
+
+    def filter_report(self, destination, policy):
+        from wordz import filters
+        if policy is None:
+            return
+        logs.logger.info(f'Filtered `{destination.name}`: {filters.describe(policy.counts)}')
+        self.filters.append(dict(destination=str(destination), **policy.counts))
+
+    def stage_report(self, stage, read, written):
+        logs.logger.info(f'Stage `{stage}`: read {sizes.format_size(read)}, wrote {sizes.format_size(written)}')
+        self.stages.append({'stage': stage, 'read': read, 'written': written})
+
+    def pack(self, source, destination=None):
+        if destination is None:
+            destination = source.with_suffix(packed.EXT)
+        logs.logger.info(f'Packing `{source}` to `{destination}`')
+        self.ensure_path(destination)
+        packed.pack(merging.merge_lines([source], self.temp_dir, presorted=[self.is_sorted(source)]), destination)
+        self.sorted_paths.add(destination)
+        return destination
+
+    def unpack(self, source, destination=None):
+        if destination is None:
+            destination = source.with_suffix(self.DEFAULT_EXT)
+        logs.logger.info(f'Unpacking `{source}` to `{destination}`')
+        self.ensure_path(destination)
+        with packed.PackedWordlist(source) as wordlist:
+            wordlist.export(destination)
+        self.sorted_paths.add(destination)
+        return destination
+
     def concat(self, destination, wordlists):
         logs.logger.debug(f'Concatenating: {destination}')
         self.delete(destination)
@@ -230,15 +991,23 @@ class Combinator:
         output_fil = pathlib.Path(self.base_dir, path, f'{list_prefix}-{output}{self.DEFAULT_EXT}')
         left_temp = self.temp(f'{list_prefix}-diff-{left}{self.DEFAULT_EXT}')
         right_temp = self.temp(f'{list_prefix}-diff-{right}{self.DEFAULT_EXT}')
-        self.sort(left_fil, left_temp)
-        self.sort(right_fil, right_temp)
-        self.compare(left_temp, right_temp, right_fil)
-        self.delete(left_fil)
-        self.move(left_temp, left_fil)
-        self.concat(output_fil, [left_fil, right_fil])
-        self.sort(output_fil)
-
-    def run(self):
+        if self.tracker is not None:
+            from wordz import tracking
+            if all([self.tracker.changes(fil, output_fil)[0] == tracking.SAME for fil in (left_fil, right_fil, output_fil)]):
+                logs.logger.info(f'`{left_fil}` and `{right_fil}` are unchanged, skipping')
+                return
+        with self.profile('diff', output_fil, [left_fil, right_fil], [left_fil, right_fil, output_fil]):
+            self.sort(left_fil, left_temp)
+            self.sort(right_fil, right_temp)
+            self.compare(left_temp, right_temp, right_fil)
+            self.delete(left_fil)
+            self.move(left_temp, left_fil)
+            self.concat(output_fil, [left_fil, right_fil])
+            self.sort(output_fil)
+        if self.tracker is not None:
+            self.tracker.forget(output_fil, left_fil, right_fil, output_fil)
+
+    def run(self, lock=None):
         time_start = datetime.datetime.now()
         logs.logger.info(f'Processing with class: {type(self).__name__}')
         logs.logger.info(f'Base directory: {self.base_dir}')
@@ -246,13 +1015,28 @@ class Combinator:
         logs.logger.info(f'Output directory: {self.output_dir}')
         logs.logger.info(f'Using {self.cores} cores')
         logs.logger.info(f'Using {self.memory} of memory')
-        self.setup()
-        self.process()
+        if self.resume:
+            logs.logger.info(f'Resuming with {len(self.journal)} completed steps in the journal')
+        with self.profile('run', type(self).__name__):
+            # NOTE: `lock` is shared by the builds of `wordz serve` using the same base directory.
+            with lock.exclusive() if lock is not None else contextlib.nullcontext():
+                self.setup()
+            with lock.shared() if lock is not None else contextlib.nullcontext():
+                self.process()
+        if self.tracker is not None:
+            self.tracker.commit()
         time_total = datetime.datetime.now() - time_start
         logs.logger.info(f'Total time: {time_total}')
+        if self.profiler is not None:
+            self.profiler.report(self.profile_path, cls=type(self).__name__, total_time=time_total.total_seconds(), stages=self.stages, filters=self.filters)
+            logs.logger.info(f'Profile written to: {self.profile_path}')
         logs.logger.info(f'Done! You may want to clean up the temporary directory yourself: {self.temp_dir}')
         logs.logger.info(f'Make sure to remove the temporary files used for comparing if you plan to re-run the process.')
 
+    def close(self):
+        if self.shell_runner is not None:
+            self.shell_runner.close()
+
     def setup(self):
         self.wordlists_process()
 
@@ -0,0 +1,124 @@
+import hashlib
+import math
+import mmap
+import os
+import pathlib
+import struct
+
+
+MAGIC = b'WORDZBF2'
+HEADER = struct.Struct('<8sQQQQdQQQ')
+RUN = struct.Struct('<Q')
+EXT = '.bloom'
+MAX_RUNS = 16
+# NOTE: Bytes a lookup in the `compare` list is assumed to cost, compared with reading it in full.
+LOOKUP_BYTES = 4096
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate, bits=None, hashes=None):
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        self.size = bits or max(8, int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = hashes or max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.stamp = (0, 0)
+        # NOTE: Offsets of the sorted runs the `compare` list is made of, new words are appended as a run of their own.
+        self.runs = [0]
+        self.fil = None
+        self.mapped = None
+
+    def positions(self, word):
+        digest = hashlib.blake2b(word, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + idx * second) % self.size for idx in range(self.hashes)]
+
+    def add(self, word):
+        for position in self.positions(word):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, words):
+        for word in words:
+            self.add(word)
+
+    def __contains__(self, word):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(word))
+
+    @property
+    def saturated(self):
+        return self.count > self.capacity
+
+    def header(self):
+        return HEADER.pack(MAGIC, self.size, self.hashes, self.count, self.capacity, self.error_rate, *self.stamp, len(self.runs))
+
+    def trailer(self):
+        return b''.join(RUN.pack(run) for run in self.runs)
+
+    def save(self, path):
+        if self.mapped is not None:
+            # NOTE: Bits were set in place, only the pages which changed are written back along with the header.
+            self.fil.seek(HEADER.size + len(self.bits))
+            self.fil.write(self.trailer())
+            self.fil.truncate()
+            self.fil.flush()
+            self.mapped[:HEADER.size] = self.header()
+            self.mapped.flush()
+            return
+        temp_path = pathlib.Path(f'{path}.{os.getpid()}.tmp')
+        with open(temp_path, 'wb') as fil:
+            fil.write(self.header())
+            fil.write(self.bits)
+            fil.write(self.trailer())
+        os.replace(temp_path, path)
+
+    def close(self):
+        if self.mapped is not None:
+            self.bits.release()
+            self.mapped.close()
+            self.fil.close()
+            self.bits = self.mapped = self.fil = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @classmethod
+    def load(cls, path, writable=False):
+        fil = open(path, 'r+b' if writable else 'rb')
+        try:
+            magic, size, hashes, count, capacity, error_rate, *stamp, runs = HEADER.unpack(fil.read(HEADER.size))
+            if magic != MAGIC:
+                raise Exception(f'`{path}` is not a bloom filter')
+            bloom = cls(capacity, error_rate, size, hashes)
+            if writable:
+                bloom.mapped = mmap.mmap(fil.fileno(), HEADER.size + len(bloom.bits))
+                bloom.bits = memoryview(bloom.mapped)[HEADER.size:]
+                bloom.fil = fil
+                fil.seek(HEADER.size + len(bloom.bits))
+            else:
+                fil.readinto(bloom.bits)
+            bloom.runs = [RUN.unpack(fil.read(RUN.size))[0] for _ in range(runs)]
+        except BaseException:
+            fil.close()
+            raise
+        if not writable:
+            fil.close()
+        bloom.count = count
+        bloom.stamp = tuple(stamp)
+        return bloom
+
+
+def stamp(path):
+    stat = pathlib.Path(path).stat()
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def filter_path(path):
+    path = pathlib.Path(path)
+    return path.with_name(path.name + EXT)
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import threading
+import time
+
+from wordz import logs
+
+
+CHUNK_SIZE = 1024 * 1024
+CACHES = dict()
+CACHES_GUARD = threading.Lock()
+
+
+def shared(directory, max_size):
+    # NOTE: Builds running in the same process (see `wordz serve`) use the same manifest, each writing its own copy of
+    #       it would drop the entries of the others.
+    directory = pathlib.Path(directory).absolute()
+    with CACHES_GUARD:
+        if directory not in CACHES:
+            CACHES[directory] = ArtifactCache(directory, max_size)
+        artifacts = CACHES[directory]
+    with artifacts.lock:
+        artifacts.max_size = max_size
+    return artifacts
+
+
+class ArtifactCache:
+
+    MANIFEST = 'manifest.json'
+    BLOBS = 'blobs'
+
+    def __init__(self, directory, max_size):
+        self.directory = pathlib.Path(directory)
+        self.blobs = self.directory / self.BLOBS
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.lock = threading.RLock()
+        self.manifest = self.load()
+
+    def load(self):
+        try:
+            manifest = json.loads((self.directory / self.MANIFEST).read_text())
+        except (FileNotFoundError, ValueError):
+            manifest = dict()
+        manifest.setdefault('digests', dict())
+        manifest.setdefault('entries', dict())
+        manifest.setdefault('hits', 0)
+        manifest.setdefault('misses', 0)
+        return manifest
+
+    def save(self):
+        path = self.directory / self.MANIFEST
+        temp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}')
+        temp_path.write_text(json.dumps(self.manifest, indent=1, sort_keys=True))
+        os.replace(temp_path, path)
+
+    def digest(self, path):
+        path = pathlib.Path(path).absolute()
+        stat = path.stat()
+        with self.lock:
+            known = self.manifest['digests'].get(str(path))
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['digest']
+        sha = hashlib.sha256()
+        with open(path, 'rb') as fil:
+            for chunk in iter(lambda: fil.read(CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with self.lock:
+            self.manifest['digests'][str(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+        return digest
+
+    def key(self, *parts):
+        sha = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, pathlib.PurePath):
+                part = self.digest(part)
+            sha.update(str(part).encode('utf8'))
+            sha.update(b'\0')
+        return sha.hexdigest()
+
+    def link(self, source, destination):
+        pathlib.Path(destination).unlink(missing_ok=True)
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
+
+    def fetch(self, key, destination):
+        with self.lock:
+            entry = self.manifest['entries'].get(key)
+            blob = self.blobs / key
+            # NOTE: Artifacts are hard-linked, a size mismatch means the file was modified in place.
+            if entry is None or not blob.is_file() or blob.stat().st_size != entry['size']:
+                if entry is not None:
+                    self.discard(key)
+                self.manifest['misses'] += 1
+                self.save()
+                return False
+            if not (pathlib.Path(destination).is_file() and os.path.samefile(blob, destination)):
+                self.link(blob, destination)
+            entry['used'] = time.time()
+            self.manifest['hits'] += 1
+            self.save()
+        logs.logger.debug(f'Cache hit for `{destination}` ({key})')
+        return True
+
+    def store(self, key, source):
+        with self.lock:
+            self.link(source, self.blobs / key)
+            self.manifest['entries'][key] = {
+                'name': pathlib.Path(source).name,
+                'size': pathlib.Path(source).stat().st_size,
+                'used': time.time(),
+            }
+            self.evict(self.max_size)
+            self.save()
+
+    def discard(self, key):
+        self.manifest['entries'].pop(key, None)
+        pathlib.Path(self.blobs / key).unlink(missing_ok=True)
+
+    def size(self):
+        return sum(entry['size'] for entry in self.manifest['entries'].values())
+
+    def evict(self, max_size):
+        total = self.size()
+        for key, entry in sorted(self.manifest['entries'].items(), key=lambda item: item[1]['used']):
+            if total <= max_size:
+                break
+            logs.logger.debug(f'Evicting `{entry["name"]}` ({key}) from cache')
+            total -= entry['size']
+            self.discard(key)
+
+    def prune(self, max_size=None):
+        with self.lock:
+            self.evict(self.max_size if max_size is None else max_size)
+            digests = self.manifest['digests']
+            for path in [path for path in digests if not pathlib.Path(path).is_file()]:
+                del digests[path]
+            self.save()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.manifest['entries']),
+                'size': self.size(),
+                'max_size': self.max_size,
+                'hits': self.manifest['hits'],
+                'misses': self.manifest['misses'],
+            }
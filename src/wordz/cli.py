@@ -1,21 +1,46 @@
 import argparse
 import importlib.util
-import multiprocessing
+import os
 import pathlib
+import shlex
 import sys
 
 from wordz import (
+    base,
     logs,
+    sizes,
     version,
 )
 
 
-def class_import(path):
+DEFAULT_CACHE_SIZE = '10G'
+JOB_OPTIONS = (
+    '-p', '--path', '-o', '--output-dir', '--min-length', '--max-length', '--engine', '--lazy', '--streaming', '--bloom',
+    '--partition', '--order', '--shards', '--temp-codec', '--require-classes', '--min-classes', '--deny', '--normalize',
+    '--incremental', '--resume', '--plan', '-d', '--debug', '-q', '--quiet',
+)
+
+
+MODULES = dict()
+
+
+def module_import(file_path, cached=False):
+    if cached:
+        # NOTE: Files stay imported until they change, several classes from one file are imported together.
+        key = (str(pathlib.Path(file_path).absolute()), pathlib.Path(file_path).stat().st_mtime_ns)
+        if key not in MODULES:
+            MODULES[key] = module_import(file_path)
+        return MODULES[key]
+    spec = importlib.util.spec_from_file_location('wordz_combinator_clss', file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def class_import(path, cached=False):
     try:
         file_path, class_name = path.split('::')
-        spec = importlib.util.spec_from_file_location('wordz_combinator_clss', file_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
+        module = module_import(file_path, cached)
     except (AttributeError, ValueError, FileNotFoundError):
         raise Exception(f'Could not import class from `{path}`')
     try:
@@ -26,8 +51,12 @@ def class_import(path):
         return cls
 
 
+def class_import_cached(path):
+    return class_import(path, cached=True)
+
+
 def get_parser():
-    cpu_count = multiprocessing.cpu_count()
+    cpu_count = os.cpu_count() or 1
     if cpu_count > 1:
         cpu_count = cpu_count - 1
     base_dir = pathlib.Path.cwd()
@@ -36,28 +65,53 @@ def get_parser():
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
     parser.print_usage = parser.print_help
-    parser.add_argument('-p', '--path', required=True, default=argparse.SUPPRESS, help='Class path (e.g. classes/passwords.py::ExtraPasswords)')
+    parser.add_argument('-p', '--path', default=None, help='Class path (e.g. classes/passwords.py::ExtraPasswords)')
+    parser.add_argument('--batch', default=None, metavar='FILE', help='Build the class paths listed in FILE (`-` for stdin) in one process, one per line and optionally followed by arguments overriding the others')
     parser.add_argument('-b', '--base-dir', default=base_dir, help='Base directory path')
     parser.add_argument('-t', '--temp-dir', default='tmp', help='Temporary directory path')
     parser.add_argument('-o', '--output-dir', default=base_dir, help='Output directory path')
     parser.add_argument('-v', '--version', action='version', version=version.__version__, help='Print version')
-    parser.add_argument('--min-length', default=4, help='Minimal length for a password when merging lists')
-    parser.add_argument('--cores', default=cpu_count, type=str, help='Number of cores to be used for sorting')
-    parser.add_argument('--memory', default='80%', help='Percentage of memory to be used for sorting')
+    parser.add_argument('--min-length', default=4, type=int, help='Minimal length for a password when merging lists')
+    parser.add_argument('--max-length', default=None, type=int, help='Maximal length of a password when merging lists')
+    parser.add_argument('--cores', default=cpu_count, type=str, help='Number of cores shared by concurrent jobs')
+    parser.add_argument('--memory', default='80%', help='Percentage (or size) of memory shared by concurrent sorts')
     parser.add_argument('--bin-hashcat', default='hashcat', help='Hashcat binary')
     parser.add_argument('--bin-combinator', default='combinator.bin', help='Hashcat utils `combinator` binary')
     parser.add_argument('--bin-rli2', default='rli2.bin', help='Hashcat utils `rli2` binary')
+    parser.add_argument('--engine', default='shell', choices=('shell', 'native'), help='Engine used for rules, sorting and merging (`native` falls back to hashcat for unsupported rules)')
+    parser.add_argument('--lazy', action='store_true', default=None, help='Defer rules and combinations until merging and run them in parallel')
+    parser.add_argument('--streaming', action='store_true', default=None, help='Merge without writing trimmed copies of the inputs and update the comparison list in a single pass')
+    parser.add_argument('--bloom', nargs='?', const=0.01, default=None, type=float, metavar='RATE', help='Skip the exact comparison for words which a bloom filter of the `compare` list reports as new, with the given false positive rate (default rate: 0.01, requires the native engine)')
+    parser.add_argument('--partition', nargs='+', default=None, choices=('length', 'charset'), help='Also split merged outputs by length and/or charset classes (lower, upper, digit, special), with a manifest of counts')
+    parser.add_argument('--order', nargs='?', const='markov', default=None, choices=('weights', 'markov'), help='Write merged outputs best-first, scored by source weights and rule order, and with `markov` (the default) by a model trained on the `compare` list')
+    parser.add_argument('--shards', default=None, type=int, metavar='N', help='Split merging into N key ranges processed by separate processes')
+    parser.add_argument('--shard-dir', default=None, metavar='DIR', help='Shared directory used to coordinate shards between several hosts running the same job')
+    parser.add_argument('--temp-codec', default=None, choices=('gzip', 'zstd', 'lz4'), help='Compress rule outputs and combinations in the temporary directory (requires the native engine)')
+    parser.add_argument('--require-classes', default=None, metavar='FLAGS', help='Only keep merged words containing all of the given character classes: `l`ower, `u`pper, `d`igit and `s`pecial (requires the native engine)')
+    parser.add_argument('--min-classes', default=None, type=int, metavar='N', help='Only keep merged words containing at least N character classes (requires the native engine)')
+    parser.add_argument('--deny', action='append', default=None, metavar='REGEX', help='Drop merged words matching REGEX, may be given several times (requires the native engine)')
+    parser.add_argument('--normalize', nargs='+', default=None, choices=('nfc', 'cr', 'space'), help='Normalize words before merging, so that near-duplicates become one: Unicode NFC, trailing carriage returns and trailing whitespace (requires the native engine)')
+    parser.add_argument('--incremental', action='store_true', default=None, help='Only process the lines added to the inputs since the previous run and add the results to the existing outputs')
+    parser.add_argument('--resume', action='store_true', default=False, help='Skip the steps which the journal of a previous, interrupted run reports as complete')
+    parser.add_argument('--plan', action='store_true', default=False, help='Estimate lines, disk usage and time of every step and print them without building anything')
+    parser.add_argument('--plan-calibration', default=None, metavar='REPORT', help='Throughput measured by `benchmarks/suite.py --output REPORT`, used for the time estimates of `--plan`')
+    parser.add_argument('--profile', default=None, metavar='REPORT', help='Measure every step and write the report to REPORT (CSV if it ends with `.csv`, JSON otherwise)')
+    parser.add_argument('--profile-lines', action='store_true', default=False, help='Also count the lines read and written by every step of `--profile`, which reads them once more')
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_SIZE, default=None, metavar='SIZE', help=f'Reuse temporary files based on the contents of their inputs, keeping up to SIZE of them (default size: {DEFAULT_CACHE_SIZE})')
     verbosity = parser.add_mutually_exclusive_group()
     verbosity.add_argument('-d', '--debug', action='store_const', dest='loglevel', const=logs.logging.DEBUG, default=logs.logging.INFO)
     verbosity.add_argument('-q', '--quiet', action='store_const', dest='loglevel', const=logs.logging.NOTSET, default=logs.logging.INFO)
     return parser
 
 
-def run(parser, args):
-    parsed = parser.parse_args(args)
-    logs.init(parsed.loglevel)
-    combinator_cls = class_import(parsed.path)
-    combinator = combinator_cls(
+def create(parsed, combinator_cls):
+    options = dict()
+    if parsed.plan:
+        # NOTE: Only imported when planning, most invocations do not need it.
+        from wordz import planning
+        combinator_cls = planning.planned(combinator_cls)
+        options['calibration'] = parsed.plan_calibration
+    return combinator_cls(
         parsed.base_dir,
         parsed.temp_dir,
         parsed.output_dir,
@@ -66,15 +120,210 @@ def run(parser, args):
         parsed.memory,
         parsed.bin_hashcat,
         parsed.bin_combinator,
-        parsed.bin_rli2
+        parsed.bin_rli2,
+        engine=parsed.engine,
+        lazy=parsed.lazy,
+        cache_size=parsed.cache,
+        streaming=parsed.streaming,
+        bloom=parsed.bloom,
+        profile=parsed.profile,
+        profile_lines=parsed.profile_lines,
+        shards=parsed.shards,
+        shard_dir=parsed.shard_dir,
+        resume=parsed.resume,
+        temp_codec=parsed.temp_codec,
+        max_length=parsed.max_length,
+        partition=parsed.partition,
+        order=parsed.order,
+        incremental=parsed.incremental,
+        require_classes=parsed.require_classes,
+        min_classes=parsed.min_classes,
+        deny=parsed.deny,
+        normalize=parsed.normalize,
+        **options,
+    )
+
+
+def run(parser, args):
+    parsed = parser.parse_args(args)
+    logs.init(parsed.loglevel)
+    if parsed.batch:
+        run_batch(parser, args, parsed.batch)
+        return
+    if not parsed.path:
+        parser.error('one of the arguments -p/--path --batch is required')
+    combinator = create(parsed, class_import(parsed.path))
+    try:
+        combinator.run()
+    finally:
+        combinator.close()
+
+
+def batch_targets(batch):
+    if batch == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        lines = pathlib.Path(batch).read_text().splitlines()
+    for line in lines:
+        words = shlex.split(line, comments=True)
+        if words:
+            yield ['-p'] + words if not words[0].startswith('-') else words
+
+
+def run_batch(parser, args, batch):
+    defaults = list()
+    skip = False
+    for arg in args:
+        if skip or arg == '--batch':
+            skip = not skip
+        elif not arg.startswith('--batch='):
+            defaults.append(arg)
+    targets = list(batch_targets(batch))
+    for idx, target in enumerate(targets, 1):
+        parsed = parser.parse_args(defaults + target)
+        if not parsed.path:
+            parser.error(f'no class path on line {idx} of the batch')
+        logs.logger.info(f'Batch target {idx} of {len(targets)}: {parsed.path}')
+        # NOTE: Imports and binary probes are done once for the whole batch.
+        combinator = create(parsed, class_import_cached(parsed.path))
+        try:
+            combinator.run()
+        finally:
+            combinator.close()
+
+
+def get_cache_parser():
+    parser = argparse.ArgumentParser(
+        prog='wordz cache',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument('action', choices=('stats', 'prune'), help='Show statistics or evict the least recently used files')
+    parser.add_argument('-t', '--temp-dir', default='tmp', help='Temporary directory path')
+    parser.add_argument('-s', '--size', default=DEFAULT_CACHE_SIZE, help='Maximal size of the cache (use 0 to empty the cache when pruning)')
+    return parser
+
+
+def run_cache(parser, args):
+    from wordz import cache
+    parsed = parser.parse_args(args)
+    logs.init(logs.logging.INFO)
+    cache_dir = base.Combinator.cache_dir(parsed.temp_dir)
+    if not cache_dir.is_dir():
+        raise Exception(f'Cache directory `{cache_dir}` does not exist')
+    artifacts = cache.ArtifactCache(cache_dir, sizes.parse_size(parsed.size))
+    if parsed.action == 'prune':
+        artifacts.prune()
+    stats = artifacts.stats()
+    logs.logger.info(f'Cache directory: {cache_dir}')
+    logs.logger.info(f'Entries: {stats["entries"]}')
+    logs.logger.info(f'Size: {sizes.format_size(stats["size"])} of {sizes.format_size(stats["max_size"])}')
+    logs.logger.info(f'Hits: {stats["hits"]}, misses: {stats["misses"]}')
+
+
+def get_serve_parser():
+    from wordz import server
+    parser = argparse.ArgumentParser(
+        prog='wordz serve',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument('--listen', default=str(server.default_socket()), metavar='ADDRESS', help='Unix socket to listen on (only accessible to the current user), or `http://HOST:PORT` to listen over TCP without any authentication')
+    parser.add_argument('--workers', default=1, type=int, help='Number of jobs built at the same time')
+    parser.add_argument('-b', '--base-dir', default=pathlib.Path.cwd(), help='Base directory path shared by the jobs, which their class files have to be in')
+    parser.add_argument('-t', '--temp-dir', default='tmp', help='Temporary directory path shared by the jobs')
+    parser.add_argument('-o', '--output-dir', default=pathlib.Path.cwd(), help='Directory which the output directories of the jobs are resolved in')
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_SIZE, default=None, metavar='SIZE', help='Enable the cache for all jobs, keeping up to SIZE of temporary files')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-d', '--debug', action='store_const', dest='loglevel', const=logs.logging.DEBUG, default=logs.logging.INFO)
+    verbosity.add_argument('-q', '--quiet', action='store_const', dest='loglevel', const=logs.logging.NOTSET, default=logs.logging.INFO)
+    return parser
+
+
+def job_factory(base_dir, temp_dir, output_dir, cache=None):
+    base_dir = pathlib.Path(base_dir).resolve()
+    output_dir = pathlib.Path(output_dir).resolve()
+    defaults = ['-b', str(base_dir), '-t', str(pathlib.Path(temp_dir).absolute()), '-o', str(output_dir)]
+    if cache:
+        defaults += ['--cache', cache]
+    job_parser = get_parser()
+    job_parser.allow_abbrev = False
+
+    def error(message):
+        raise Exception(f'Invalid arguments: {message}')
+
+    job_parser.error = error
+
+    def factory(args):
+        # NOTE: Jobs only choose what to build and how, binaries and directories are those of the server.
+        for arg in args:
+            if not isinstance(arg, str):
+                raise Exception(f'Invalid argument `{arg}`')
+            if arg.startswith('-') and arg.split('=', 1)[0] not in JOB_OPTIONS:
+                raise Exception(f'Option `{arg}` is not allowed in jobs, use any of: {", ".join(JOB_OPTIONS)}')
+        job_parsed = job_parser.parse_args(defaults + list(args))
+        if not job_parsed.path:
+            raise Exception('Invalid arguments: a class path (-p) is required')
+        if not pathlib.Path(job_parsed.path.split('::')[0]).resolve().is_relative_to(base_dir):
+            raise Exception(f'Class path `{job_parsed.path}` is not in the base directory `{base_dir}`')
+        job_parsed.output_dir = output_dir.joinpath(job_parsed.output_dir).resolve()
+        if not job_parsed.output_dir.is_relative_to(output_dir):
+            raise Exception(f'Output directory `{job_parsed.output_dir}` is not in `{output_dir}`')
+        combinator_cls = class_import_cached(job_parsed.path)
+        return lambda: create(job_parsed, combinator_cls)
+
+    return factory
+
+
+def run_serve(parser, args):
+    from wordz import server
+    parsed = parser.parse_args(args)
+    logs.init(parsed.loglevel)
+    server.serve(job_factory(parsed.base_dir, parsed.temp_dir, parsed.output_dir, parsed.cache), parsed.listen, parsed.workers)
+
+
+def get_submit_parser():
+    from wordz import server
+    parser = argparse.ArgumentParser(
+        prog='wordz submit',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
-    combinator.run()
+    parser.add_argument('--server', default=str(server.default_socket()), metavar='ADDRESS', help='Unix socket or `http://HOST:PORT` of `wordz serve`')
+    parser.add_argument('--priority', default=0, type=int, help='Jobs with a higher priority are built first')
+    parser.add_argument('--wait', action='store_true', default=False, help='Wait until the job is done')
+    parser.usage = '%(prog)s [-h] [--server SERVER] [--priority PRIORITY] [--wait] [--] BUILD_ARGS...'
+    parser.epilog = f'Other arguments are those of a build (e.g. -p classes/passwords.py::ExtraPasswords), limited to: {", ".join(JOB_OPTIONS)}. Paths are resolved by the server.'
+    return parser
+
+
+def run_submit(parser, args):
+    from wordz import server
+    if '--' in args:
+        idx = args.index('--')
+        parsed, build_args = parser.parse_args(args[:idx]), args[idx + 1:]
+    else:
+        parsed, build_args = parser.parse_known_args(args)
+    logs.init(logs.logging.INFO)
+    job = server.submit(parsed.server.rstrip('/'), build_args, parsed.priority, parsed.wait)
+    logs.logger.info(f'Job {job["id"]}: {job["status"]}')
+    if job['status'] == server.FAILED:
+        raise Exception(job['error'])
+
+
+COMMANDS = {
+    'cache': (get_cache_parser, run_cache),
+    'serve': (get_serve_parser, run_serve),
+    'submit': (get_submit_parser, run_submit),
+}
 
 
 def main():
-    parser = get_parser()
+    args = sys.argv[1:]
+    if args and args[0] in COMMANDS:
+        get_command_parser, run_command = COMMANDS[args.pop(0)]
+    else:
+        get_command_parser, run_command = get_parser, run
+    parser = get_command_parser()
     try:
-        run(parser, sys.argv[1:])
+        run_command(parser, args)
     except Exception as exc:
         logs.logger.error(f'Error: {exc}')
         sys.exit(1)
@@ -0,0 +1,86 @@
+import pathlib
+
+from wordz import (
+    compression,
+    merging,
+    packed,
+    rules,
+)
+
+
+MEMORY_LIMIT = 256 * 1024 * 1024
+COMPRESSION_RATIO = 8
+CHUNK_SIZE = 1024 * 1024
+
+
+class Lines:
+
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        return merging.read_lines(self.path)
+
+
+def reiterable(path, limit=MEMORY_LIMIT):
+    size = pathlib.Path(path).stat().st_size
+    if compression.detect(path):
+        size *= COMPRESSION_RATIO
+    if size <= limit:
+        return list(merging.read_lines(path))
+    return Lines(path)
+
+
+def stats(path):
+    lines = size = 0
+    if compression.detect(path) or packed.is_packed(path):
+        for line in merging.read_lines(path):
+            lines += 1
+            size += len(line)
+        return lines, size
+    # NOTE: Plain files only need their newlines counted, the rest of their size is the words.
+    last = b'\n'
+    with open(path, 'rb') as fil:
+        for chunk in iter(lambda: fil.read(CHUNK_SIZE), b''):
+            lines += chunk.count(b'\n')
+            size += len(chunk)
+            last = chunk[-1:]
+    size -= lines
+    if last != b'\n':
+        lines += 1
+    return lines, size
+
+
+def expected(counts):
+    lines = 1
+    for count, _ in counts:
+        lines *= count
+    size = 0
+    for count, length in counts:
+        size += length * lines // count if count else 0
+    return lines, size + lines
+
+
+def estimate(*paths):
+    return expected([stats(path) for path in paths])
+
+
+def combine(first, second, batch_size=rules.BATCH_SIZE):
+    for prefix in first:
+        for batch in rules.batched(second, batch_size):
+            yield b'\n'.join([prefix + suffix for suffix in batch]) + b'\n'
+
+
+def combine_three(first, second, third, batch_size=rules.BATCH_SIZE):
+    for prefix in first:
+        for middle in second:
+            yield from combine((prefix + middle,), third, batch_size)
+
+
+def write_combined(paths, destination, codec=None):
+    first = merging.read_lines(paths[0])
+    others = [reiterable(path) for path in paths[1:]]
+    chunks = combine(first, *others) if len(others) == 1 else combine_three(first, *others)
+    with compression.open_write(pathlib.Path(destination), codec=codec) as fil:
+        for chunk in chunks:
+            fil.write(chunk)
@@ -0,0 +1,158 @@
+import gzip
+import io
+import pathlib
+import shutil
+import subprocess
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+BUFFER_SIZE = 1024 * 1024
+MAGIC_SIZE = 4
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+class Codec:
+
+    def __init__(self, name, magic, ext, binary):
+        self.name = name
+        self.magic = magic
+        self.ext = ext
+        self.binary = binary
+
+    def __repr__(self):
+        return self.name
+
+    def which(self):
+        path = shutil.which(self.binary)
+        if path is None:
+            raise Exception(f'`{self.binary}` is required for {self.name} compression')
+        return path
+
+
+CODECS = {
+    'gzip': Codec('gzip', b'\x1f\x8b', '.gz', 'gzip'),
+    'zstd': Codec('zstd', b'\x28\xb5\x2f\xfd', '.zst', 'zstd'),
+    'lz4': Codec('lz4', b'\x04\x22\x4d\x18', '.lz4', 'lz4'),
+}
+
+
+def get(name):
+    if not name:
+        return None
+    if name not in CODECS:
+        raise Exception(f'Unknown codec `{name}`, use one of: {", ".join(CODECS)}')
+    return CODECS[name]
+
+
+def detect(path):
+    try:
+        with open(path, 'rb') as fil:
+            head = fil.read(MAGIC_SIZE)
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+    for codec in CODECS.values():
+        if head.startswith(codec.magic):
+            return codec
+    return None
+
+
+def from_extension(path):
+    suffix = pathlib.Path(path).suffix
+    for codec in CODECS.values():
+        if codec.ext == suffix:
+            return codec
+    return None
+
+
+def stem(path):
+    path = pathlib.Path(path)
+    if from_extension(path):
+        path = path.with_suffix('')
+    return path.stem
+
+
+class Pipe:
+
+    def __init__(self, args, path=None, mode='rb'):
+        self.args = args
+        self.output = None
+        if 'r' in mode:
+            self.proc = subprocess.Popen(args, stdout=subprocess.PIPE, bufsize=BUFFER_SIZE)
+            self.stream = self.proc.stdout
+        else:
+            self.output = open(path, mode)
+            self.proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=self.output, bufsize=BUFFER_SIZE)
+            self.stream = self.proc.stdin
+
+    def __iter__(self):
+        return iter(self.stream)
+
+    def read(self, *args):
+        return self.stream.read(*args)
+
+    def write(self, data):
+        return self.stream.write(data)
+
+    def close(self):
+        self.stream.close()
+        returncode = self.proc.wait()
+        if self.output is not None:
+            self.output.close()
+        # NOTE: A negative code means a signal, e.g. SIGPIPE when the reader stopped early.
+        if returncode > 0:
+            raise Exception(f'Command exited with code {returncode}: {" ".join(self.args)}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def open_read(path):
+    codec = detect(path)
+    if codec is None:
+        return open(path, 'rb', buffering=BUFFER_SIZE)
+    if codec.name == 'gzip':
+        return gzip.open(path, 'rb')
+    if codec.name == 'zstd' and zstandard is not None:
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+        return io.BufferedReader(reader, BUFFER_SIZE)
+    if codec.name == 'lz4' and lz4 is not None:
+        return lz4.frame.open(path, 'rb')
+    return Pipe([codec.which(), '-d', '-c', str(path)])
+
+
+def open_write(path, mode='wb', codec=None):
+    codec = codec or from_extension(path)
+    if codec is None:
+        return open(path, mode, buffering=BUFFER_SIZE)
+    # NOTE: Appending adds a new frame (or member), all codecs read concatenated frames back as one stream.
+    if codec.name == 'gzip':
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL)
+    if codec.name == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, mode), closefd=True)
+    if codec.name == 'lz4' and lz4 is not None:
+        return lz4.frame.open(path, mode)
+    return Pipe([codec.which(), '-q', '-c'], path, mode)
+
+
+def read_command(path):
+    codec = detect(path)
+    if codec is None:
+        return f'cat {path}'
+    return f'{codec.binary} -d -c {path}'
+
+
+def compress_command(codec):
+    return f'{codec.which()} -q -c'
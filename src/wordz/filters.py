@@ -0,0 +1,87 @@
+import itertools
+import operator
+import re
+import unicodedata
+
+from wordz import partitioning
+
+
+BATCH_SIZE = 65536
+NORMALIZE_NFC = 'nfc'
+NORMALIZE_CR = 'cr'
+NORMALIZE_SPACE = 'space'
+NORMALIZATIONS = (NORMALIZE_NFC, NORMALIZE_CR, NORMALIZE_SPACE)
+FLAGS = tuple(ord(flag) for flag, _ in partitioning.CLASSES)
+COUNTS = ('read', 'passed', 'normalized', 'classes', 'deny')
+
+
+class Policy:
+
+    # NOTE: Length limits are not part of the policy, merges apply them to every word the policy passes.
+
+    def __init__(self, classes='', min_classes=0, deny=(), normalize=()):
+        unknown = set(classes) - set(flag for flag, _ in partitioning.CLASSES)
+        if unknown:
+            raise Exception(f'Unknown character classes `{"".join(sorted(unknown))}`, use any of: {", ".join(f"{flag} ({name})" for flag, name in partitioning.CLASSES)}')
+        unknown = set(normalize) - set(NORMALIZATIONS)
+        if unknown:
+            raise Exception(f'Unknown normalization `{", ".join(sorted(unknown))}`, use any of: {", ".join(NORMALIZATIONS)}')
+        self.classes = tuple(ord(flag) for flag in classes)
+        self.min_classes = int(min_classes or 0)
+        self.deny = None
+        if deny:
+            self.deny = re.compile(b'|'.join(b'(?:' + pattern.encode('utf8') + b')' for pattern in deny))
+        self.normalize = tuple(normalize)
+        self.counts = dict.fromkeys(COUNTS, 0)
+
+    def normalize_word(self, word):
+        if NORMALIZE_CR in self.normalize:
+            word = word.rstrip(b'\r')
+        if NORMALIZE_SPACE in self.normalize:
+            word = word.rstrip()
+        if NORMALIZE_NFC in self.normalize and not word.isascii():
+            try:
+                word = unicodedata.normalize('NFC', word.decode('utf8')).encode('utf8')
+            except UnicodeDecodeError:
+                pass
+        return word
+
+    def has_classes(self, word):
+        present = set(word.translate(partitioning.TABLE))
+        if not all(flag in present for flag in self.classes):
+            return False
+        return sum(flag in present for flag in FLAGS) >= self.min_classes
+
+    def check(self, batch):
+        counts = self.counts
+        counts['read'] += len(batch)
+        if self.normalize:
+            normalized = [self.normalize_word(word) for word in batch]
+            counts['normalized'] += sum(map(operator.ne, batch, normalized))
+            batch = normalized
+        # NOTE: Every check runs over the whole batch at once, in order of increasing cost.
+        size = len(batch)
+        if self.classes or self.min_classes:
+            batch = [word for word in batch if self.has_classes(word)]
+        counts['classes'] += size - len(batch)
+        size = len(batch)
+        if self.deny is not None:
+            search = self.deny.search
+            batch = [word for word in batch if search(word) is None]
+        counts['deny'] += size - len(batch)
+        counts['passed'] += len(batch)
+        return batch
+
+    def apply(self, lines, batch_size=BATCH_SIZE):
+        lines = iter(lines)
+        while True:
+            batch = list(itertools.islice(lines, batch_size))
+            if not batch:
+                return
+            yield from self.check(batch)
+
+
+def describe(counts):
+    dropped = ', '.join(f'{key} {counts[key]}' for key in ('classes', 'deny') if counts[key])
+    normalized = f', normalized {counts["normalized"]}' if counts['normalized'] else ''
+    return f'read {counts["read"]}, passed {counts["passed"]}' + (f', dropped by {dropped}' if dropped else '') + normalized
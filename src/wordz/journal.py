@@ -0,0 +1,60 @@
+import hashlib
+import json
+import pathlib
+import threading
+
+
+FILENAME = '.journal'
+
+
+def stamp(path):
+    stat = pathlib.Path(path).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class Journal:
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.lock = threading.Lock()
+        self.entries = dict()
+        if self.path.is_file():
+            with open(self.path) as fil:
+                for line in fil:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # NOTE: The last line may be cut short if the process was killed while writing it.
+                        continue
+                    self.entries[entry['key']] = entry['outputs']
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, *parts):
+        sha = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, pathlib.PurePath):
+                part = [str(part)] + (stamp(part) if pathlib.Path(part).is_file() else [])
+            sha.update(str(part).encode('utf8'))
+            sha.update(b'\0')
+        return sha.hexdigest()
+
+    def verify(self, key, *outputs):
+        with self.lock:
+            recorded = self.entries.get(key)
+        if recorded is None:
+            return False
+        for output in filter(None, outputs):
+            output = pathlib.Path(output)
+            if not output.is_file() or recorded.get(str(output)) != stamp(output):
+                return False
+        return True
+
+    def record(self, key, *outputs):
+        entry = {'key': key, 'outputs': {str(output): stamp(output) for output in outputs if output and pathlib.Path(output).is_file()}}
+        with self.lock:
+            self.entries[key] = entry['outputs']
+            with open(self.path, 'a') as fil:
+                fil.write(json.dumps(entry) + '\n')
+                fil.flush()
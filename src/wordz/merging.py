@@ -0,0 +1,214 @@
+import heapq
+import itertools
+import os
+import pathlib
+import tempfile
+
+from wordz import (
+    compression,
+    logs,
+    packed,
+)
+
+
+BUFFER_SIZE = 1024 * 1024
+CHUNK_LINES = 2000000
+
+
+class LineWriter:
+
+    def __init__(self, path, mode='wb', codec=None):
+        self.fil = compression.open_write(path, mode, codec)
+
+    def write(self, line):
+        self.fil.write(line + b'\n')
+
+    def close(self):
+        self.fil.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def open_writer(path, mode='wb', codec=None):
+    if pathlib.Path(path).suffix == packed.EXT:
+        return packed.PackedWriter(path)
+    return LineWriter(path, mode, codec)
+
+
+def read_lines(path):
+    if packed.is_packed(path):
+        with packed.PackedWordlist(path) as wordlist:
+            yield from wordlist
+        return
+    with compression.open_read(path) as fil:
+        for line in fil:
+            yield line.rstrip(b'\n')
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as fil:
+        fil.seek(start)
+        while fil.tell() < end:
+            line = fil.readline()
+            if not line:
+                break
+            yield line.rstrip(b'\n')
+
+
+def line_after(fil, offset, start):
+    # NOTE: Returns the first line starting at or after `offset`, along with its position.
+    fil.seek(offset - 1 if offset > start else start)
+    if offset > start:
+        fil.readline()
+    position = fil.tell()
+    return position, fil.readline().rstrip(b'\n')
+
+
+def search(fil, word, start, end):
+    # NOTE: Binary search of the sorted lines between the `start` and `end` offsets of a file, without reading it all.
+    low, high = start, end
+    while low < high:
+        middle = (low + high) // 2
+        position, line = line_after(fil, middle, start)
+        if position >= end or line >= word:
+            high = middle
+        else:
+            low = position + 1
+    position, line = line_after(fil, low, start)
+    return position < end and line == word
+
+
+def write_lines(lines, path, batch_size=65536, mode='wb', codec=None):
+    lines = iter(lines)
+    if pathlib.Path(path).suffix == packed.EXT:
+        return packed.pack(lines, path)
+    count = 0
+    with compression.open_write(path, mode, codec) as fil:
+        while True:
+            batch = list(itertools.islice(lines, batch_size))
+            if not batch:
+                break
+            count += len(batch)
+            fil.write(b'\n'.join(batch) + b'\n')
+    return count
+
+
+def is_sorted(path):
+    if packed.is_packed(path):
+        return True
+    previous = None
+    for line in read_lines(path):
+        if previous is not None and line < previous:
+            return False
+        previous = line
+    return True
+
+
+def unique(lines):
+    previous = None
+    for line in lines:
+        if line != previous:
+            yield line
+            previous = line
+
+
+def min_length(lines, length):
+    return (line for line in lines if len(line) >= length)
+
+
+def max_length(lines, length):
+    if not length:
+        return lines
+    return (line for line in lines if len(line) <= length)
+
+
+def kway_merge(iterables, dedup=True):
+    merged = heapq.merge(*iterables)
+    if dedup:
+        merged = unique(merged)
+    return merged
+
+
+def external_sort(lines, temp_dir, chunk_lines=CHUNK_LINES, dedup=True):
+    runs = list()
+    try:
+        while True:
+            chunk = list(itertools.islice(lines, chunk_lines))
+            if not chunk:
+                break
+            chunk.sort()
+            if dedup:
+                chunk = list(unique(chunk))
+            handle, run = tempfile.mkstemp(prefix='wordz-run-', suffix='.txt', dir=temp_dir)
+            os.close(handle)
+            runs.append(pathlib.Path(run))
+            write_lines(iter(chunk), run)
+        logs.logger.debug(f'Merging {len(runs)} sorted runs')
+        yield from kway_merge([read_lines(run) for run in runs], dedup)
+    finally:
+        for run in runs:
+            run.unlink(missing_ok=True)
+
+
+def subtract(lines, removals):
+    removals = iter(removals)
+    current = next(removals, None)
+    for line in lines:
+        while current is not None and current < line:
+            current = next(removals, None)
+        if current is None or current != line:
+            yield line
+
+
+def subtract_updating(candidates, history, history_destination):
+    history = iter(history)
+    current = next(history, None)
+    with open_writer(history_destination) as history_fil:
+        for line in candidates:
+            while current is not None and current < line:
+                history_fil.write(current)
+                current = next(history, None)
+            if current is not None and current == line:
+                continue
+            history_fil.write(line)
+            yield line
+        while current is not None:
+            history_fil.write(current)
+            current = next(history, None)
+
+
+def subtract_and_update(candidates, history, destination, history_destination):
+    count = 0
+    with open_writer(destination) as new_fil:
+        for line in subtract_updating(candidates, history, history_destination):
+            new_fil.write(line)
+            count += 1
+    return count
+
+
+def filtered(lines, policy=None):
+    return lines if policy is None else policy.apply(lines)
+
+
+def merge_lines(paths, temp_dir, length=0, presorted=None, dedup=True, maximum=None, policy=None):
+    if policy is not None and policy.normalize:
+        # NOTE: Normalized words may sort differently, every input is sorted again.
+        presorted = [False] * len(paths)
+    elif presorted is None:
+        presorted = [is_sorted(path) for path in paths]
+    sorted_paths = [path for path, known in zip(paths, presorted) if known]
+    unsorted_paths = [path for path, known in zip(paths, presorted) if not known]
+    streams = [filtered(read_lines(path), policy) for path in sorted_paths]
+    if unsorted_paths:
+        logs.logger.debug(f'Sorting unsorted inputs: {", ".join(str(path) for path in unsorted_paths)}')
+        unsorted = filtered(itertools.chain.from_iterable(read_lines(path) for path in unsorted_paths), policy)
+        streams.append(external_sort(max_length(min_length(unsorted, length), maximum), temp_dir, dedup=dedup))
+    return max_length(min_length(kway_merge(streams, dedup), length), maximum)
+
+
+def merge_files(paths, destination, temp_dir, length=0, presorted=None, dedup=True):
+    return write_lines(merge_lines(paths, temp_dir, length, presorted, dedup), destination)
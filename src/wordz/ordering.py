@@ -0,0 +1,99 @@
+import math
+import random
+
+from wordz import (
+    logs,
+    merging,
+)
+
+
+ORDER_WEIGHTS = 'weights'
+ORDER_MARKOV = 'markov'
+RULE_DECAY = 0.5
+MARKOV_ORDER = 2
+TRAIN_LINES = 500000
+END = 256
+ALPHABET = 257
+SCALE = 1000
+OFFSET = 10 ** 9
+WIDTH = 12
+
+
+def sample(lines, size=TRAIN_LINES, seed=0):
+    rand = random.Random(seed)
+    reservoir = list()
+    for idx, line in enumerate(lines):
+        if idx < size:
+            reservoir.append(line)
+            continue
+        position = rand.randrange(idx + 1)
+        if position < size:
+            reservoir[position] = line
+    return reservoir
+
+
+class MarkovModel:
+
+    def __init__(self, order=MARKOV_ORDER):
+        self.order = order
+        self.counts = dict()
+        self.totals = dict()
+
+    def transitions(self, word):
+        padded = b'\0' * self.order + word
+        for idx in range(len(word) + 1):
+            following = padded[idx + self.order] if idx < len(word) else END
+            yield padded[idx:idx + self.order], following
+
+    def train(self, words):
+        for word in words:
+            for context, following in self.transitions(word):
+                counts = self.counts.setdefault(context, dict())
+                counts[following] = counts.get(following, 0) + 1
+                self.totals[context] = self.totals.get(context, 0) + 1
+        return self
+
+    def score(self, word):
+        # NOTE: Log-probability with add-one smoothing, unseen contexts fall back to a uniform distribution.
+        total = 0.0
+        for context, following in self.transitions(word):
+            count = self.counts.get(context, {}).get(following, 0)
+            total += math.log((count + 1) / (self.totals.get(context, 0) + ALPHABET))
+        return total
+
+
+def train(lines, size=TRAIN_LINES, order=MARKOV_ORDER):
+    words = sample(lines, size)
+    logs.logger.debug(f'Training an order {order} Markov model on {len(words)} words')
+    return MarkovModel(order).train(words)
+
+
+def annotate(lines, sources, weights):
+    sources = [iter(source) for source in sources]
+    heads = [next(source, None) for source in sources]
+    for line in lines:
+        best = None
+        for idx, source in enumerate(sources):
+            while heads[idx] is not None and heads[idx] < line:
+                heads[idx] = next(source, None)
+            if heads[idx] == line and (best is None or weights[idx] > best):
+                best = weights[idx]
+        yield line, min(weights) if best is None else best
+
+
+def encode(line, score):
+    cost = max(0, int(round(OFFSET - score * SCALE)))
+    return f'{cost:0{WIDTH}d}'.encode() + b'\t' + line
+
+
+def scored(annotated, model=None):
+    for line, weight in annotated:
+        score = math.log(weight) if weight > 0 else -OFFSET
+        if model is not None:
+            score += model.score(line)
+        yield encode(line, score)
+
+
+def write_ordered(lines, sources, weights, destination, temp_dir, model=None):
+    records = merging.external_sort(scored(annotate(lines, sources, weights), model), temp_dir, dedup=False)
+    return merging.write_lines((record[WIDTH + 1:] for record in records), destination)
@@ -0,0 +1,185 @@
+import bisect
+import mmap
+import os
+import pathlib
+import struct
+
+
+MAGIC = b'WORDZPK1'
+FOOTER = struct.Struct('<QQQ8s')
+BLOCK_SIZE = 128
+EXT = '.wpk'
+
+
+def encode_varint(value):
+    output = bytearray()
+    while value >= 0x80:
+        output.append((value & 0x7f) | 0x80)
+        value >>= 7
+    output.append(value)
+    return bytes(output)
+
+
+def decode_varint(buffer, offset):
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def common_prefix(first, second):
+    limit = min(len(first), len(second))
+    idx = 0
+    while idx < limit and first[idx] == second[idx]:
+        idx += 1
+    return idx
+
+
+def is_packed(path):
+    try:
+        with open(path, 'rb') as fil:
+            return fil.read(len(MAGIC)) == MAGIC
+    except (FileNotFoundError, IsADirectoryError):
+        return False
+
+
+class PackedWriter:
+
+    def __init__(self, path, block_size=BLOCK_SIZE):
+        self.path = pathlib.Path(path)
+        self.block_size = block_size
+        self.fil = open(self.path, 'wb')
+        self.fil.write(MAGIC)
+        self.index = list()
+        self.block = list()
+        self.previous = None
+        self.count = 0
+
+    def write(self, word):
+        if self.previous is not None and word <= self.previous:
+            if word == self.previous:
+                return
+            raise Exception(f'Packed wordlists must be sorted, `{word!r}` follows `{self.previous!r}`')
+        self.block.append(word)
+        self.previous = word
+        self.count += 1
+        if len(self.block) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        if not self.block:
+            return
+        self.index.append((self.fil.tell(), self.block[0]))
+        output = bytearray(encode_varint(len(self.block)))
+        previous = b''
+        for word in self.block:
+            prefix = common_prefix(previous, word)
+            output += encode_varint(prefix) + encode_varint(len(word) - prefix) + word[prefix:]
+            previous = word
+        self.fil.write(output)
+        self.block = list()
+
+    def close(self):
+        self.flush()
+        index_offset = self.fil.tell()
+        output = bytearray()
+        for offset, first in self.index:
+            output += encode_varint(offset) + encode_varint(len(first)) + first
+        self.fil.write(output)
+        self.fil.write(FOOTER.pack(index_offset, len(self.index), self.count, MAGIC))
+        self.fil.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PackedWordlist:
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        with open(self.path, 'rb') as fil:
+            self.buffer = mmap.mmap(fil.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[:len(MAGIC)] != MAGIC or len(self.buffer) < len(MAGIC) + FOOTER.size:
+            raise Exception(f'`{path}` is not a packed wordlist')
+        index_offset, blocks, self.count, magic = FOOTER.unpack_from(self.buffer, len(self.buffer) - FOOTER.size)
+        if magic != MAGIC:
+            raise Exception(f'`{path}` is truncated')
+        self.offsets = list()
+        self.firsts = list()
+        offset = index_offset
+        for _ in range(blocks):
+            block_offset, offset = decode_varint(self.buffer, offset)
+            length, offset = decode_varint(self.buffer, offset)
+            self.offsets.append(block_offset)
+            self.firsts.append(self.buffer[offset:offset + length])
+            offset += length
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for idx in range(len(self.offsets)):
+            yield from self.block(idx)
+
+    def __contains__(self, word):
+        idx = bisect.bisect_right(self.firsts, word) - 1
+        if idx < 0:
+            return False
+        for candidate in self.block(idx):
+            if candidate >= word:
+                return candidate == word
+        return False
+
+    def block(self, idx):
+        count, offset = decode_varint(self.buffer, self.offsets[idx])
+        word = b''
+        for _ in range(count):
+            prefix, offset = decode_varint(self.buffer, offset)
+            length, offset = decode_varint(self.buffer, offset)
+            word = word[:prefix] + self.buffer[offset:offset + length]
+            offset += length
+            yield word
+
+    def range(self, start=None, stop=None):
+        idx = 0 if start is None else max(0, bisect.bisect_right(self.firsts, start) - 1)
+        for block_idx in range(idx, len(self.offsets)):
+            for word in self.block(block_idx):
+                if stop is not None and word >= stop:
+                    return
+                if start is None or word >= start:
+                    yield word
+
+    def export(self, destination):
+        with open(destination, 'wb', buffering=1024 * 1024) as fil:
+            for idx in range(len(self.offsets)):
+                fil.write(b''.join(word + b'\n' for word in self.block(idx)))
+
+    def close(self):
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def pack(lines, destination, block_size=BLOCK_SIZE):
+    temp_path = pathlib.Path(f'{destination}.{os.getpid()}.tmp')
+    try:
+        with PackedWriter(temp_path, block_size) as writer:
+            for line in lines:
+                writer.write(line)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    os.replace(temp_path, destination)
+    return writer.count
@@ -0,0 +1,127 @@
+import json
+import pathlib
+
+from wordz import (
+    compression,
+    merging,
+    packed,
+)
+
+
+BY_LENGTH = 'length'
+BY_CHARSET = 'charset'
+CLASSES = (
+    ('l', 'lower'),
+    ('u', 'upper'),
+    ('d', 'digit'),
+    ('s', 'special'),
+)
+FLUSH_LINES = 1000000
+DIRECTORY_EXT = '.parts'
+
+
+def classify(byte):
+    if 97 <= byte <= 122:
+        return ord('l')
+    if 65 <= byte <= 90:
+        return ord('u')
+    if 48 <= byte <= 57:
+        return ord('d')
+    return ord('s')
+
+
+TABLE = bytes(classify(byte) for byte in range(256))
+
+
+def charset(word):
+    present = set(word.translate(TABLE))
+    return ''.join(flag for flag, _ in CLASSES if ord(flag) in present)
+
+
+def directory(destination):
+    destination = pathlib.Path(destination)
+    return destination.with_name(compression.stem(destination) + DIRECTORY_EXT)
+
+
+class Partitioner:
+
+    def __init__(self, destination, by=(BY_LENGTH,), flush_lines=FLUSH_LINES):
+        self.destination = pathlib.Path(destination)
+        if self.destination.suffix == packed.EXT:
+            raise Exception(f'Packed wordlist {destination} cannot be partitioned')
+        self.by = tuple(by)
+        self.flush_lines = flush_lines
+        self.directory = directory(self.destination)
+        self.suffix = self.destination.name[len(compression.stem(self.destination)):]
+        self.buffers = dict()
+        self.counts = dict()
+        self.buffered = 0
+        self.fed = False
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in self.directory.glob('*'):
+            path.unlink()
+
+    def key(self, word):
+        length = len(word) if BY_LENGTH in self.by else None
+        mask = charset(word) if BY_CHARSET in self.by else None
+        return length, mask
+
+    def path(self, key):
+        length, mask = key
+        parts = list()
+        if length is not None:
+            parts.append(f'{length:02d}')
+        if mask is not None:
+            parts.append(mask or 'empty')
+        return self.directory / ('-'.join(parts) + self.suffix)
+
+    def add(self, word):
+        key = self.key(word)
+        self.buffers.setdefault(key, list()).append(word)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.buffered += 1
+        if self.buffered >= self.flush_lines:
+            self.flush()
+
+    def update(self, lines):
+        for line in lines:
+            self.add(line)
+
+    def feed(self, lines):
+        self.fed = True
+        for line in lines:
+            self.add(line)
+            yield line
+
+    def flush(self):
+        for key, words in self.buffers.items():
+            merging.write_lines(iter(words), self.path(key), mode='ab')
+        self.buffers = dict()
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        flags = dict(CLASSES)
+        partitions = list()
+        for key in sorted(self.counts, key=lambda key: (key[0] or 0, key[1] or '')):
+            length, mask = key
+            partitions.append({
+                'path': self.path(key).name,
+                'length': length,
+                'charset': None if mask is None else [flags[flag] for flag in mask],
+                'count': self.counts[key],
+            })
+        manifest = {
+            'destination': str(self.destination),
+            'by': list(self.by),
+            'total': sum(self.counts.values()),
+            'partitions': partitions,
+        }
+        (self.directory / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+        return manifest
+
+
+def partition(source, by=(BY_LENGTH,)):
+    partitioner = Partitioner(source, by)
+    partitioner.update(merging.read_lines(source))
+    return partitioner.close()
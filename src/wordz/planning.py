@@ -0,0 +1,267 @@
+import fnmatch
+import json
+import pathlib
+import shutil
+
+from wordz import (
+    combining,
+    logs,
+    packed,
+    rules,
+    sizes,
+)
+
+
+# NOTE: Lines per second on a single core, rough figures for the shell engine on an SSD.
+THROUGHPUT = {
+    'rule': 2000000,
+    'combine': 20000000,
+    'sort': 1000000,
+    'merge': 1000000,
+    'compare': 2000000,
+    'copy': 50000000,
+}
+OPERATIONS = {
+    'rule': 'rule',
+    'right': 'combine',
+    'left': 'combine',
+    'both': 'combine',
+    'sort': 'sort',
+    'merge': 'merge',
+    'merge-compare': 'compare',
+}
+
+
+def calibrate(path):
+    throughput = dict(THROUGHPUT)
+    scales = dict()
+    for result in json.loads(pathlib.Path(path).read_text())['results']:
+        kind = OPERATIONS.get(result['operation'])
+        # NOTE: The largest scale is the closest to real wordlists, smaller ones are dominated by startup costs.
+        if kind and result.get('lines_per_second') and result.get('scale', 0) >= scales.get(kind, 0):
+            throughput[kind] = result['lines_per_second']
+            scales[kind] = result.get('scale', 0)
+    return throughput
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}'
+
+
+def format_count(value):
+    for unit in ('', 'K', 'M', 'G', 'T'):
+        if value < 1000 or unit == 'T':
+            break
+        value /= 1000
+    return f'{value:.1f}{unit}' if unit else str(int(value))
+
+
+class Step:
+
+    def __init__(self, idx, kind, destination, inputs, lines, size, seconds):
+        self.idx = idx
+        self.kind = kind
+        self.destination = destination
+        self.inputs = inputs
+        self.lines = lines
+        self.size = size
+        self.seconds = seconds
+
+
+class PlanMixin:
+
+    def __init__(self, *args, calibration=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy = False
+        self.tracker = None
+        self.throughput = calibrate(calibration) if calibration else dict(THROUGHPUT)
+        self.calibration = calibration
+        self.plan = list()
+        self.virtual = dict()
+        self.measured = dict()
+        self.producers = dict()
+        self.temp_usage = 0
+        self.temp_peak = 0
+
+    def check_which(self, name, required=True):
+        super().check_which(name, required=False)
+
+    def is_temp(self, path):
+        return self.temp_dir in pathlib.Path(path).absolute().parents
+
+    def expand(self, path):
+        path = pathlib.Path(path)
+        if '*' not in path.name:
+            return [path]
+        known = set(path.parent.glob(path.name)) if path.parent.is_dir() else set()
+        known.update(other for other in self.virtual if other.parent == path.parent and fnmatch.fnmatch(other.name, path.name))
+        return sorted(other for other in known if self.known(other))
+
+    def known(self, path):
+        path = pathlib.Path(path)
+        if path in self.virtual:
+            return self.virtual[path] is not None
+        return path.is_file()
+
+    def stats(self, path):
+        lines = size = 0
+        for path in self.expand(path):
+            if path in self.virtual:
+                count, length = self.virtual[path] or (0, 0)
+            elif path.is_file():
+                if path not in self.measured:
+                    count, length = combining.stats(path)
+                    self.measured[path] = (count, length + count)
+                count, length = self.measured[path]
+            else:
+                count = length = 0
+            lines += count
+            size += length
+        return lines, size
+
+    def store(self, path, lines, size):
+        path = pathlib.Path(path)
+        if self.is_temp(path):
+            self.temp_usage += size - self.stats(path)[1]
+            self.temp_peak = max(self.temp_peak, self.temp_usage)
+        self.virtual[path] = (lines, size)
+
+    def forget(self, path):
+        path = pathlib.Path(path)
+        if self.is_temp(path):
+            self.temp_usage -= self.stats(path)[1]
+        self.virtual[path] = None
+        self.producers.pop(path, None)
+
+    def record(self, kind, destination, inputs, lines, size, work=None, transient=0):
+        seconds = (lines if work is None else work) / self.throughput.get(kind, THROUGHPUT['copy'])
+        inputs = [pathlib.Path(path) for path in inputs if path is not None]
+        inputs = [f'#{self.producers[path]}' if path in self.producers else self.relative(path) for path in inputs]
+        step = Step(len(self.plan) + 1, kind, pathlib.Path(destination), inputs, lines, size, seconds)
+        self.plan.append(step)
+        # NOTE: Sorting spills roughly its whole input to the temporary directory before the output is written.
+        self.temp_peak = max(self.temp_peak, self.temp_usage + transient)
+        self.store(destination, lines, size)
+        self.producers[step.destination] = step.idx
+        return step.destination
+
+    def relative(self, path):
+        for directory in (self.temp_dir, self.output_dir, pathlib.Path(self.base_dir).absolute()):
+            if directory in path.absolute().parents:
+                return str(path.absolute().relative_to(directory))
+        return str(path)
+
+    def exist(self, *paths):
+        return all(self.known(path) for path in paths)
+
+    def ensure_path(self, destination):
+        pass
+
+    def resolve(self, items):
+        return [item.execute() if hasattr(item, 'execute') else item for item in items]
+
+    def rule(self, wordlist, rule, dest_dir=None):
+        destination = self.rule_destination(wordlist, rule, dest_dir)
+        lines, size = self.stats(wordlist)
+        count = len(list(rules.read_rules(rule)))
+        self.ranks[destination] = self.rule_rank(rule)
+        # NOTE: Rules rarely produce duplicates, the count is an upper bound.
+        return self.record('rule', destination, [wordlist, rule], lines * count, size * count, transient=size * count)
+
+    def combine_paths(self, *paths):
+        destination = self.combine_destination(*paths)
+        counts = [self.stats(path) for path in paths]
+        lines = 1
+        for count, _ in counts:
+            lines *= count
+        size = sum((length - count) * lines // count for count, length in counts if count) + lines
+        self.ranks[destination] = max(self.ranks.get(path, 0) for path in paths)
+        return self.record('combine', destination, paths, lines, size)
+
+    def sort(self, source, output=None, unique=False):
+        lines, size = self.stats(source)
+        return self.record('sort', output or source, self.expand(source), lines, size, transient=size)
+
+    def copy(self, source, destination):
+        self.record('copy', destination, [source], *self.stats(source))
+
+    def append(self, source, destination):
+        lines, size = self.stats(source)
+        total_lines, total_size = self.stats(destination)
+        self.record('copy', destination, [source], total_lines + lines, total_size + size, work=lines)
+
+    def move(self, source, destination):
+        lines, size = self.stats(source)
+        producer = self.producers.get(pathlib.Path(source))
+        self.forget(source)
+        self.store(destination, lines, size)
+        if producer:
+            self.producers[pathlib.Path(destination)] = producer
+
+    def delete(self, destination):
+        self.forget(destination)
+
+    def delete_all(self, starts_with, destination):
+        pass
+
+    def compare(self, left, right, output, append=False):
+        lines, size = self.stats(right)
+        work = lines + self.stats(left)[0]
+        if append:
+            total_lines, total_size = self.stats(output)
+            lines, size = lines + total_lines, size + total_size
+        # NOTE: Assumes nothing in `right` is known yet, the actual output is smaller.
+        self.record('compare', output, [left, right], lines, size, work=work)
+
+    def merge(self, destination, wordlists, compare=None, presorted=None, partition=None, order=None, weights=None):
+        wordlists = [words for words in self.resolve(wordlists) if words is not None]
+        counts = [self.stats(wordlist) for wordlist in wordlists]
+        lines = sum(count for count, _ in counts)
+        size = sum(length for _, length in counts)
+        work = lines
+        if compare:
+            history_lines, history_size = self.stats(compare)
+            work += history_lines
+            self.store(compare, history_lines + lines, history_size + size)
+        # NOTE: Duplicates between the inputs are not known in advance, the sum is an upper bound.
+        self.record('compare' if compare else 'merge', destination, wordlists + [compare], lines, size, work=work, transient=size)
+
+    def pack(self, source, destination=None):
+        if destination is None:
+            destination = source.with_suffix(packed.EXT)
+        return self.record('copy', destination, [source], *self.stats(source))
+
+    def unpack(self, source, destination=None):
+        if destination is None:
+            destination = source.with_suffix(self.DEFAULT_EXT)
+        return self.record('copy', destination, [source], *self.stats(source))
+
+    def report(self):
+        print(f'Plan for {type(self).__name__} ({len(self.plan)} steps)')
+        print(f'{"#":>4}  {"step":<8} {"lines":>9} {"size":>9} {"time":>9}  output <- inputs')
+        for step in self.plan:
+            inputs = ', '.join(step.inputs)
+            print(f'{step.idx:>4}  {step.kind:<8} {format_count(step.lines):>9} {sizes.format_size(step.size):>9} {format_duration(step.seconds):>9}  {self.relative(step.destination)} <- {inputs}')
+        outputs = [path for path, value in self.virtual.items() if value and self.output_dir in path.absolute().parents]
+        output_lines = sum(self.virtual[path][0] for path in outputs)
+        output_size = sum(self.virtual[path][1] for path in outputs)
+        total = sum(step.seconds for step in self.plan)
+        source = f'calibrated from `{self.calibration}`' if self.calibration else 'default throughput'
+        print(f'Output: at most {format_count(output_lines)} lines, {sizes.format_size(output_size)} in {len(outputs)} files')
+        print(f'Temporary disk peak: {sizes.format_size(self.temp_peak)}')
+        print(f'Time: {format_duration(total)} on one core ({source})')
+        free = shutil.disk_usage(self.temp_dir).free if self.temp_dir.is_dir() else None
+        if free is not None and self.temp_peak > free:
+            logs.logger.warning(f'The temporary directory needs {sizes.format_size(self.temp_peak)} but only {sizes.format_size(free)} is available')
+
+    def run(self, lock=None):
+        logs.logger.info(f'Planning with class: {type(self).__name__}')
+        self.setup()
+        self.process()
+        self.report()
+
+
+def planned(cls):
+    return type(cls.__name__, (PlanMixin, cls), dict())
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import socket
+import subprocess
+import threading
+
+from wordz import logs
+
+
+FILENAME = 'probes-{host}.json'
+
+
+def cache_dir():
+    return pathlib.Path(os.environ.get('XDG_CACHE_HOME') or pathlib.Path.home() / '.cache', 'wordz')
+
+
+def stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class Probes:
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.lock = threading.Lock()
+        self.entries = dict()
+        try:
+            self.entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            pass
+
+    def valid(self, entry):
+        try:
+            return stamp(entry['path']) == entry['stamp']
+        except (OSError, KeyError, TypeError):
+            return False
+
+    def store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+                temp_path.write_text(json.dumps(self.entries))
+                os.replace(temp_path, self.path)
+            except OSError as exc:
+                logs.logger.debug(f'Could not save probes to `{self.path}`: {exc}')
+
+    def which(self, name):
+        search = hashlib.sha1(os.environ.get('PATH', '').encode('utf8')).hexdigest()[:16]
+        key = f'which:{name}:{search}'
+        entry = self.entries.get(key)
+        if entry is not None and self.valid(entry):
+            return entry['path']
+        path = shutil.which(name)
+        # NOTE: Missing binaries are not remembered, they may be installed before the next run.
+        if path is not None:
+            self.store(key, {'path': path, 'stamp': stamp(path)})
+        return path
+
+    def comm(self):
+        path = self.which('comm')
+        key = f'comm:{path}'
+        entry = self.entries.get(key)
+        if entry is not None and self.valid(entry):
+            return entry['value']
+        output = subprocess.run('comm --nocheck-order', shell=True, capture_output=True).stderr
+        value = 'comm' if b'illegal option' in output else 'comm --nocheck-order'
+        if path is not None:
+            self.store(key, {'path': path, 'stamp': stamp(path), 'value': value})
+        return value
+
+
+PROBES = None
+
+
+def get():
+    global PROBES
+    if PROBES is None:
+        PROBES = Probes(cache_dir() / FILENAME.format(host=socket.gethostname()))
+    return PROBES
@@ -0,0 +1,148 @@
+import contextlib
+import csv
+import json
+import pathlib
+import resource
+import sys
+import threading
+import time
+
+from wordz import (
+    compression,
+    merging,
+    packed,
+)
+
+
+CHUNK_SIZE = 1024 * 1024
+FIELDS = ('step', 'name', 'started', 'wall_time', 'cpu_time', 'children_cpu_time', 'children_max_rss', 'bytes_in', 'bytes_out', 'lines_in', 'lines_out')
+
+
+def expand(paths):
+    for path in paths:
+        if path is None:
+            continue
+        path = pathlib.Path(path)
+        if '*' in path.name:
+            yield from sorted(path.parent.glob(path.name))
+        elif path.is_file():
+            yield path
+
+
+def count_lines(path):
+    if packed.is_packed(path):
+        with packed.PackedWordlist(path) as wordlist:
+            return len(wordlist)
+    if compression.detect(path):
+        return sum(1 for _ in merging.read_lines(path))
+    count = 0
+    with open(path, 'rb') as fil:
+        for chunk in iter(lambda: fil.read(CHUNK_SIZE), b''):
+            count += chunk.count(b'\n')
+    return count
+
+
+def max_rss(usage):
+    # NOTE: Linux reports kilobytes, macOS reports bytes.
+    return usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+
+
+def cpu_times():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime, children.ru_utime + children.ru_stime, children
+
+
+class Profiler:
+
+    # NOTE: The CPU time of a step is the one of the thread it ran in, steps running at the same time do not count
+    #       each other's. Child processes count in the steps of the thread which started them, once reaped.
+
+    def __init__(self, count_lines=False):
+        self.count_lines = count_lines
+        self.steps = list()
+        self.lock = threading.Lock()
+        self.active = dict()
+        self.started = time.time()
+
+    def measure(self, paths):
+        paths = list(expand(paths))
+        size = sum(path.stat().st_size for path in paths)
+        lines = sum(count_lines(path) for path in paths) if self.count_lines else None
+        return size, lines
+
+    def enter(self, record):
+        with self.lock:
+            self.active.setdefault(threading.get_ident(), list()).append(record)
+
+    def leave(self, record):
+        thread = threading.get_ident()
+        with self.lock:
+            running = self.active[thread]
+            running.remove(record)
+            if not running:
+                del self.active[thread]
+            self.steps.append(record)
+
+    def collector(self):
+        with self.lock:
+            records = list(self.active.get(threading.get_ident(), ()))
+
+        def collect(usage):
+            with self.lock:
+                for record in records:
+                    record['children_cpu_time'] += usage.ru_utime + usage.ru_stime
+                    record['children_max_rss'] = max(record['children_max_rss'], max_rss(usage))
+
+        return collect
+
+    @contextlib.contextmanager
+    def step(self, step, name, inputs=(), outputs=()):
+        bytes_in, lines_in = self.measure(inputs)
+        record = {'step': step, 'name': str(name), 'started': time.time() - self.started, 'children_cpu_time': 0.0, 'children_max_rss': 0}
+        self.enter(record)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            cpu_time = time.thread_time() - cpu_start
+            wall_time = time.perf_counter() - wall_start
+            bytes_out, lines_out = self.measure(outputs)
+            record.update({
+                'wall_time': wall_time,
+                'cpu_time': cpu_time,
+                'bytes_in': bytes_in,
+                'bytes_out': bytes_out,
+                'lines_in': lines_in,
+                'lines_out': lines_out,
+            })
+            self.leave(record)
+
+    def summary(self):
+        totals = dict()
+        for record in self.steps:
+            total = totals.setdefault(record['step'], {'count': 0, 'wall_time': 0.0, 'bytes_out': 0})
+            total['count'] += 1
+            total['wall_time'] += record['wall_time']
+            total['bytes_out'] += record['bytes_out']
+        return totals
+
+    def report(self, path, **extra):
+        path = pathlib.Path(path)
+        if path.suffix == '.csv':
+            with open(path, 'w', newline='') as fil:
+                writer = csv.DictWriter(fil, fieldnames=FIELDS)
+                writer.writeheader()
+                writer.writerows(self.steps)
+        else:
+            cpu_time, children_cpu_time, children = cpu_times()
+            report = dict(extra)
+            report.update({
+                'cpu_time': cpu_time,
+                'children_cpu_time': children_cpu_time,
+                'children_peak_rss': max_rss(children),
+                'steps': self.steps,
+                'summary': self.summary(),
+            })
+            path.write_text(json.dumps(report, indent=2, default=str))
@@ -0,0 +1,92 @@
+import contextlib
+import os
+import threading
+
+from wordz import (
+    logs,
+    sizes,
+)
+
+
+MIN_MEMORY = 64 * 1024 * 1024
+
+
+def total_memory():
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+
+
+def parse_memory(value, total=None):
+    value = str(value).strip()
+    if value.endswith('%'):
+        return int((total or total_memory()) * float(value[:-1]) / 100)
+    return sizes.parse_size(value)
+
+
+class Allocation:
+
+    def __init__(self, name, cores, memory):
+        self.name = name
+        self.cores = cores
+        self.memory = memory
+
+    def __repr__(self):
+        return f'{self.name}: {self.cores} cores, {sizes.format_size(self.memory)}'
+
+    @property
+    def sort_options(self):
+        return f'--parallel={self.cores} -S {self.memory // 1024}K'
+
+
+class Planner:
+
+    def __init__(self, cores, memory, minimum=MIN_MEMORY):
+        self.cores = max(1, int(cores))
+        self.memory = parse_memory(memory)
+        self.minimum = min(minimum, self.memory)
+        self.free_cores = self.cores
+        self.free_memory = self.memory
+        self.waiting = 0
+        self.expected = 0
+        self.condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def expect(self, count):
+        with self.condition:
+            self.expected += count
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.expected = max(0, self.expected - count)
+
+    def reserve(self, name):
+        with self.condition:
+            if self.free_cores < 1 or self.free_memory < self.minimum:
+                logs.logger.debug(f'Budget exhausted, queueing `{name}`')
+            self.waiting += 1
+            while self.free_cores < 1 or self.free_memory < self.minimum:
+                self.condition.wait()
+            self.waiting -= 1
+            if self.expected:
+                self.expected -= 1
+            # NOTE: Leave an equal share for the jobs which are queued or expected to start soon.
+            demand = 1 + max(self.waiting, self.expected)
+            allocation = Allocation(name, max(1, self.free_cores // demand), max(self.minimum, self.free_memory // demand))
+            self.free_cores -= allocation.cores
+            self.free_memory -= allocation.memory
+            logs.logger.debug(f'Allocated {allocation} ({self.free_cores} cores, {sizes.format_size(self.free_memory)} left)')
+            return allocation
+
+    def release(self, allocation):
+        with self.condition:
+            self.free_cores += allocation.cores
+            self.free_memory += allocation.memory
+            self.condition.notify_all()
+
+    @contextlib.contextmanager
+    def allocate(self, name):
+        allocation = self.reserve(name)
+        try:
+            yield allocation
+        finally:
+            self.release(allocation)
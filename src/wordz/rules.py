@@ -0,0 +1,321 @@
+import functools
+import itertools
+import pathlib
+
+from wordz import compression
+
+
+BATCH_SIZE = 65536
+MAX_LENGTH = 256
+POSITIONS = b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class UnsupportedRule(Exception):
+    pass
+
+
+def position(value):
+    return POSITIONS.index(value)
+
+
+def toggle(char):
+    return char.lower() if char.isupper() else char.upper()
+
+
+def rule_noop(word):
+    return word
+
+
+def rule_lower(word):
+    return word.lower()
+
+
+def rule_upper(word):
+    return word.upper()
+
+
+def rule_capitalize(word):
+    return word[:1].upper() + word[1:].lower()
+
+
+def rule_invert_capitalize(word):
+    return word[:1].lower() + word[1:].upper()
+
+
+def rule_toggle_all(word):
+    return word.swapcase()
+
+
+def rule_toggle_at(word, pos):
+    if pos >= len(word):
+        return word
+    return word[:pos] + toggle(word[pos:pos + 1]) + word[pos + 1:]
+
+
+def rule_title(word):
+    return b' '.join(part[:1].upper() + part[1:] for part in word.lower().split(b' '))
+
+
+def rule_reverse(word):
+    return word[::-1]
+
+
+def rule_duplicate(word):
+    return word + word
+
+
+def rule_duplicate_times(word, times):
+    return word * (times + 1)
+
+
+def rule_reflect(word):
+    return word + word[::-1]
+
+
+def rule_rotate_left(word):
+    return word[1:] + word[:1]
+
+
+def rule_rotate_right(word):
+    return word[-1:] + word[:-1]
+
+
+def rule_append(word, char):
+    return word + char
+
+
+def rule_prepend(word, char):
+    return char + word
+
+
+def rule_truncate_left(word):
+    return word[1:]
+
+
+def rule_truncate_right(word):
+    return word[:-1]
+
+
+def rule_delete_at(word, pos):
+    if pos >= len(word):
+        return word
+    return word[:pos] + word[pos + 1:]
+
+
+def rule_extract(word, pos, count):
+    if pos >= len(word) or pos + count > len(word):
+        return word
+    return word[pos:pos + count]
+
+
+def rule_omit(word, pos, count):
+    if pos >= len(word) or pos + count > len(word):
+        return word
+    return word[:pos] + word[pos + count:]
+
+
+def rule_insert(word, pos, char):
+    if pos > len(word):
+        return word
+    return word[:pos] + char + word[pos:]
+
+
+def rule_overwrite(word, pos, char):
+    if pos >= len(word):
+        return word
+    return word[:pos] + char + word[pos + 1:]
+
+
+def rule_truncate_at(word, pos):
+    if pos >= len(word):
+        return word
+    return word[:pos]
+
+
+def rule_replace(word, old, new):
+    return word.replace(old, new)
+
+
+def rule_purge(word, char):
+    return word.replace(char, b'')
+
+
+def rule_duplicate_first(word, times):
+    return word[:1] * times + word
+
+
+def rule_duplicate_last(word, times):
+    return word + word[-1:] * times
+
+
+def rule_duplicate_all(word):
+    return bytes(itertools.chain.from_iterable(zip(word, word)))
+
+
+def rule_swap_front(word):
+    if len(word) < 2:
+        return word
+    return word[1:2] + word[:1] + word[2:]
+
+
+def rule_swap_back(word):
+    if len(word) < 2:
+        return word
+    return word[:-2] + word[-1:] + word[-2:-1]
+
+
+def rule_swap_at(word, first, second):
+    if first >= len(word) or second >= len(word):
+        return word
+    chars = bytearray(word)
+    chars[first], chars[second] = chars[second], chars[first]
+    return bytes(chars)
+
+
+def rule_duplicate_block_front(word, count):
+    if count > len(word):
+        return word
+    return word[:count] + word
+
+
+def rule_duplicate_block_back(word, count):
+    if count > len(word):
+        return word
+    return word + word[len(word) - count:]
+
+
+def rule_increment(word, pos):
+    if pos >= len(word):
+        return word
+    return word[:pos] + bytes([(word[pos] + 1) & 0xff]) + word[pos + 1:]
+
+
+def rule_decrement(word, pos):
+    if pos >= len(word):
+        return word
+    return word[:pos] + bytes([(word[pos] - 1) & 0xff]) + word[pos + 1:]
+
+
+# NOTE: Argument types are `N` for a position (0-9, A-Z) and `X` for a single character.
+FUNCTIONS = {
+    b':': (rule_noop, ''),
+    b'l': (rule_lower, ''),
+    b'u': (rule_upper, ''),
+    b'c': (rule_capitalize, ''),
+    b'C': (rule_invert_capitalize, ''),
+    b't': (rule_toggle_all, ''),
+    b'T': (rule_toggle_at, 'N'),
+    b'E': (rule_title, ''),
+    b'r': (rule_reverse, ''),
+    b'd': (rule_duplicate, ''),
+    b'p': (rule_duplicate_times, 'N'),
+    b'f': (rule_reflect, ''),
+    b'{': (rule_rotate_left, ''),
+    b'}': (rule_rotate_right, ''),
+    b'$': (rule_append, 'X'),
+    b'^': (rule_prepend, 'X'),
+    b'[': (rule_truncate_left, ''),
+    b']': (rule_truncate_right, ''),
+    b'D': (rule_delete_at, 'N'),
+    b'x': (rule_extract, 'NN'),
+    b'O': (rule_omit, 'NN'),
+    b'i': (rule_insert, 'NX'),
+    b'o': (rule_overwrite, 'NX'),
+    b"'": (rule_truncate_at, 'N'),
+    b's': (rule_replace, 'XX'),
+    b'@': (rule_purge, 'X'),
+    b'z': (rule_duplicate_first, 'N'),
+    b'Z': (rule_duplicate_last, 'N'),
+    b'q': (rule_duplicate_all, ''),
+    b'k': (rule_swap_front, ''),
+    b'K': (rule_swap_back, ''),
+    b'*': (rule_swap_at, 'NN'),
+    b'y': (rule_duplicate_block_front, 'N'),
+    b'Y': (rule_duplicate_block_back, 'N'),
+    b'+': (rule_increment, 'N'),
+    b'-': (rule_decrement, 'N'),
+}
+
+
+def parse(line):
+    functions = list()
+    idx = 0
+    while idx < len(line):
+        name = line[idx:idx + 1]
+        idx += 1
+        if name in (b' ', b'\t'):
+            continue
+        try:
+            func, spec = FUNCTIONS[name]
+        except KeyError:
+            raise UnsupportedRule(f'Unsupported rule function `{name.decode(errors="replace")}` in `{line.decode(errors="replace")}`')
+        if idx + len(spec) > len(line):
+            raise UnsupportedRule(f'Missing arguments for `{name.decode(errors="replace")}` in `{line.decode(errors="replace")}`')
+        args = list()
+        for kind in spec:
+            value = line[idx:idx + 1]
+            idx += 1
+            if kind == 'N':
+                try:
+                    args.append(position(value))
+                except ValueError:
+                    raise UnsupportedRule(f'Invalid position `{value.decode(errors="replace")}` in `{line.decode(errors="replace")}`')
+            else:
+                args.append(value)
+        functions.append((func, tuple(args)))
+    return functions
+
+
+def compile_rule(line):
+    functions = [(func, args) for func, args in parse(line) if func is not rule_noop]
+
+    def apply(word):
+        for func, args in functions:
+            word = func(word, *args)
+        return word
+
+    return apply
+
+
+def read_rules(path):
+    with open(path, 'rb') as fil:
+        for line in fil:
+            line = line.rstrip(b'\r\n')
+            if line and not line.startswith(b'#'):
+                yield line
+
+
+@functools.lru_cache(maxsize=None)
+def compile_file(path, mtime_ns=None):
+    return tuple(compile_rule(line) for line in read_rules(path))
+
+
+def load(path):
+    path = pathlib.Path(path)
+    return compile_file(str(path.absolute()), path.stat().st_mtime_ns)
+
+
+def read_words(path):
+    with compression.open_read(path) as fil:
+        for line in fil:
+            yield line.rstrip(b'\r\n')
+
+
+def batched(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def mutate(words, compiled, batch_size=BATCH_SIZE):
+    for words_batch in batched(words, batch_size):
+        output = list()
+        for apply in compiled:
+            for word in words_batch:
+                candidate = apply(word)
+                if len(candidate) <= MAX_LENGTH:
+                    output.append(candidate)
+        yield output
@@ -0,0 +1,107 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import os
+import signal
+import subprocess
+import threading
+
+from wordz import logs
+
+
+# NOTE: A pipeline fails when any of its commands does, not only the last one.
+SHELL = ('bash', '-o', 'pipefail', '-c')
+
+
+class CommandError(Exception):
+
+    def __init__(self, cmd, returncode):
+        super().__init__(f'Command exited with code {returncode}: {cmd}')
+        self.cmd = cmd
+        self.returncode = returncode
+
+
+def wait(process, usage=None):
+    # NOTE: Reaping the child here gives its resource usage, which includes the commands of its pipeline.
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if usage is not None:
+        usage(rusage)
+    return process.returncode
+
+
+class Runner:
+
+    def __init__(self, slots):
+        self.slots = max(1, int(slots))
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='wordz-runner', daemon=True)
+        self.thread.start()
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.slots, thread_name_prefix='wordz-wait')
+        self.semaphore = self.call(self.create_semaphore())
+        self.tasks = set()
+
+    async def create_semaphore(self):
+        return asyncio.Semaphore(self.slots)
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def execute(self, cmd, check=True, usage=None):
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            async with self.semaphore:
+                logs.logger.debug(f' $ {cmd}')
+                # NOTE: A session of its own lets the whole pipeline be killed, not only the shell.
+                process = subprocess.Popen([*SHELL, cmd], start_new_session=True)
+                waiter = self.loop.run_in_executor(self.executor, wait, process, usage)
+                try:
+                    returncode = await asyncio.shield(waiter)
+                except asyncio.CancelledError:
+                    with contextlib.suppress(ProcessLookupError):
+                        os.killpg(process.pid, signal.SIGTERM)
+                    await waiter
+                    raise
+        finally:
+            self.tasks.discard(task)
+        if returncode and check:
+            raise CommandError(cmd, returncode)
+        return returncode
+
+    async def gather(self, cmds, check=True, usage=None):
+        tasks = [asyncio.ensure_future(self.execute(cmd, check, usage)) for cmd in cmds]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def run(self, cmd, check=True, usage=None):
+        return self.call(self.execute(cmd, check, usage))
+
+    def run_all(self, cmds, check=True, usage=None):
+        return self.call(self.gather(cmds, check, usage))
+
+    def cancel_tasks(self):
+        for task in self.tasks:
+            task.cancel()
+
+    def cancel(self):
+        self.loop.call_soon_threadsafe(self.cancel_tasks)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.executor.shutdown(wait=False)
+
+    @contextlib.contextmanager
+    def slot(self):
+        self.call(self.semaphore.acquire())
+        try:
+            yield
+        finally:
+            self.loop.call_soon_threadsafe(self.semaphore.release)
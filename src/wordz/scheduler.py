@@ -0,0 +1,64 @@
+import concurrent.futures
+
+from wordz import logs
+
+
+class Node:
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+        self.deps = tuple(arg for arg in args if isinstance(arg, Node))
+        self.done = False
+        self.result = None
+
+    def __repr__(self):
+        args = ', '.join(str(arg) for arg in self.args)
+        return f'{self.func.__name__}({args})'
+
+    def execute(self):
+        args = [arg.result if isinstance(arg, Node) else arg for arg in self.args]
+        self.result = self.func(*args)
+        self.done = True
+        return self.result
+
+
+def collect(items):
+    nodes = dict()
+    stack = [item for item in items if isinstance(item, Node)]
+    while stack:
+        node = stack.pop()
+        if id(node) not in nodes and not node.done:
+            nodes[id(node)] = node
+            stack.extend(node.deps)
+    return list(nodes.values())
+
+
+class Scheduler:
+
+    def __init__(self, workers):
+        self.workers = max(1, int(workers))
+
+    def run(self, items):
+        pending = collect(items)
+        if pending:
+            logs.logger.debug(f'Scheduling {len(pending)} jobs on {self.workers} workers')
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            running = dict()
+            while pending or running:
+                ready = [node for node in pending if all(dep.done for dep in node.deps)]
+                for node in ready:
+                    logs.logger.debug(f'Starting job {node}')
+                    pending.remove(node)
+                    running[executor.submit(node.execute)] = node
+                if not running:
+                    raise Exception(f'Unable to schedule jobs: {pending}')
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    exc = future.exception()
+                    if exc is not None:
+                        for other in running:
+                            other.cancel()
+                        raise Exception(f'Job {node} failed: {exc}') from exc
+        return [item.result if isinstance(item, Node) else item for item in items]
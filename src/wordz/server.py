@@ -0,0 +1,301 @@
+import contextlib
+import http.client
+import http.server
+import itertools
+import json
+import os
+import pathlib
+import queue
+import socket
+import socketserver
+import threading
+import time
+import urllib.parse
+
+from wordz import (
+    logs,
+    probes,
+)
+
+
+SOCKET = 'serve.sock'
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+POLL_INTERVAL = 1.0
+
+
+class Job:
+
+    def __init__(self, idx, args, priority=0):
+        self.idx = idx
+        self.args = args
+        self.priority = priority
+        self.status = QUEUED
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def describe(self):
+        return {
+            'id': self.idx,
+            'args': self.args,
+            'priority': self.priority,
+            'status': self.status,
+            'error': self.error,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+def default_socket():
+    return probes.cache_dir() / SOCKET
+
+
+class SharedLock:
+
+    # NOTE: Held by any number of `process()` phases at once, or by a single `setup()`.
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+
+    @contextlib.contextmanager
+    def shared(self):
+        with self.condition:
+            self.condition.wait_for(lambda: not self.writer)
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                self.condition.notify_all()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        with self.condition:
+            self.condition.wait_for(lambda: not self.writer and not self.readers)
+            self.writer = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writer = False
+                self.condition.notify_all()
+
+
+class Server:
+
+    def __init__(self, factory, workers=1):
+        # NOTE: `factory(args)` validates the command line of a job and returns a function creating its combinator.
+        self.factory = factory
+        self.queue = queue.PriorityQueue()
+        self.jobs = dict()
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+        self.base_locks = dict()
+        self.threads = [threading.Thread(target=self.work, name=f'wordz-worker-{idx}', daemon=True) for idx in range(max(1, workers))]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, args, priority=0):
+        create = self.factory(args)
+        with self.lock:
+            job = Job(next(self.counter), list(args), priority)
+            job.create = create
+            self.jobs[job.idx] = job
+        # NOTE: Higher priorities first, then in order of submission.
+        self.queue.put((-priority, job.idx, job))
+        logs.logger.info(f'Queued job {job.idx} with priority {priority}')
+        return job
+
+    def base_lock(self, base_dir):
+        with self.lock:
+            return self.base_locks.setdefault(pathlib.Path(base_dir).absolute(), SharedLock())
+
+    def work(self):
+        while True:
+            _, _, job = self.queue.get()
+            if job is None:
+                return
+            self.execute(job)
+
+    def execute(self, job):
+        job.status = RUNNING
+        job.started = time.time()
+        logs.logger.info(f'Starting job {job.idx}: {" ".join(job.args)}')
+        try:
+            combinator = job.create()
+            try:
+                # NOTE: `setup()` usually rewrites files in the base directory, it waits for the other jobs using the same one.
+                #       Builds run side by side, each output is locked while it is written.
+                combinator.run(self.base_lock(combinator.base_dir))
+            finally:
+                combinator.close()
+        except Exception as exc:
+            job.status = FAILED
+            job.error = str(exc)
+            logs.logger.error(f'Job {job.idx} failed: {exc}')
+        else:
+            job.status = DONE
+            logs.logger.info(f'Job {job.idx} done')
+        job.finished = time.time()
+
+    def describe(self, idx=None):
+        with self.lock:
+            if idx is None:
+                return [job.describe() for job in self.jobs.values()]
+            job = self.jobs.get(idx)
+        return None if job is None else job.describe()
+
+    def stop(self):
+        # NOTE: Jobs still queued are dropped, the running ones are waited for.
+        for _ in self.threads:
+            self.queue.put((float('-inf'), next(self.counter), None))
+        for thread in self.threads:
+            thread.join()
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'local'
+
+    def forbidden(self):
+        # NOTE: Browsers always send `Origin` with cross-site requests, and cannot send JSON there without asking first.
+        if self.headers.get('Origin') is not None:
+            self.respond(403, {'error': 'Cross-origin requests are not allowed'})
+            return True
+        return False
+
+    def respond(self, status, body):
+        data = json.dumps(body).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.forbidden():
+            return
+        parts = self.path.strip('/').split('/')
+        if parts == ['jobs']:
+            self.respond(200, self.server.wordz.describe())
+        elif len(parts) == 2 and parts[0] == 'jobs' and parts[1].isdigit():
+            job = self.server.wordz.describe(int(parts[1]))
+            if job is None:
+                self.respond(404, {'error': f'Job {parts[1]} not found'})
+            else:
+                self.respond(200, job)
+        else:
+            self.respond(404, {'error': f'Unknown path `{self.path}`'})
+
+    def do_POST(self):
+        # NOTE: Read before anything is refused, so that clients are done sending when the connection is closed.
+        data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.strip('/') != 'jobs':
+            self.respond(404, {'error': f'Unknown path `{self.path}`'})
+            return
+        if self.forbidden():
+            return
+        if self.headers.get_content_type() != 'application/json':
+            self.respond(415, {'error': 'Jobs must be submitted as `application/json`'})
+            return
+        try:
+            body = json.loads(data)
+            job = self.server.wordz.submit(body['args'], int(body.get('priority', 0)))
+        except (ValueError, KeyError, TypeError) as exc:
+            self.respond(400, {'error': f'Invalid job: {exc}'})
+        except (Exception, SystemExit) as exc:
+            self.respond(400, {'error': str(exc)})
+        else:
+            self.respond(201, job.describe())
+
+    def log_message(self, format, *args):
+        logs.logger.debug(f'{self.address_string()} {format % args}')
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+    def server_bind(self):
+        path = pathlib.Path(self.server_address)
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        # NOTE: Only the user running the server may connect, the socket is never accessible to others.
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(path, 0o600)
+
+
+def listen(address):
+    if address.startswith('http://'):
+        parsed = urllib.parse.urlsplit(address)
+        return http.server.ThreadingHTTPServer((parsed.hostname, parsed.port), Handler)
+    return UnixHTTPServer(address, Handler)
+
+
+def serve(factory, address, workers=1):
+    server = Server(factory, workers)
+    httpd = listen(address)
+    httpd.wordz = server
+    logs.logger.info(f'Listening on {address} with {len(server.threads)} workers')
+    try:
+        httpd.serve_forever()
+    finally:
+        httpd.server_close()
+        if not address.startswith('http://'):
+            pathlib.Path(address).unlink(missing_ok=True)
+        server.stop()
+
+
+class UnixConnection(http.client.HTTPConnection):
+
+    def __init__(self, socket_path):
+        super().__init__('localhost')
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(str(self.socket_path))
+
+
+def connect(address):
+    if address.startswith('http://'):
+        parsed = urllib.parse.urlsplit(address)
+        return http.client.HTTPConnection(parsed.hostname, parsed.port)
+    return UnixConnection(address)
+
+
+def request(address, path, body=None):
+    connection = connect(address)
+    try:
+        if body is None:
+            connection.request('GET', path)
+        else:
+            connection.request('POST', path, json.dumps(body).encode('utf8'), {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        result = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status >= 400:
+        raise Exception(result.get('error', f'HTTP {response.status}'))
+    return result
+
+
+def submit(address, args, priority=0, wait=False, interval=POLL_INTERVAL):
+    job = request(address, '/jobs', {'args': args, 'priority': priority})
+    while wait and job['status'] in (QUEUED, RUNNING):
+        time.sleep(interval)
+        job = request(address, f'/jobs/{job["id"]}')
+    return job
@@ -0,0 +1,275 @@
+import bisect
+import concurrent.futures
+import contextlib
+import itertools
+import os
+import pathlib
+import random
+import shutil
+import socket
+import threading
+import time
+
+from wordz import (
+    compression,
+    logs,
+    merging,
+    packed,
+)
+
+
+SAMPLE_LINES = 100000
+POLL_INTERVAL = 1.0
+LOCK_TIMEOUT = 300.0
+
+
+def sample(path, count=SAMPLE_LINES):
+    if packed.is_packed(path):
+        with packed.PackedWordlist(path) as wordlist:
+            return list(wordlist.firsts)
+    if compression.detect(path):
+        # NOTE: Compressed files cannot be sought, fall back to reservoir sampling.
+        rand = random.Random(0)
+        lines = list()
+        for idx, line in enumerate(merging.read_lines(path)):
+            if idx < count:
+                lines.append(line)
+                continue
+            position = rand.randrange(idx + 1)
+            if position < count:
+                lines[position] = line
+        return lines
+    size = pathlib.Path(path).stat().st_size
+    count = min(count, size)
+    lines = list()
+    with open(path, 'rb') as fil:
+        for idx in range(count):
+            fil.seek(size * idx // count)
+            if idx:
+                # NOTE: Skip the (most likely partial) line the offset points into.
+                fil.readline()
+            line = fil.readline().rstrip(b'\n')
+            if line:
+                lines.append(line)
+    return lines
+
+
+def boundaries(paths, shards, count=SAMPLE_LINES):
+    keys = sorted(itertools.chain.from_iterable(sample(path, count // len(paths) or 1) for path in paths))
+    bounds = list()
+    if not keys:
+        return bounds
+    for idx in range(1, shards):
+        key = keys[len(keys) * idx // shards]
+        if not bounds or key > bounds[-1]:
+            bounds.append(key)
+    return bounds
+
+
+def split(lines, bounds, paths):
+    writers = [merging.LineWriter(path) for path in paths]
+    try:
+        for line in lines:
+            writers[bisect.bisect_right(bounds, line)].write(line)
+    finally:
+        for writer in writers:
+            writer.close()
+
+
+def concatenate(paths, destination):
+    destination = pathlib.Path(destination)
+    if destination.suffix == packed.EXT or compression.from_extension(destination):
+        return merging.write_lines(itertools.chain.from_iterable(merging.read_lines(path) for path in paths), destination)
+    temp_path = pathlib.Path(f'{destination}.{os.getpid()}.tmp')
+    with open(temp_path, 'wb') as output:
+        for path in paths:
+            with open(path, 'rb') as fil:
+                shutil.copyfileobj(fil, output, merging.BUFFER_SIZE)
+    os.replace(temp_path, destination)
+
+
+class Coordinator:
+
+    # NOTE: The directory is removed once the shards are concatenated, hosts still waiting then find it gone.
+    #       Locks are touched while their job runs, a lock left by a process which is gone (on this host) or not touched
+    #       for `timeout` seconds (on any host) is taken over by the next run, as are jobs which failed.
+
+    def __init__(self, directory, shards, wordlists=1, timeout=None):
+        self.directory = pathlib.Path(directory)
+        self.shards = shards
+        self.wordlists = wordlists
+        self.timeout = LOCK_TIMEOUT if timeout is None else timeout
+
+    def path(self, shard, name):
+        return self.directory / f'{shard:04d}-{name}.txt'
+
+    def inputs(self, shard):
+        return [self.path(shard, f'input-{idx}') for idx in range(self.wordlists)]
+
+    def lock(self, name):
+        return self.directory / f'{name}.lock'
+
+    def holder(self, name):
+        try:
+            return self.lock(name).read_text().strip()
+        except FileNotFoundError:
+            return None
+
+    def stale(self, name):
+        lock = self.lock(name)
+        try:
+            holder = lock.read_text().strip()
+            age = time.time() - lock.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        host, _, pid = holder.partition(':')
+        if host == socket.gethostname() and pid.isdigit():
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        return age > self.timeout
+
+    def claim(self, name):
+        if (self.directory / f'{name}.done').is_file():
+            return False
+        failed = self.directory / f'{name}.failed'
+        if failed.is_file() or self.stale(name):
+            logs.logger.info(f'Taking over shard job `{name}` from `{self.holder(name)}`')
+            # NOTE: Renaming the lock away lets a single host take the job over.
+            released = self.directory / f'{name}.{socket.gethostname()}.{os.getpid()}.released'
+            try:
+                os.rename(self.lock(name), released)
+            except FileNotFoundError:
+                return False
+            released.unlink()
+            failed.unlink(missing_ok=True)
+        try:
+            handle = os.open(self.lock(name), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except (FileExistsError, FileNotFoundError):
+            return False
+        os.write(handle, f'{socket.gethostname()}:{os.getpid()}\n'.encode())
+        os.close(handle)
+        return True
+
+    @contextlib.contextmanager
+    def holding(self, name):
+        stop = threading.Event()
+
+        def touch():
+            while not stop.wait(self.timeout / 10):
+                with contextlib.suppress(FileNotFoundError):
+                    os.utime(self.lock(name))
+
+        thread = threading.Thread(target=touch, name=f'wordz-{name}', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def done(self, name, count=0):
+        (self.directory / f'{name}.done').write_text(str(count))
+
+    def fail(self, name, exc):
+        (self.directory / f'{name}.failed').write_text(str(exc))
+
+    def wait(self, names, interval=POLL_INTERVAL):
+        counts = dict()
+        while True:
+            if not self.directory.is_dir():
+                return None
+            for name in names:
+                if name in counts:
+                    continue
+                failed = self.directory / f'{name}.failed'
+                if failed.is_file():
+                    raise Exception(f'Shard job `{name}` failed: {failed.read_text()}')
+                done = self.directory / f'{name}.done'
+                if done.is_file():
+                    counts[name] = int(done.read_text() or 0)
+                elif self.stale(name):
+                    raise Exception(f'Shard job `{name}` was abandoned by `{self.holder(name)}`, run again to take it over')
+            if len(counts) == len(names):
+                return counts
+            time.sleep(interval)
+
+
+def merge_shard(inputs, destination, presorted, compare=None, history_destination=None, temp_dir=None):
+    lines = merging.merge_lines(inputs, temp_dir, presorted=presorted)
+    if compare:
+        return merging.subtract_and_update(lines, merging.read_lines(compare), destination, history_destination)
+    return merging.write_lines(lines, destination)
+
+
+def work(directory, shards, wordlists, presorted, compare):
+    coordinator = Coordinator(directory, shards, wordlists)
+    processed = 0
+    for shard in range(shards):
+        name = f'shard-{shard}'
+        if not coordinator.claim(name):
+            continue
+        try:
+            with coordinator.holding(name):
+                count = merge_shard(
+                    coordinator.inputs(shard),
+                    coordinator.path(shard, 'output'),
+                    presorted,
+                    coordinator.path(shard, 'history') if compare else None,
+                    coordinator.path(shard, 'history-output') if compare else None,
+                    directory,
+                )
+        except Exception as exc:
+            coordinator.fail(name, exc)
+            raise
+        coordinator.done(name, count)
+        processed += 1
+    return processed
+
+
+def merge(destination, wordlists, directory, shards, workers, length=0, presorted=None, compare=None, maximum=None, policy=None):
+    pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+    coordinator = Coordinator(directory, shards, len(wordlists))
+    if policy is not None and policy.normalize:
+        presorted = [False] * len(wordlists)
+    if presorted is None:
+        presorted = [merging.is_sorted(wordlist) for wordlist in wordlists]
+    if coordinator.claim('split'):
+        try:
+            with coordinator.holding('split'):
+                bounds = boundaries(wordlists, shards)
+                logs.logger.debug(f'Shard boundaries: {bounds}')
+                for idx, wordlist in enumerate(wordlists):
+                    lines = merging.max_length(merging.min_length(merging.filtered(merging.read_lines(wordlist), policy), length), maximum)
+                    split(lines, bounds, [coordinator.path(shard, f'input-{idx}') for shard in range(shards)])
+                if compare:
+                    split(merging.read_lines(compare), bounds, [coordinator.path(shard, 'history') for shard in range(shards)])
+        except Exception as exc:
+            coordinator.fail('split', exc)
+            raise
+        coordinator.done('split')
+    coordinator.wait(['split'])
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(work, directory, shards, len(wordlists), presorted, bool(compare)) for _ in range(min(workers, shards))]
+        processed = sum(future.result() for future in futures)
+    logs.logger.debug(f'Processed {processed} of {shards} shards on this host')
+    counts = coordinator.wait([f'shard-{shard}' for shard in range(shards)])
+    if counts is None or not coordinator.claim('concatenate'):
+        coordinator.wait(['concatenate'])
+        if not pathlib.Path(destination).is_file():
+            raise Exception(f'Shards of `{destination}` were concatenated by another host, but the output is missing')
+        return None
+    try:
+        with coordinator.holding('concatenate'):
+            concatenate([coordinator.path(shard, 'output') for shard in range(shards)], destination)
+            if compare:
+                concatenate([coordinator.path(shard, 'history-output') for shard in range(shards)], compare)
+    except Exception as exc:
+        coordinator.fail('concatenate', exc)
+        raise
+    coordinator.done('concatenate', sum(counts.values()))
+    shutil.rmtree(directory, ignore_errors=True)
+    return sum(counts.values())
@@ -0,0 +1,17 @@
+UNITS = 'KMGTP'
+
+
+def parse_size(value):
+    value = str(value).strip().upper().rstrip('B')
+    if value and value[-1] in UNITS:
+        return int(float(value[:-1]) * 1024 ** (UNITS.index(value[-1]) + 1))
+    return int(value)
+
+
+def format_size(value):
+    size = float(value)
+    for unit in ('',) + tuple(UNITS):
+        if abs(size) < 1024 or unit == UNITS[-1]:
+            break
+        size /= 1024
+    return f'{size:.1f}{unit}B' if unit else f'{int(size)}B'
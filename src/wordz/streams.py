@@ -0,0 +1,138 @@
+import itertools
+import os
+import pathlib
+import subprocess
+import threading
+import uuid
+
+from wordz import (
+    combining,
+    logs,
+    merging,
+    rules,
+)
+
+
+BATCH_SIZE = rules.BATCH_SIZE
+
+
+def lines(source):
+    if isinstance(source, (str, os.PathLike)):
+        return merging.read_lines(source)
+    if hasattr(source, 'read'):
+        return (line.rstrip(b'\r\n') for line in source)
+    return iter(source)
+
+
+def reiterable(source):
+    # NOTE: Every part but the first is read once per word of the previous ones, streams are kept in memory.
+    if isinstance(source, (str, os.PathLike)):
+        return combining.reiterable(source)
+    if isinstance(source, (list, tuple)):
+        return source
+    return list(lines(source))
+
+
+def min_length(words, length):
+    return merging.min_length(lines(words), length)
+
+
+def max_length(words, length):
+    return merging.max_length(lines(words), length)
+
+
+def unique(words):
+    return merging.unique(lines(words))
+
+
+def sort(words, temp_dir=None, dedup=True):
+    return merging.external_sort(lines(words), temp_dir, dedup=dedup)
+
+
+def pipe(words, args):
+    proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def feed():
+        try:
+            write(words, proc.stdin)
+        except BrokenPipeError:
+            pass
+        finally:
+            proc.stdin.close()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    try:
+        for line in proc.stdout:
+            yield line.rstrip(b'\n')
+    finally:
+        proc.stdout.close()
+        feeder.join()
+        returncode = proc.wait()
+    if returncode > 0:
+        raise Exception(f'Command exited with code {returncode}: {" ".join(str(arg) for arg in args)}')
+
+
+def rule(words, path, bin_hashcat='hashcat'):
+    try:
+        compiled = rules.load(path)
+    except rules.UnsupportedRule as exc:
+        logs.logger.warning(f'{exc}, falling back to `{bin_hashcat}`')
+        return pipe(words, [bin_hashcat, '--stdout', f'--session={uuid.uuid4()}', '-r', str(path)])
+    return itertools.chain.from_iterable(rules.mutate(lines(words), compiled))
+
+
+def combine(first, *others):
+    others = [reiterable(other) for other in others]
+    for prefix in lines(first):
+        if len(others) == 1:
+            for suffix in others[0]:
+                yield prefix + suffix
+        else:
+            yield from combine((prefix + middle for middle in others[0]), *others[1:])
+
+
+def merge(*sources, compare=None, length=0, maximum=None, presorted=None, temp_dir=None, policy=None):
+    if policy is not None and policy.normalize:
+        presorted = [False] * len(sources)
+    elif presorted is None:
+        presorted = [isinstance(source, (str, os.PathLike)) and merging.is_sorted(source) for source in sources]
+    if policy is not None:
+        sources = [merging.filtered(lines(source), policy) for source in sources]
+    streams = [lines(source) if known else sort(source, temp_dir) for source, known in zip(sources, presorted)]
+    merged = merging.max_length(merging.min_length(merging.kway_merge(streams), length), maximum)
+    if compare is not None:
+        merged = merging.subtract(merged, lines(compare))
+    return merged
+
+
+def write(words, sink, batch_size=BATCH_SIZE):
+    if isinstance(sink, (str, os.PathLike)):
+        return merging.write_lines(lines(words), pathlib.Path(sink))
+    words = lines(words)
+    count = 0
+    while True:
+        batch = list(itertools.islice(words, batch_size))
+        if not batch:
+            break
+        count += len(batch)
+        sink.write(b'\n'.join(batch) + b'\n')
+    sink.flush()
+    return count
+
+
+def feed(words, args):
+    with subprocess.Popen(args, stdin=subprocess.PIPE) as proc:
+        try:
+            count = write(words, proc.stdin)
+        except BrokenPipeError:
+            # NOTE: The process may stop reading early, e.g. when it found what it was looking for.
+            count = None
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+    if proc.returncode > 0:
+        raise Exception(f'Command exited with code {proc.returncode}: {" ".join(str(arg) for arg in args)}')
+    return count
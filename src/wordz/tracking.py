@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import pathlib
+import threading
+
+from wordz import (
+    journal,
+    logs,
+    merging,
+)
+
+
+SAME = 'same'
+ADDED = 'added'
+REBUILT = 'rebuilt'
+DIRECTORY = '.incremental'
+STATE = 'state.json'
+SNAPSHOT = 'snapshot'
+
+
+def digest(path):
+    return hashlib.sha1(str(pathlib.Path(path).absolute()).encode('utf8')).hexdigest()[:16]
+
+
+class Tracker:
+
+    # NOTE: Every output (the consumer) remembers the version of each input it was built from, so that outputs of
+    #       several classes sharing a temporary directory all get the lines added since they were built themselves.
+    #       Sorted snapshots are kept per version of an input and shared by the consumers which used it.
+
+    def __init__(self, directory, temp_dir):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.temp_dir = temp_dir
+        self.lock = threading.RLock()
+        self.consumers = dict()
+        self.merges = dict()
+        state = self.directory / STATE
+        if state.is_file():
+            loaded = json.loads(state.read_text())
+            self.consumers = loaded.get('consumers', dict())
+            self.merges = loaded['merges']
+        self.changed = dict()
+        self.outputs = dict()
+        self.tracked = dict()
+
+    def path(self, path, name):
+        return self.directory / f'{digest(path)}-{name}.txt'
+
+    def snapshot(self, path, stamp):
+        return self.path(path, f'{SNAPSHOT}-{stamp[0]}-{stamp[1]}')
+
+    def sorted_copy(self, path, destination):
+        merging.merge_files([path], destination, self.temp_dir, presorted=[merging.is_sorted(path)])
+
+    def current(self, path):
+        stamp = journal.stamp(path)
+        snapshot = self.snapshot(path, stamp)
+        if not snapshot.is_file():
+            partial = snapshot.with_name(snapshot.name + '.partial')
+            self.sorted_copy(path, partial)
+            os.replace(partial, snapshot)
+        return stamp, snapshot
+
+    def changes(self, path, consumer):
+        path = pathlib.Path(path).absolute()
+        consumer = pathlib.Path(consumer).absolute()
+        with self.lock:
+            if (consumer, path) not in self.changed:
+                self.changed[(consumer, path)] = self.compare(path, consumer)
+            return self.changed[(consumer, path)]
+
+    def compare(self, path, consumer):
+        known = self.consumers.get(str(consumer), dict()).get(str(path))
+        if not path.is_file():
+            self.tracked[(consumer, path)] = None
+            return REBUILT, None
+        stamp = journal.stamp(path)
+        self.tracked[(consumer, path)] = stamp
+        if path in self.outputs:
+            # NOTE: Outputs of this run come with their delta, no snapshot is made of them. A consumer built from
+            #       an older version than the previous one is rebuilt.
+            status, delta, before = self.outputs[path]
+            if known is None or status == REBUILT:
+                return REBUILT, None
+            if known == stamp:
+                return SAME, None
+            if known == before:
+                return status, delta
+            return REBUILT, None
+        stamp, current = self.current(path)
+        self.tracked[(consumer, path)] = stamp
+        if known is None:
+            return REBUILT, None
+        if known == stamp:
+            return SAME, None
+        snapshot = self.snapshot(path, known)
+        if not snapshot.is_file():
+            return REBUILT, None
+        for _ in merging.subtract(merging.read_lines(snapshot), merging.read_lines(current)):
+            logs.logger.info(f'Lines were removed from `{path}`, rebuilding `{consumer}`')
+            return REBUILT, None
+        delta = self.path(path, f'delta-{digest(consumer)}')
+        count = merging.write_lines(merging.subtract(merging.read_lines(current), merging.read_lines(snapshot)), delta)
+        if not count:
+            return SAME, None
+        logs.logger.info(f'{count} lines were added to `{path}` since `{consumer}` was built')
+        return ADDED, delta
+
+    def produced(self, destination, status, delta=None, before=None):
+        with self.lock:
+            self.outputs[pathlib.Path(destination).absolute()] = (status, delta, before)
+
+    def forget(self, consumer, *paths):
+        # NOTE: The files were rewritten by the consumer itself, it is up to date with their new versions.
+        consumer = pathlib.Path(consumer).absolute()
+        with self.lock:
+            for path in paths:
+                path = pathlib.Path(path).absolute()
+                self.changed.pop((consumer, path), None)
+                self.tracked[(consumer, path)] = self.current(path)[0] if path.is_file() else None
+
+    def commit(self):
+        for (consumer, path), stamp in self.tracked.items():
+            inputs = self.consumers.setdefault(str(consumer), dict())
+            if stamp is None:
+                inputs.pop(str(path), None)
+            else:
+                inputs[str(path)] = stamp
+        state = self.directory / STATE
+        temp_state = state.with_name(STATE + '.partial')
+        temp_state.write_text(json.dumps({'consumers': self.consumers, 'merges': self.merges}))
+        os.replace(temp_state, state)
+        # NOTE: Snapshots no consumer refers to any more and the deltas of this run are removed.
+        kept = set(self.snapshot(path, stamp).name for inputs in self.consumers.values() for path, stamp in inputs.items())
+        for path in self.directory.glob('*.txt'):
+            if path.name not in kept:
+                path.unlink()
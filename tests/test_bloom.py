@@ -0,0 +1,64 @@
+import pathlib
+
+from wordz import (
+    base,
+    bloom,
+    merging,
+)
+
+
+def test_bloom_filter(tmp_dir):
+    history_filter = bloom.BloomFilter(1000, 0.01)
+    words = [f'password{idx}'.encode() for idx in range(1000)]
+    history_filter.update(words)
+    assert all(word in history_filter for word in words)
+    false_positives = sum(f'candidate{idx}'.encode() in history_filter for idx in range(10000))
+    assert false_positives < 300
+
+    path = pathlib.Path(tmp_dir, 'history.txt.bloom')
+    history_filter.stamp = (1, 2)
+    history_filter.save(path)
+    loaded = bloom.BloomFilter.load(path)
+    assert loaded.stamp == (1, 2)
+    assert loaded.count == 1000
+    assert all(word in loaded for word in words)
+    assert not loaded.saturated
+    loaded.add(b'one more')
+    assert loaded.saturated
+
+
+def test_search(tmp_dir):
+    path = pathlib.Path(tmp_dir, 'history.txt')
+    first = [f'word{idx:03d}'.encode() for idx in range(0, 200, 2)]
+    second = [f'word{idx:03d}'.encode() for idx in range(1, 200, 4)]
+    path.write_bytes(b'\n'.join(first) + b'\n' + b'\n'.join(second) + b'\n')
+    middle = len(b'\n'.join(first)) + 1
+    with open(path, 'rb') as fil:
+        for word in first + second + [b'a', b'word003', b'zzz']:
+            assert merging.search(fil, word, 0, middle) == (word in first)
+            assert merging.search(fil, word, middle, path.stat().st_size) == (word in second)
+    assert list(merging.read_range(path, middle, path.stat().st_size)) == second
+
+
+def test_bloom_same_as_exact(tmp_path, monkeypatch):
+    outputs = dict()
+    for mode in ('exact', 'bloom', 'lookups'):
+        if mode == 'lookups':
+            # NOTE: Every possible hit is looked up instead of reading the runs of the list.
+            monkeypatch.setattr(bloom, 'LOOKUP_BYTES', 0)
+        temp_dir = tmp_path / mode
+        temp_dir.mkdir()
+        history = temp_dir / 'history.txt'
+        history.write_bytes(b'alpha\nbravo\ncharlie\n')
+        combinator = base.Combinator(temp_dir, temp_dir, temp_dir, 0, 1, '10%', 'hashcat', 'combinator.bin', 'rli2.bin', engine='native', bloom=None if mode == 'exact' else 0.01)
+        outputs[mode] = list()
+        for step in range(bloom.MAX_RUNS + 3):
+            wordlist = temp_dir / f'words-{step}.txt'
+            wordlist.write_bytes(b''.join(f'word{idx}\n'.encode() for idx in range(step, step * 3)) + b'bravo\n')
+            destination = temp_dir / 'out.txt'
+            combinator.merge(destination, [wordlist], compare=history)
+            outputs[mode].append(destination.read_bytes())
+        outputs[mode].append(sorted(history.read_bytes().split()))
+        combinator.close()
+    assert outputs['bloom'] == outputs['exact']
+    assert outputs['lookups'] == outputs['exact']
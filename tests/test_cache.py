@@ -0,0 +1,54 @@
+import json
+import pathlib
+
+from wordz import (
+    base,
+    cache,
+)
+
+
+def test_cache_key_follows_contents(tmp_dir):
+    artifacts = cache.ArtifactCache(pathlib.Path(tmp_dir, 'cache'), 1024)
+    source = pathlib.Path(tmp_dir, 'keywords.txt')
+    source.write_text('acapulco\n')
+    key = artifacts.key('rule', source)
+    assert artifacts.key('rule', source) == key
+    source.write_text('acapulco\ncerveja\n')
+    assert artifacts.key('rule', source) != key
+
+
+def test_cache_fetch_and_evict(tmp_dir):
+    artifacts = cache.ArtifactCache(pathlib.Path(tmp_dir, 'cache'), 10)
+    first = pathlib.Path(tmp_dir, 'first.txt')
+    first.write_text('123456\n')
+    second = pathlib.Path(tmp_dir, 'second.txt')
+    second.write_text('abcdef\n')
+    destination = pathlib.Path(tmp_dir, 'destination.txt')
+
+    assert not artifacts.fetch('first', destination)
+    artifacts.store('first', first)
+    assert artifacts.fetch('first', destination)
+    assert destination.read_text() == '123456\n'
+
+    artifacts.store('second', second)
+    assert not artifacts.fetch('first', destination)
+    assert artifacts.stats()['entries'] == 1
+
+    reloaded = cache.ArtifactCache(pathlib.Path(tmp_dir, 'cache'), 10)
+    assert reloaded.fetch('second', destination)
+    reloaded.prune(0)
+    assert reloaded.stats()['size'] == 0
+
+
+def test_shared_cache(tmp_dir):
+    # NOTE: Jobs of `wordz serve` build in the same temporary directory, none of them may drop the entries of another.
+    jobs = [base.Combinator(tmp_dir, tmp_dir, tmp_dir, 0, 1, '10%', 'hashcat', 'combinator.bin', 'rli2.bin', engine='native', cache_size='1M') for _ in range(2)]
+    assert jobs[0].cache is jobs[1].cache
+    for idx, job in enumerate(jobs):
+        source = pathlib.Path(tmp_dir, f'source-{idx}.txt')
+        source.write_text(f'{idx}\n')
+        job.cache.store(f'key-{idx}', source)
+    manifest = json.loads((base.Combinator.cache_dir(tmp_dir) / cache.ArtifactCache.MANIFEST).read_text())
+    assert sorted(manifest['entries']) == ['key-0', 'key-1']
+    for job in jobs:
+        job.close()
@@ -3,6 +3,7 @@ import shlex
 import subprocess
 import shutil
 import tempfile
+import threading
 
 import pytest
 
@@ -38,6 +39,7 @@ def test_temp_doesnt_exist(cwd):
     with pytest.raises(Exception) as exc_info:
         cli.run(parser, args)
     assert exc_info.match('Failed on startup')
+    assert not [thread for thread in threading.enumerate() if thread.name == 'wordz-runner']
 
 
 def test_import_path_exceptions(cwd):
@@ -65,3 +67,14 @@ def test_quiet(cwd, tmp_dir, out_dir, caplog):
     parser = cli.get_parser()
     cli.run(parser, args)
     assert caplog.text == ''
+
+
+def test_batch(cwd, tmp_dir, out_dir, capsys):
+    batch = pathlib.Path(tmp_dir, 'batch.txt')
+    batch.write_text(f'# Targets\n{cwd}/data/classes.py::Passwords\n-p {cwd}/data/classes.py::WorkflowB --min-length 6\n')
+    args = shlex.split(f'-b {cwd} -t {tmp_dir} -o {out_dir} --plan --batch {batch}')
+    parser = cli.get_parser()
+    cli.run(parser, args)
+    out = capsys.readouterr().out
+    assert 'Plan for Passwords' in out
+    assert 'Plan for WorkflowB' in out
@@ -22,3 +22,20 @@ def test_workflow(cwd, tmp_dir, out_dir):
 
     with open(tmp_dir + '/passwords-all.txt') as fil:
         assert fil.readlines() == ['!ACAPULCO!\n', '!acapulco!\n', '!ACAPULCO#\n', '!acapulco#\n', '!ACAPULCO@\n', '!acapulco@\n', '!CERVEJA!\n', '!cerveja!\n', '!CERVEJA#\n', '!cerveja#\n', '!CERVEJA@\n', '!cerveja@\n', '#ACAPULCO!\n', '#acapulco!\n', '#ACAPULCO#\n', '#acapulco#\n', '#ACAPULCO@\n', '#acapulco@\n', '#CERVEJA!\n', '#cerveja!\n', '#CERVEJA#\n', '#cerveja#\n', '#CERVEJA@\n', '#cerveja@\n', '$c$pulc)!\n', '$c$pulc)!!\n', '$c$pulc)#\n', '$c$pulc)##\n', '$c$pulc)@\n', '$c$pulc)@@\n', '2022ACAPULCO\n', '2022acapulco\n', '2022CERVEJA\n', '2022cerveja\n', '@ACAPULCO!\n', '@acapulco!\n', '@ACAPULCO#\n', '@acapulco#\n', '@ACAPULCO@\n', '@acapulco@\n', '@CERVEJA!\n', '@cerveja!\n', '@CERVEJA#\n', '@cerveja#\n', '@CERVEJA@\n', '@cerveja@\n', 'ACAPULCO\n', 'acapulco\n', 'acapulco!\n', 'ACAPULCO!!\n', 'acapulco!!\n', 'acapulco#\n', 'ACAPULCO##\n', 'acapulco##\n', 'ACAPULCO2020\n', 'acapulco2020\n', 'ACAPULCO2021\n', 'acapulco2021\n', 'ACAPULCO2022\n', 'acapulco2022\n', 'acapulco@\n', 'ACAPULCO@@\n', 'acapulco@@\n', 'c#rv#j$!\n', 'c#rv#j$!!\n', 'c#rv#j$#\n', 'c#rv#j$##\n', 'c#rv#j$@\n', 'c#rv#j$@@\n', 'CERVEJA\n', 'cerveja\n', 'cerveja!\n', 'CERVEJA!!\n', 'cerveja!!\n', 'cerveja#\n', 'CERVEJA##\n', 'cerveja##\n', 'CERVEJA2020\n', 'cerveja2020\n', 'CERVEJA2021\n', 'cerveja2021\n', 'CERVEJA2022\n', 'cerveja2022\n', 'cerveja@\n', 'CERVEJA@@\n', 'cerveja@@\n']
+
+
+def test_streaming_merge(cwd, tmp_path):
+    outputs = dict()
+    for mode in ('default', 'streaming'):
+        tmp_dir = tmp_path / mode / 'tmp'
+        out_dir = tmp_path / mode / 'out'
+        tmp_dir.mkdir(parents=True)
+        for workflow in ('WorkflowA', 'WorkflowB'):
+            args = shlex.split(f'-b {cwd} -p {cwd}/data/classes.py::{workflow} -t {tmp_dir} -o {out_dir}')
+            if mode == 'streaming':
+                args.append('--streaming')
+            parser = cli.get_parser()
+            cli.run(parser, args)
+        outputs[mode] = [(out_dir / name).read_text() for name in ('workflow-a.txt', 'workflow-b.txt')]
+        outputs[mode].append((tmp_dir / 'passwords-all.txt').read_text())
+    assert outputs['streaming'] == outputs['default']
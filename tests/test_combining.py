@@ -0,0 +1,57 @@
+import pathlib
+
+from wordz import (
+    base,
+    combining,
+    compression,
+)
+
+
+def test_combine():
+    chunks = combining.combine(iter([b'a', b'b']), [b'1', b'2', b'3'], batch_size=2)
+    assert b''.join(chunks) == b'a1\na2\na3\nb1\nb2\nb3\n'
+
+
+def test_combine_three():
+    chunks = combining.combine_three(iter([b'!']), [b'x', b'y'], [b'1', b'2'])
+    assert b''.join(chunks) == b'!x1\n!x2\n!y1\n!y2\n'
+
+
+def test_write_combined(tmp_dir):
+    left = pathlib.Path(tmp_dir, 'left.txt')
+    left.write_bytes(b'acapulco\ncerveja\n')
+    right = pathlib.Path(tmp_dir, 'right.txt')
+    right.write_bytes(b'!\n123\n')
+    destination = pathlib.Path(tmp_dir, 'combined.txt')
+    combining.write_combined([right, left, right], destination)
+    lines = destination.read_bytes().splitlines()
+    assert lines[:3] == [b'!acapulco!', b'!acapulco123', b'!cerveja!']
+    assert len(lines) == 8
+    assert combining.estimate(right, left, right) == (8, destination.stat().st_size)
+
+
+def test_stats(tmp_dir):
+    plain = pathlib.Path(tmp_dir, 'plain.txt')
+    plain.write_bytes(b'acapulco\n\ncerveja')
+    assert combining.stats(plain) == (3, 15)
+    packed = pathlib.Path(tmp_dir, 'plain.txt.gz')
+    with compression.open_write(packed) as fil:
+        fil.write(b'acapulco\n\ncerveja\n')
+    assert combining.stats(packed) == (3, 15)
+
+
+def test_check_space_counts_once(tmp_dir, monkeypatch):
+    left = pathlib.Path(tmp_dir, 'left.txt')
+    left.write_bytes(b'acapulco\ncerveja\n')
+    right = pathlib.Path(tmp_dir, 'right.txt')
+    right.write_bytes(b'!\n123\n')
+    combinator = base.Combinator(tmp_dir, tmp_dir, tmp_dir, 0, 1, '10%', 'hashcat', 'combinator.bin', 'rli2.bin', engine='native')
+    counted = list()
+    stats = combining.stats
+    monkeypatch.setattr(combining, 'stats', lambda path: counted.append(path) or stats(path))
+    first = combinator.combine_paths(right, left)
+    second = combinator.combine_paths(first, right)
+    assert counted == [right, left]
+    assert combinator.estimate(first, right) == (8, second.stat().st_size)
+    assert counted == [right, left]
+    combinator.close()
@@ -0,0 +1,57 @@
+import pathlib
+import shutil
+
+import pytest
+
+from wordz import (
+    base,
+    compression,
+    merging,
+)
+
+
+@pytest.mark.parametrize('name', ['gzip', 'zstd', 'lz4'])
+def test_round_trip(tmp_dir, name):
+    codec = compression.get(name)
+    if name != 'gzip' and not shutil.which(codec.binary):
+        pytest.skip(f'`{codec.binary}` is not available')
+    path = pathlib.Path(tmp_dir, 'words' + codec.ext)
+    assert merging.write_lines(iter([b'abc', b'def']), path) == 2
+    merging.write_lines(iter([b'ghi']), path, mode='ab')
+    assert compression.detect(path) is codec
+    assert list(merging.read_lines(path)) == [b'abc', b'def', b'ghi']
+
+
+def test_detect(tmp_dir):
+    path = pathlib.Path(tmp_dir, 'plain.gz')
+    path.write_bytes(b'abc\n')
+    assert compression.detect(path) is None
+    assert compression.from_extension(path).name == 'gzip'
+    assert compression.stem(pathlib.Path(tmp_dir, 'keywords.txt.zst')) == 'keywords'
+    with pytest.raises(Exception):
+        compression.get('bzip2')
+
+
+def test_explicit_codec(tmp_dir):
+    path = pathlib.Path(tmp_dir, 'words.txt')
+    merging.write_lines(iter([b'abc']), path, codec=compression.get('gzip'))
+    assert compression.detect(path).name == 'gzip'
+    assert list(merging.read_lines(path)) == [b'abc']
+
+
+def test_shell_engine_rejects_compressed(tmp_dir, monkeypatch):
+    monkeypatch.setattr(base, 'which', lambda name: f'/usr/bin/{name}')
+    combinator = base.Combinator(tmp_dir, tmp_dir, tmp_dir, 0, 1, '10%', 'hashcat', 'combinator.bin', 'rli2.bin')
+    plain = pathlib.Path(tmp_dir, 'plain.txt')
+    plain.write_bytes(b'abc\n')
+    compressed = pathlib.Path(tmp_dir, 'words.txt.gz')
+    merging.write_lines(iter([b'def']), compressed)
+    output = pathlib.Path(tmp_dir, 'output.txt')
+    with pytest.raises(Exception, match='Compressed wordlist'):
+        combinator.sort(compressed)
+    with pytest.raises(Exception, match='Compressed wordlist'):
+        combinator.sort(pathlib.Path(tmp_dir, 'w*'), output)
+    with pytest.raises(Exception, match='Compressed wordlist'):
+        combinator.compare(plain, compressed, output)
+    assert not output.exists()
+    combinator.close()
@@ -0,0 +1,43 @@
+import pathlib
+
+import pytest
+
+from wordz import (
+    filters,
+    merging,
+    streams,
+)
+
+
+def test_policy():
+    policy = filters.Policy(classes='d', min_classes=2, deny=['^pass', r'\d{4}$'])
+    words = [b'abc1', b'abcd', b'Abc1', b'password1', b'abcd2024', b'x1']
+    assert list(policy.apply(words, batch_size=2)) == [b'abc1', b'Abc1', b'x1']
+    assert policy.counts == {'read': 6, 'passed': 3, 'normalized': 0, 'classes': 1, 'deny': 2}
+    assert filters.describe(policy.counts) == 'read 6, passed 3, dropped by classes 1, deny 2'
+    with pytest.raises(Exception):
+        filters.Policy(classes='x')
+    with pytest.raises(Exception):
+        filters.Policy(normalize=['nfd'])
+
+
+def test_merge_normalized(tmp_dir):
+    first = pathlib.Path(tmp_dir, 'first.txt')
+    first.write_bytes('café\ncerveja\r\n'.encode('utf8'))
+    second = pathlib.Path(tmp_dir, 'second.txt')
+    second.write_bytes('cafe\u0301\ncerveja  \nzebra\n'.encode('utf8'))
+    policy = filters.Policy(normalize=filters.NORMALIZATIONS)
+    lines = merging.merge_lines([first, second], tmp_dir, policy=policy)
+    assert list(lines) == ['café'.encode('utf8'), b'cerveja', b'zebra']
+    assert policy.counts['normalized'] == 3
+
+
+def test_merge_lengths(tmp_dir):
+    # NOTE: Length limits apply to the normalized words, the same way with and without a policy.
+    path = pathlib.Path(tmp_dir, 'words.txt')
+    path.write_bytes(b'abc  \nabcd\nabcde\nx1\nxyz123\n')
+    policy = filters.Policy(normalize=[filters.NORMALIZE_SPACE])
+    expected = [b'abc', b'abcd', b'abcde']
+    assert list(merging.merge_lines([path], tmp_dir, 3, maximum=5, policy=policy)) == expected
+    assert list(streams.merge(path, length=3, maximum=5, temp_dir=tmp_dir, policy=filters.Policy(normalize=[filters.NORMALIZE_SPACE]))) == expected
+    assert list(merging.merge_lines([path], tmp_dir, 3, maximum=5)) == [b'abc  ', b'abcd', b'abcde']
@@ -0,0 +1,42 @@
+import pathlib
+import shlex
+import shutil
+
+from wordz import (
+    cli,
+    journal,
+)
+
+
+def test_journal(tmp_dir):
+    path = pathlib.Path(tmp_dir, journal.FILENAME)
+    source = pathlib.Path(tmp_dir, 'source.txt')
+    source.write_bytes(b'abc\n')
+    output = pathlib.Path(tmp_dir, 'output.txt')
+    output.write_bytes(b'abc\nabc1\n')
+    jobs = journal.Journal(path)
+    key = jobs.key('rule', source)
+    assert not jobs.verify(key, output)
+    jobs.record(key, output)
+    assert jobs.verify(key, output)
+    with open(path, 'a') as fil:
+        fil.write('{"key": "trunc')
+    jobs = journal.Journal(path)
+    assert len(jobs) == 1
+    assert jobs.verify(key, output)
+    output.write_bytes(b'abc\n')
+    assert not jobs.verify(key, output)
+    source.write_bytes(b'abcd\n')
+    assert jobs.key('rule', source) != key
+
+
+def test_resume_changed_inputs(cwd, tmp_path):
+    shutil.copytree(cwd / 'data', tmp_path / 'data')
+    (tmp_path / 'tmp').mkdir()
+    args = shlex.split(f'-q -b {tmp_path} -p {tmp_path}/data/classes.py::Passwords -t {tmp_path}/tmp -o {tmp_path}/out --engine native')
+    cli.run(cli.get_parser(), args)
+    assert b'zebra' not in (tmp_path / 'out' / 'passwords.txt').read_bytes()
+    with open(tmp_path / 'data' / 'keywords.txt', 'a') as fil:
+        fil.write('\nzebra\n')
+    cli.run(cli.get_parser(), args + ['--resume'])
+    assert b'zebra' in (tmp_path / 'out' / 'passwords.txt').read_bytes()
@@ -0,0 +1,39 @@
+import pathlib
+
+from wordz import merging
+
+
+def test_kway_merge():
+    merged = merging.kway_merge([iter([b'a', b'c', b'e']), iter([b'b', b'c', b'f']), iter([])])
+    assert list(merged) == [b'a', b'b', b'c', b'e', b'f']
+
+
+def test_external_sort(tmp_dir):
+    lines = iter([b'delta', b'alpha', b'charlie', b'alpha', b'bravo', b'Zulu'])
+    assert list(merging.external_sort(lines, tmp_dir, chunk_lines=2)) == [b'Zulu', b'alpha', b'bravo', b'charlie', b'delta']
+    assert list(pathlib.Path(tmp_dir).iterdir()) == []
+
+
+def test_merge_files(tmp_dir):
+    presorted = pathlib.Path(tmp_dir, 'sorted.txt')
+    presorted.write_bytes(b'abc\nacapulco\ncerveja\n')
+    unsorted = pathlib.Path(tmp_dir, 'unsorted.txt')
+    unsorted.write_bytes(b'zebra\ncerveja\n!x\nACAPULCO\n')
+    assert merging.is_sorted(presorted)
+    assert not merging.is_sorted(unsorted)
+    destination = pathlib.Path(tmp_dir, 'merged.txt')
+    assert merging.merge_files([presorted, unsorted], destination, tmp_dir, length=4) == 4
+    assert destination.read_bytes() == b'ACAPULCO\nacapulco\ncerveja\nzebra\n'
+
+
+def test_subtract():
+    assert list(merging.subtract(iter([b'a', b'b', b'd', b'e']), iter([b'b', b'c', b'e']))) == [b'a', b'd']
+
+
+def test_subtract_and_update(tmp_dir):
+    destination = pathlib.Path(tmp_dir, 'new.txt')
+    history = pathlib.Path(tmp_dir, 'history.txt')
+    count = merging.subtract_and_update(iter([b'a', b'c', b'e', b'z']), iter([b'b', b'c', b'd', b'e']), destination, history)
+    assert count == 2
+    assert destination.read_bytes() == b'a\nz\n'
+    assert history.read_bytes() == b'a\nb\nc\nd\ne\nz\n'
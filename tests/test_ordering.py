@@ -0,0 +1,21 @@
+import pathlib
+
+from wordz import ordering
+
+
+def test_markov_model():
+    model = ordering.train(iter([b'password', b'password1', b'passw0rd']))
+    assert model.score(b'password') > model.score(b'xqzvkjwy')
+
+
+def test_annotate():
+    annotated = ordering.annotate(iter([b'a', b'b', b'c']), [iter([b'a', b'c']), iter([b'b', b'c'])], [1.0, 0.5])
+    assert list(annotated) == [(b'a', 1.0), (b'b', 0.5), (b'c', 1.0)]
+
+
+def test_write_ordered(tmp_dir):
+    destination = pathlib.Path(tmp_dir, 'ordered.txt')
+    lines = iter([b'alpha', b'bravo', b'charlie'])
+    sources = [iter([b'charlie']), iter([b'alpha', b'bravo'])]
+    assert ordering.write_ordered(lines, sources, [1.0, 0.25], destination, tmp_dir) == 3
+    assert destination.read_bytes() == b'charlie\nalpha\nbravo\n'
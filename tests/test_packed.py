@@ -0,0 +1,31 @@
+import pathlib
+
+import pytest
+
+from wordz import packed
+
+
+def test_pack_roundtrip(tmp_dir):
+    words = sorted(f'word{idx:05d}'.encode() for idx in range(1000)) + [b'zebra']
+    destination = pathlib.Path(tmp_dir, 'words.wpk')
+    assert packed.pack(iter(words), destination, block_size=16) == len(words)
+    assert packed.is_packed(destination)
+    with packed.PackedWordlist(destination) as wordlist:
+        assert len(wordlist) == len(words)
+        assert list(wordlist) == words
+        assert b'word00500' in wordlist
+        assert b'word0050' not in wordlist
+        assert b'aaa' not in wordlist
+        assert b'zzz' not in wordlist
+        assert list(wordlist.range(b'word00998', b'zebra')) == [b'word00998', b'word00999']
+        wordlist.export(pathlib.Path(tmp_dir, 'words.txt'))
+    assert pathlib.Path(tmp_dir, 'words.txt').read_bytes() == b'\n'.join(words) + b'\n'
+    assert destination.stat().st_size < len(b'\n'.join(words))
+
+
+def test_pack_unsorted(tmp_dir):
+    destination = pathlib.Path(tmp_dir, 'words.wpk')
+    with pytest.raises(Exception) as exc_info:
+        packed.pack(iter([b'b', b'a']), destination)
+    assert exc_info.match('must be sorted')
+    assert not destination.exists()
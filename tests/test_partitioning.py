@@ -0,0 +1,29 @@
+import json
+import pathlib
+
+from wordz import partitioning
+
+
+def test_charset():
+    assert partitioning.charset(b'abc') == 'l'
+    assert partitioning.charset(b'Abc123!') == 'luds'
+    assert partitioning.charset(b'2024') == 'd'
+
+
+def test_partition(tmp_dir):
+    source = pathlib.Path(tmp_dir, 'words.txt')
+    source.write_bytes(b'ABC!\nabc1\nabcd\nzzzz9\n')
+    manifest = partitioning.partition(source, ('length', 'charset'))
+    directory = pathlib.Path(tmp_dir, 'words.parts')
+    assert manifest['total'] == 4
+    assert [(part['path'], part['count']) for part in manifest['partitions']] == [('04-l.txt', 1), ('04-ld.txt', 1), ('04-us.txt', 1), ('05-ld.txt', 1)]
+    assert (directory / '04-ld.txt').read_bytes() == b'abc1\n'
+    assert json.loads((directory / 'manifest.json').read_text()) == manifest
+
+
+def test_feed(tmp_dir):
+    destination = pathlib.Path(tmp_dir, 'words.txt')
+    partitioner = partitioning.Partitioner(destination, ('length',), flush_lines=1)
+    assert list(partitioner.feed(iter([b'ab', b'abc', b'xy']))) == [b'ab', b'abc', b'xy']
+    partitioner.close()
+    assert pathlib.Path(tmp_dir, 'words.parts', '02.txt').read_bytes() == b'ab\nxy\n'
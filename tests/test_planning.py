@@ -0,0 +1,60 @@
+import json
+import pathlib
+import shutil
+
+from wordz import (
+    Combinator,
+    planning,
+)
+
+
+class Small(Combinator):
+
+    wordlists = (
+        'data/keywords.txt',
+    )
+    rules = (
+        'data/hashcat.rule',
+    )
+
+    def process(self):
+        self.merge(
+            self.output('small.txt'),
+            (
+                self.right(self.temp('hashcat-data-keywords.txt'), self.base('data/bits.txt')),
+                self.both(self.temp('hashcat-data-keywords.txt'), self.base('data/bits.txt')),
+            ),
+        )
+
+
+def test_plan(cwd, tmp_dir, out_dir, capsys):
+    base_dir = pathlib.Path(tmp_dir, 'base')
+    shutil.copytree(cwd / 'data', base_dir / 'data')
+    temp_dir = pathlib.Path(tmp_dir, 'tmp')
+    temp_dir.mkdir()
+    combinator = planning.planned(Small)(base_dir, temp_dir, out_dir, 4, 1, '10%', 'hashcat', 'combinator.bin', 'rli2.bin')
+    combinator.run()
+    kinds = [step.kind for step in combinator.plan]
+    assert kinds == ['rule', 'combine', 'combine', 'combine', 'merge']
+    keywords = sum(1 for _ in open(base_dir / 'data/keywords.txt'))
+    bits = sum(1 for _ in open(base_dir / 'data/bits.txt'))
+    rules = sum(1 for line in open(base_dir / 'data/hashcat.rule') if line.strip() and not line.startswith('#'))
+    assert combinator.plan[0].lines == keywords * rules
+    assert combinator.plan[1].lines == keywords * rules * bits
+    assert combinator.plan[-1].lines == keywords * rules * bits * (1 + bits)
+    assert combinator.plan[-1].inputs == ['#2', '#4']
+    assert list(temp_dir.iterdir()) == []
+    assert list(pathlib.Path(out_dir).iterdir()) == []
+    assert 'Plan for Small (5 steps)' in capsys.readouterr().out
+
+
+def test_calibrate(tmp_dir):
+    report = pathlib.Path(tmp_dir, 'bench.json')
+    report.write_text(json.dumps({'results': [
+        {'operation': 'sort', 'scale': 10, 'lines_per_second': 5.0},
+        {'operation': 'sort', 'scale': 1000, 'lines_per_second': 50.0},
+        {'operation': 'right', 'scale': 1000, 'lines_per_second': None},
+    ]}))
+    throughput = planning.calibrate(report)
+    assert throughput['sort'] == 50.0
+    assert throughput['combine'] == planning.THROUGHPUT['combine']
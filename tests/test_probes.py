@@ -0,0 +1,29 @@
+import os
+import pathlib
+
+from wordz import probes
+
+
+def test_which(tmp_dir, monkeypatch):
+    binary = pathlib.Path(tmp_dir, 'bin', 'fakecat')
+    binary.parent.mkdir()
+    binary.write_text('#!/bin/sh\n')
+    binary.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{binary.parent}{os.pathsep}{os.environ["PATH"]}')
+    cache = pathlib.Path(tmp_dir, 'probes.json')
+    assert probes.Probes(cache).which('fakecat') == str(binary)
+    assert probes.Probes(cache).which('notacat') is None
+    entries = probes.Probes(cache)
+    entry = list(entries.entries.values())[0]
+    assert entry['path'] == str(binary)
+    assert entries.valid(entry)
+    binary.write_text('#!/bin/sh\nexit 0\n')
+    assert not entries.valid(entry)
+    assert entries.which('fakecat') == str(binary)
+
+
+def test_comm(tmp_dir):
+    cache = pathlib.Path(tmp_dir, 'probes.json')
+    value = probes.Probes(cache).comm()
+    assert value in ('comm', 'comm --nocheck-order')
+    assert probes.Probes(cache).comm() == value
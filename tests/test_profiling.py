@@ -0,0 +1,71 @@
+import csv
+import json
+import pathlib
+import sys
+import threading
+
+from wordz import (
+    profiling,
+    runner,
+)
+
+
+def test_profiler_report(tmp_dir):
+    source = pathlib.Path(tmp_dir, 'source.txt')
+    source.write_text('acapulco\ncerveja\n')
+    destination = pathlib.Path(tmp_dir, 'destination.txt')
+    profiler = profiling.Profiler(count_lines=True)
+    jobs = runner.Runner(1)
+    with profiler.step('sort', destination, [source], [destination]):
+        jobs.run(f'sort {source} {source} > {destination}', usage=profiler.collector())
+    jobs.close()
+    record, = profiler.steps
+    assert record['bytes_in'] == 17
+    assert record['bytes_out'] == 34
+    assert record['lines_in'] == 2
+    assert record['lines_out'] == 4
+    assert record['wall_time'] > 0
+    assert record['cpu_time'] >= 0
+    assert record['children_max_rss'] > 0
+
+    profiler.report(pathlib.Path(tmp_dir, 'report.json'), cls='Test')
+    report = json.loads(pathlib.Path(tmp_dir, 'report.json').read_text())
+    assert report['cls'] == 'Test'
+    assert report['summary']['sort']['count'] == 1
+
+    profiler.report(pathlib.Path(tmp_dir, 'report.csv'))
+    with open(pathlib.Path(tmp_dir, 'report.csv')) as fil:
+        rows = list(csv.DictReader(fil))
+    assert rows[0]['step'] == 'sort'
+    assert rows[0]['lines_out'] == '4'
+
+
+def test_profiler_concurrent(tmp_dir):
+    source = pathlib.Path(tmp_dir, 'source.txt')
+    source.write_text('acapulco\ncerveja\n')
+    profiler = profiling.Profiler()
+    jobs = runner.Runner(2)
+    started = threading.Event()
+    done = threading.Event()
+    size = 256 * 1024 * 1024
+
+    def other():
+        with profiler.step('sort', 'other'):
+            started.set()
+            jobs.run(f'{sys.executable} -c "bytearray({size})"', usage=profiler.collector())
+            done.wait()
+
+    with profiler.step('merge', 'first', [source]):
+        thread = threading.Thread(target=other)
+        thread.start()
+        started.wait()
+        jobs.run('true', usage=profiler.collector())
+        done.set()
+        thread.join()
+    jobs.close()
+    other, first = profiler.steps
+    # NOTE: Each step only gets the usage of the commands it ran.
+    assert other['children_max_rss'] >= size
+    assert 0 < first['children_max_rss'] < size
+    assert first['bytes_in'] == 17
+    assert first['lines_in'] is None
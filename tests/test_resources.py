@@ -0,0 +1,37 @@
+import threading
+
+from wordz import resources
+
+
+def test_parse_memory():
+    assert resources.parse_memory('50%', total=1000) == 500
+    assert resources.parse_memory('2M') == 2 * 1024 * 1024
+
+
+def test_split_budget():
+    planner = resources.Planner(4, '4G')
+    with planner.expect(2):
+        with planner.allocate('first') as first:
+            assert (first.cores, first.memory) == (2, 2 * 1024 ** 3)
+            with planner.allocate('second') as second:
+                assert (second.cores, second.memory) == (2, 2 * 1024 ** 3)
+    assert (planner.free_cores, planner.free_memory) == (4, 4 * 1024 ** 3)
+    with planner.allocate('alone') as alone:
+        assert alone.sort_options == '--parallel=4 -S 4194304K'
+
+
+def test_queue():
+    planner = resources.Planner(1, '1G')
+    started = threading.Event()
+    allocation = planner.reserve('first')
+
+    def second():
+        planner.release(planner.reserve('second'))
+        started.set()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    assert not started.wait(0.1)
+    planner.release(allocation)
+    assert started.wait(1)
+    thread.join()
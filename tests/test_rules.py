@@ -0,0 +1,45 @@
+import pytest
+
+from wordz import rules
+
+
+def test_rule_functions():
+    cases = {
+        b':': b'Acapulco',
+        b'l': b'acapulco',
+        b'u': b'ACAPULCO',
+        b'c': b'Acapulco',
+        b'C': b'aCAPULCO',
+        b't': b'aCAPULCO',
+        b'T1': b'ACapulco',
+        b'r': b'oclupacA',
+        b'd': b'AcapulcoAcapulco',
+        b'$1 $2': b'Acapulco12',
+        b'^!': b'!Acapulco',
+        b'sa4': b'Ac4pulco',
+        b'[]': b'capulc',
+        b'D0': b'capulco',
+        b'x13': b'cap',
+        b'i4-': b'Acap-ulco',
+        b'o0a': b'acapulco',
+        b"'3": b'Aca',
+        b'@a': b'Acpulco',
+        b'z2': b'AAAcapulco',
+        b'DZ': b'Acapulco',
+    }
+    for line, expected in cases.items():
+        assert rules.compile_rule(line)(b'Acapulco') == expected
+
+
+def test_rule_file(cwd):
+    compiled = rules.load(cwd / 'data/hax0r.rule')
+    words = rules.read_words(cwd / 'data/keywords.txt')
+    output = [word for batch in rules.mutate(words, compiled, batch_size=1) for word in batch]
+    assert sorted(output) == [b'$c$pulc)', b'acapulco', b'c#rv#j$', b'cerveja']
+
+
+def test_unsupported_rule():
+    with pytest.raises(rules.UnsupportedRule):
+        rules.compile_rule(b'>4')
+    with pytest.raises(rules.UnsupportedRule):
+        rules.compile_rule(b'$')
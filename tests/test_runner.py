@@ -0,0 +1,36 @@
+import pathlib
+import time
+
+import pytest
+
+from wordz import runner
+
+
+def test_run(tmp_dir):
+    jobs = runner.Runner(2)
+    output = pathlib.Path(tmp_dir, 'output.txt')
+    assert jobs.run(f'echo test > {output}') == 0
+    assert output.read_text() == 'test\n'
+    assert jobs.run('exit 3', check=False) == 3
+    with pytest.raises(runner.CommandError):
+        jobs.run('exit 3')
+    with pytest.raises(runner.CommandError):
+        jobs.run(f'exit 3 | cat > {output}')
+
+
+def test_run_all_fails_fast(tmp_dir):
+    jobs = runner.Runner(4)
+    marker = pathlib.Path(tmp_dir, 'marker')
+    started = time.monotonic()
+    with pytest.raises(runner.CommandError):
+        jobs.run_all([f'sleep 5 && touch {marker}', 'sleep 0.1 && exit 1'])
+    assert time.monotonic() - started < 4
+    time.sleep(0.2)
+    assert not marker.exists()
+
+
+def test_slots(tmp_dir):
+    jobs = runner.Runner(1)
+    log = pathlib.Path(tmp_dir, 'log.txt')
+    jobs.run_all([f'echo start >> {log}; sleep 0.2; echo stop >> {log}'] * 2)
+    assert log.read_text().split() == ['start', 'stop', 'start', 'stop']
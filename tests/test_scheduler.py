@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+from wordz import scheduler
+
+
+def test_dependencies_are_resolved():
+    calls = list()
+    lock = threading.Lock()
+
+    def job(name, *deps):
+        with lock:
+            calls.append(name)
+        return name + ''.join(deps)
+
+    first = scheduler.Node(job, 'a')
+    second = scheduler.Node(job, 'b')
+    joined = scheduler.Node(job, 'c', first, second)
+    results = scheduler.Scheduler(4).run([joined, 'plain', first])
+    assert results == ['cab', 'plain', 'a']
+    assert calls[-1] == 'c'
+    assert len(calls) == 3
+
+
+def test_failure_is_propagated():
+
+    def fail():
+        raise ValueError('broken')
+
+    node = scheduler.Node(str.upper, scheduler.Node(fail))
+    with pytest.raises(Exception) as exc_info:
+        scheduler.Scheduler(2).run([node])
+    assert exc_info.match('broken')
+    assert not node.done
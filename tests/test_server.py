@@ -0,0 +1,117 @@
+import pathlib
+import threading
+
+import pytest
+
+from wordz import (
+    cli,
+    server,
+)
+
+
+class Fake:
+
+    def __init__(self, name, order, base_dir='base', fail=False):
+        self.name = name
+        self.order = order
+        self.base_dir = base_dir
+        self.fail = fail
+
+    def run(self, lock=None):
+        if self.fail:
+            raise Exception('broken')
+        self.order.append(self.name)
+
+    def close(self):
+        pass
+
+
+def test_priorities():
+    order = list()
+    started = threading.Event()
+    gate = threading.Event()
+
+    def blocked():
+        started.set()
+        gate.wait()
+        return Fake('gate', order)
+
+    def factory(args):
+        if args == ['gate']:
+            return blocked
+        return lambda: Fake(args[0], order, fail=args[0] == 'bad')
+
+    jobs = server.Server(factory)
+    first = jobs.submit(['gate'])
+    started.wait()
+    low = jobs.submit(['low'], priority=-1)
+    bad = jobs.submit(['bad'])
+    high = jobs.submit(['high'], priority=10)
+    gate.set()
+    jobs.queue.put((float('inf'), 0, None))
+    jobs.threads[0].join()
+    assert order == ['gate', 'high', 'low']
+    assert [jobs.describe(job.idx)['status'] for job in (first, low, bad, high)] == [server.DONE, server.DONE, server.FAILED, server.DONE]
+    assert jobs.describe(bad.idx)['error'] == 'broken'
+
+
+def test_http(tmp_dir):
+    order = list()
+
+    def factory(args):
+        if not args:
+            raise Exception('Invalid arguments')
+        return lambda: Fake(args[0], order)
+
+    address = str(pathlib.Path(tmp_dir, 'serve.sock'))
+    httpd = server.listen(address)
+    httpd.wordz = server.Server(factory)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert pathlib.Path(address).stat().st_mode & 0o777 == 0o600
+        job = server.submit(address, ['one'], wait=True, interval=0.01)
+        assert job['status'] == server.DONE
+        assert order == ['one']
+        assert [job['id'] for job in server.request(address, '/jobs')] == [1]
+        with pytest.raises(Exception, match='Invalid arguments'):
+            server.submit(address, [])
+        with pytest.raises(Exception, match='not found'):
+            server.request(address, '/jobs/42')
+        for headers in ({'Content-Type': 'text/plain'}, {'Content-Type': 'application/json', 'Origin': 'http://example.com'}):
+            connection = server.connect(address)
+            connection.request('POST', '/jobs', b'{"args": ["two"]}', headers)
+            assert connection.getresponse().status in (403, 415)
+            connection.close()
+        assert order == ['one']
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        httpd.wordz.stop()
+
+
+def test_job_options(cwd, tmp_dir):
+    factory = cli.job_factory(cwd, tmp_dir, tmp_dir)
+    assert factory(['-p', f'{cwd}/data/classes.py::Passwords', '-o', 'out', '--engine', 'native'])
+    for args in (['-p', '/etc/passwd.py::X'], ['-p', f'{cwd}/data/classes.py::Passwords', '--bin-hashcat', 'sh'], ['-p', f'{cwd}/data/classes.py::Passwords', '--bin-h=sh'], ['-p', f'{cwd}/data/classes.py::Passwords', '-o', '../elsewhere'], ['-p', f'{cwd}/data/classes.py::Passwords', '--min-length', '1;id']):
+        with pytest.raises(Exception):
+            factory(args)
+
+
+def test_shared_lock():
+    lock = server.SharedLock()
+    with lock.shared():
+        with lock.shared():
+            pass
+    entered = threading.Event()
+
+    def setup():
+        with lock.exclusive():
+            entered.set()
+
+    with lock.shared():
+        thread = threading.Thread(target=setup)
+        thread.start()
+        assert not entered.wait(0.05)
+    thread.join()
+    assert entered.is_set()
@@ -0,0 +1,77 @@
+import os
+import pathlib
+
+import pytest
+
+from wordz import sharding
+
+
+def test_boundaries(tmp_dir):
+    path = pathlib.Path(tmp_dir, 'words.txt')
+    path.write_bytes(b''.join(bytes([byte]) * 3 + b'\n' for byte in range(ord('a'), ord('z') + 1)))
+    bounds = sharding.boundaries([path], 4)
+    assert len(bounds) == 3
+    assert bounds == sorted(bounds)
+
+
+def test_split(tmp_dir):
+    paths = [pathlib.Path(tmp_dir, f'{idx}.txt') for idx in range(3)]
+    sharding.split(iter([b'a', b'b', b'm', b'x', b'z']), [b'b', b'x'], paths)
+    assert [path.read_bytes() for path in paths] == [b'a\n', b'b\nm\n', b'x\nz\n']
+
+
+def test_merge(tmp_dir):
+    first = pathlib.Path(tmp_dir, 'first.txt')
+    first.write_bytes(b'delta\nalpha\ncharlie\nab\n')
+    second = pathlib.Path(tmp_dir, 'second.txt')
+    second.write_bytes(b'bravo\necho\nzulu\n')
+    compare = pathlib.Path(tmp_dir, 'compare.txt')
+    compare.write_bytes(b'alpha\nzulu\n')
+    destination = pathlib.Path(tmp_dir, 'merged.txt')
+    directory = pathlib.Path(tmp_dir, 'shards')
+    count = sharding.merge(destination, [first, second], directory, 3, 2, length=3, compare=compare)
+    assert count == 4
+    assert destination.read_bytes() == b'bravo\ncharlie\ndelta\necho\n'
+    assert compare.read_bytes() == b'alpha\nbravo\ncharlie\ndelta\necho\nzulu\n'
+    assert not directory.exists()
+    # NOTE: Running it again is a new run, every word is in `compare` by now.
+    assert sharding.merge(destination, [first, second], directory, 3, 2, length=3, compare=compare) == 0
+    assert destination.read_bytes() == b''
+
+
+def test_merge_other_host(tmp_dir):
+    wordlist = pathlib.Path(tmp_dir, 'words.txt')
+    wordlist.write_bytes(b'alpha\nbravo\n')
+    destination = pathlib.Path(tmp_dir, 'merged.txt')
+    directory = pathlib.Path(tmp_dir, 'shards')
+    directory.mkdir()
+    # NOTE: Every step was claimed and done by another host, which did not write the output.
+    coordinator = sharding.Coordinator(directory, 2)
+    for name in ('split', 'shard-0', 'shard-1', 'concatenate'):
+        coordinator.claim(name)
+        coordinator.done(name)
+    with pytest.raises(Exception, match='output is missing'):
+        sharding.merge(destination, [wordlist], directory, 2, 1)
+    destination.write_bytes(b'alpha\nbravo\n')
+    assert sharding.merge(destination, [wordlist], directory, 2, 1) is None
+
+
+def test_stale_and_failed_jobs(tmp_dir):
+    wordlist = pathlib.Path(tmp_dir, 'words.txt')
+    wordlist.write_bytes(b'alpha\nbravo\ncharlie\n')
+    destination = pathlib.Path(tmp_dir, 'merged.txt')
+    directory = pathlib.Path(tmp_dir, 'shards')
+    directory.mkdir()
+    # NOTE: A host crashed while holding the first shard, another one failed on the second.
+    coordinator = sharding.Coordinator(directory, 2, timeout=60)
+    coordinator.lock('shard-0').write_text('elsewhere:1\n')
+    assert not coordinator.stale('shard-0')
+    os.utime(coordinator.lock('shard-0'), (0, 0))
+    assert coordinator.stale('shard-0')
+    with pytest.raises(Exception, match='abandoned'):
+        coordinator.wait(['shard-0'], interval=0)
+    assert coordinator.claim('shard-1')
+    coordinator.fail('shard-1', 'Disk full')
+    assert sharding.merge(destination, [wordlist], directory, 2, 1) == 3
+    assert destination.read_bytes() == b'alpha\nbravo\ncharlie\n'
+    assert not directory.exists()
@@ -0,0 +1,42 @@
+import io
+import pathlib
+import sys
+
+from wordz import streams
+
+
+def test_rule_combine_merge(tmp_dir):
+    rule = pathlib.Path(tmp_dir, 'test.rule')
+    rule.write_bytes(b':\nu\n')
+    words = streams.rule(io.BytesIO(b'cerveja\nacapulco\n'), rule)
+    assert list(words) == [b'cerveja', b'acapulco', b'CERVEJA', b'ACAPULCO']
+    combined = streams.combine(iter([b'a', b'b']), iter([b'1', b'2']), [b'!'])
+    assert list(combined) == [b'a1!', b'a2!', b'b1!', b'b2!']
+    merged = streams.merge([b'zz', b'abc', b'abc'], iter([b'xyz', b'ab']), compare=[b'abc'], length=3)
+    assert list(merged) == [b'xyz']
+
+
+def test_merge_paths(tmp_dir):
+    path = pathlib.Path(tmp_dir, 'words.txt')
+    streams.write(iter([b'cerveja', b'acapulco']), path)
+    assert list(streams.merge(path, [b'bits'])) == [b'acapulco', b'bits', b'cerveja']
+
+
+def test_sinks():
+    sink = io.BytesIO()
+    assert streams.write(streams.min_length([b'a', b'abc'], 2), sink) == 1
+    assert sink.getvalue() == b'abc\n'
+    assert streams.feed(iter([b'a', b'b']), [sys.executable, '-c', 'import sys; sys.stdin.read()']) == 2
+    assert list(streams.pipe(iter([b'b', b'a']), ['sort'])) == [b'a', b'b']
+
+
+def test_rule_fallback(tmp_dir, monkeypatch):
+    rule = pathlib.Path(tmp_dir, 'test.rule')
+    rule.write_bytes(b'>4\n')
+    calls = list()
+    monkeypatch.setattr(streams, 'pipe', lambda words, args: calls.append(args) or iter(()))
+    list(streams.rule([b'cerveja'], rule))
+    list(streams.rule([b'cerveja'], rule))
+    # NOTE: Concurrent fallbacks must not share the hashcat session.
+    sessions = [arg for args in calls for arg in args if arg.startswith('--session=')]
+    assert len(set(sessions)) == 2
@@ -0,0 +1,121 @@
+import os
+import pathlib
+import shlex
+import shutil
+
+from wordz import (
+    cli,
+    tracking,
+)
+
+
+def test_changes(tmp_dir):
+    wordlist = pathlib.Path(tmp_dir, 'keywords.txt')
+    wordlist.write_bytes(b'cerveja\nacapulco\n')
+    first = pathlib.Path(tmp_dir, 'first.txt')
+    second = pathlib.Path(tmp_dir, 'second.txt')
+    directory = pathlib.Path(tmp_dir, tracking.DIRECTORY)
+    tracker = tracking.Tracker(directory, tmp_dir)
+    assert tracker.changes(wordlist, first) == (tracking.REBUILT, None)
+    assert tracker.changes(wordlist, second) == (tracking.REBUILT, None)
+    tracker.commit()
+
+    tracker = tracking.Tracker(directory, tmp_dir)
+    assert tracker.changes(wordlist, first) == (tracking.SAME, None)
+    wordlist.write_bytes(b'acapulco\ncerveja\n')
+    tracker.forget(first, wordlist)
+    assert tracker.changes(wordlist, first) == (tracking.SAME, None)
+    tracker.commit()
+
+    wordlist.write_bytes(b'cerveja\nzebra\nacapulco\nyak\n')
+    tracker = tracking.Tracker(directory, tmp_dir)
+    status, delta = tracker.changes(wordlist, first)
+    assert status == tracking.ADDED
+    assert delta.read_bytes() == b'yak\nzebra\n'
+    tracker.commit()
+    assert not delta.is_file()
+
+    # NOTE: The second consumer was not built since, it still gets the lines added before the first one was rebuilt.
+    wordlist.write_bytes(b'cerveja\nzebra\nacapulco\nyak\nant\n')
+    tracker = tracking.Tracker(directory, tmp_dir)
+    status, delta = tracker.changes(wordlist, second)
+    assert status == tracking.ADDED
+    assert delta.read_bytes() == b'ant\nyak\nzebra\n'
+    status, delta = tracker.changes(wordlist, first)
+    assert delta.read_bytes() == b'ant\n'
+    tracker.commit()
+
+    wordlist.write_bytes(b'acapulco\n')
+    os.utime(wordlist, ns=(0, 0))
+    tracker = tracking.Tracker(directory, tmp_dir)
+    assert tracker.changes(wordlist, first) == (tracking.REBUILT, None)
+
+
+def test_outputs(tmp_dir, monkeypatch):
+    output = pathlib.Path(tmp_dir, 'output.txt')
+    output.write_bytes(b'cerveja\n')
+    consumer = pathlib.Path(tmp_dir, 'consumer.txt')
+    directory = pathlib.Path(tmp_dir, tracking.DIRECTORY)
+    tracker = tracking.Tracker(directory, tmp_dir)
+    tracker.produced(output, tracking.REBUILT)
+    assert tracker.changes(output, consumer) == (tracking.REBUILT, None)
+    tracker.commit()
+
+    # NOTE: Outputs of the run are never sorted into snapshots, their delta is handed over.
+    monkeypatch.setattr(tracking.Tracker, 'sorted_copy', None)
+    before = tracking.journal.stamp(output)
+    delta = pathlib.Path(tmp_dir, 'delta.txt')
+    delta.write_bytes(b'zebra\n')
+    output.write_bytes(b'cerveja\nzebra\n')
+    tracker = tracking.Tracker(directory, tmp_dir)
+    tracker.produced(output, tracking.ADDED, delta, before)
+    assert tracker.changes(output, consumer) == (tracking.ADDED, delta)
+    tracker.commit()
+
+
+def test_merges(tmp_dir):
+    directory = pathlib.Path(tmp_dir, tracking.DIRECTORY)
+    tracker = tracking.Tracker(directory, tmp_dir)
+    tracker.merges['out.txt'] = ['a.txt', 'b.txt']
+    tracker.commit()
+    assert tracking.Tracker(directory, tmp_dir).merges == {'out.txt': ['a.txt', 'b.txt']}
+
+
+def test_shared_inputs(cwd, tmp_path):
+
+    def build(base_dir, *extra):
+        for workflow in ('Passwords', 'WorkflowA'):
+            args = shlex.split(f'-q -b {base_dir} -p {base_dir}/data/classes.py::{workflow} -t {base_dir}/tmp -o {base_dir}/out --engine native')
+            cli.run(cli.get_parser(), args + list(extra))
+        return [(base_dir / path).read_bytes() for path in ('out/passwords.txt', 'out/workflow-a.txt', 'tmp/passwords-all.txt')]
+
+    for mode in ('full', 'incremental'):
+        shutil.copytree(cwd / 'data', tmp_path / mode / 'data')
+        (tmp_path / mode / 'tmp').mkdir()
+    first = build(tmp_path / 'incremental', '--incremental')
+    for mode in ('full', 'incremental'):
+        with open(tmp_path / mode / 'data' / 'keywords.txt', 'a') as fil:
+            fil.write('\nzebra\n')
+    full = build(tmp_path / 'full')
+    passwords, workflow, history = build(tmp_path / 'incremental', '--incremental')
+    assert passwords == full[0]
+    assert history == full[2]
+    # NOTE: As with a full run in the same temporary directory, the words already in `compare` are left out.
+    assert set(workflow.split()) == set(full[1].split()) - set(first[1].split())
+    assert b'zebra' in workflow
+    assert build(tmp_path / 'incremental', '--incremental') == [passwords, b'', history]
+
+
+def test_cached_combinations(cwd, tmp_path):
+    shutil.copytree(cwd / 'data', tmp_path / 'data')
+    (tmp_path / 'tmp').mkdir()
+    args = shlex.split(f'-q -b {tmp_path} -p {tmp_path}/data/classes.py::WorkflowA -t {tmp_path}/tmp -o {tmp_path}/out --engine native --incremental --cache')
+    blobs = tmp_path / 'tmp' / '.cache' / 'blobs'
+    cli.run(cli.get_parser(), args)
+    before = {path.name: path.read_bytes() for path in blobs.iterdir()}
+    with open(tmp_path / 'data' / 'keywords.txt', 'a') as fil:
+        fil.write('\nzebra\n')
+    cli.run(cli.get_parser(), args)
+    # NOTE: Combinations updated in place are hard links to the cache, the cached versions have to stay as they were.
+    assert any(b'zebra' in path.read_bytes() for path in (tmp_path / 'tmp').glob('*+*'))
+    assert {name: (blobs / name).read_bytes() for name in before if (blobs / name).is_file()} == before
@@ -0,0 +1,75 @@
+import importlib.util
+import pathlib
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def translate(cwd):
+    spec = importlib.util.spec_from_file_location('translate', pathlib.Path(cwd.parent, 'helpers', 'translate.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FlakyBackend:
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.requests = list()
+
+    def translate(self, words, language):
+        self.requests.append(list(words))
+        if self.failures:
+            self.failures -= 1
+            raise Exception('Rate limited')
+        return [word.upper() for word in words]
+
+
+def test_dictionary_cache(translate, tmp_dir):
+    dictionary = pathlib.Path(tmp_dir, 'dictionary.tsv')
+    dictionary.write_text('pl\tbeer\tpiwo\npl\thouse\tdom\nde\tbeer\tBier\n')
+    backend = translate.DictionaryBackend(dictionary)
+    path = pathlib.Path(tmp_dir, 'cache.sqlite')
+    cache = translate.Cache(path, backend.key, 'en')
+    lines = ['beer\n', 'house\n', '\n', 'beer\n', 'cat\n']
+    assert list(translate.translate(lines, 'pl', backend, cache, batch_size=2)) == [('beer', 'piwo'), ('house', 'dom'), ('cat', 'cat')]
+    assert cache.get(['beer', 'cat'], 'pl') == {'beer': 'piwo', 'cat': 'cat'}
+    assert cache.get(['beer'], 'de') == dict()
+    flaky = FlakyBackend(0)
+    assert list(translate.translate(['beer', 'dog'], 'pl', flaky, cache)) == [('beer', 'piwo'), ('dog', 'DOG')]
+    assert flaky.requests == [['dog']]
+    cache.close()
+
+    # NOTE: Other backends and source languages do not get the cached translations.
+    for key, source_language in (('google', 'en'), (backend.key, 'es')):
+        cache = translate.Cache(path, key, source_language)
+        flaky = FlakyBackend(0)
+        assert list(translate.translate(['beer'], 'pl', flaky, cache)) == [('beer', 'BEER')]
+        assert flaky.requests == [['beer']]
+        cache.close()
+    dictionary.write_text('pl\tbeer\tbrowar\n')
+    assert translate.DictionaryBackend(dictionary).key != backend.key
+
+
+def test_old_cache(translate, tmp_dir):
+    path = pathlib.Path(tmp_dir, 'cache.sqlite')
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute('CREATE TABLE translations (word TEXT, language TEXT, translation TEXT, PRIMARY KEY (word, language))')
+        connection.execute("INSERT INTO translations VALUES ('beer', 'pl', 'piwo')")
+    connection.close()
+    cache = translate.Cache(path, 'google', 'en')
+    assert cache.get(['beer'], 'pl') == dict()
+    cache.put({'beer': 'piwo'}, 'pl')
+    assert cache.get(['beer'], 'pl') == {'beer': 'piwo'}
+    cache.close()
+
+
+def test_retry(translate):
+    backend = FlakyBackend(2)
+    assert list(translate.translate(['beer'], 'pl', backend, backoff=0)) == [('beer', 'BEER')]
+    assert len(backend.requests) == 3
+    with pytest.raises(Exception):
+        list(translate.translate(['beer'], 'pl', FlakyBackend(2), retries=1, backoff=0))